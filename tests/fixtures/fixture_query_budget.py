@@ -0,0 +1,27 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from core import query_budget as budgets
+
+
+@pytest.fixture
+def query_budget(db):
+    """Контекстный менеджер query_budget(limit) с отчётом о запросах."""
+    return budgets.query_budget
+
+
+@pytest.fixture
+def view_budget(db):
+    """Бюджет запросов view из settings.QUERY_BUDGETS."""
+    return budgets.view_budget
+
+
+@pytest.fixture
+def count_queries(db):
+    """Число запросов, выполненных функцией."""
+    def count(func, *args, **kwargs):
+        with CaptureQueriesContext(connection) as context:
+            func(*args, **kwargs)
+        return len(context)
+    return count
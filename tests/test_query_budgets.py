@@ -0,0 +1,138 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from core.query_budget import QueryBudgetExceeded
+from posts import timeline
+from posts.models import Comment, Follow, Group, Post
+
+pytestmark = [pytest.mark.django_db]
+
+User = get_user_model()
+
+
+def add_posts(count, author=None, group=None):
+    """Посты разных авторов и групп, если они не заданы:
+    так N+1 по автору или группе не спрячется за кэшем объектов."""
+    start = Post.objects.count()
+    for number in range(start, start + count):
+        Post.objects.create(
+            text=f'Пост {number}',
+            author=author or User.objects.create_user(f'author{number}'),
+            group=group or Group.objects.create(
+                title=f'Группа {number}', slug=f'group-{number}'),
+        )
+
+
+def add_comments(post, count):
+    start = Comment.objects.count()
+    for number in range(start, start + count):
+        Comment.objects.create(
+            post=post,
+            author=User.objects.create_user(f'reader{number}'),
+            text=f'Комментарий {number}',
+        )
+
+
+def follow_authors(user):
+    """Подписывает на всех авторов и заполняет ленту сразу:
+    в тестах с транзакцией фоновые задачи после commit не выполняются."""
+    authors = User.objects.exclude(pk=user.pk).filter(posts__isnull=False)
+    for author in authors:
+        follow, created = Follow.objects.get_or_create(
+            user=user, author=author)
+        if created:
+            timeline.follow_added(follow.pk)
+
+
+class TestQueryBudgets:
+
+    def assert_constant(self, count_queries, view_budget, view_name,
+                        get, grow):
+        """Страница укладывается в бюджет, и число запросов
+        не растёт вместе с числом постов или комментариев."""
+        get()
+        small = count_queries(get)
+        grow()
+        with view_budget(view_name):
+            get()
+        large = count_queries(get)
+        assert small == large, (
+            f'{view_name}: {small} запросов на маленькой странице '
+            f'и {large} на большой - похоже на N+1'
+        )
+
+    def test_index(self, client, count_queries, view_budget):
+        add_posts(1)
+        self.assert_constant(
+            count_queries, view_budget, 'posts:index',
+            lambda: client.get(reverse('posts:index')),
+            lambda: add_posts(9),
+        )
+
+    def test_group_list(self, client, group, count_queries, view_budget):
+        add_posts(1, group=group)
+        url = reverse('posts:group_list', kwargs={'slug': group.slug})
+        self.assert_constant(
+            count_queries, view_budget, 'posts:group_list',
+            lambda: client.get(url),
+            lambda: add_posts(9, group=group),
+        )
+
+    def test_profile(self, client, user, count_queries, view_budget):
+        add_posts(1, author=user)
+        url = reverse('posts:profile', kwargs={'username': user.username})
+        self.assert_constant(
+            count_queries, view_budget, 'posts:profile',
+            lambda: client.get(url),
+            lambda: add_posts(9, author=user),
+        )
+
+    def test_follow_index(self, user, user_client, count_queries,
+                          view_budget):
+        add_posts(1)
+        follow_authors(user)
+
+        def grow():
+            add_posts(9)
+            follow_authors(user)
+
+        self.assert_constant(
+            count_queries, view_budget, 'posts:follow_index',
+            lambda: user_client.get(reverse('posts:follow_index')),
+            grow,
+        )
+
+    def test_post_detail(self, client, post, count_queries, view_budget):
+        add_comments(post, 1)
+        url = reverse('posts:post_detail', kwargs={'post_id': post.id})
+        self.assert_constant(
+            count_queries, view_budget, 'posts:post_detail',
+            lambda: client.get(url),
+            lambda: add_comments(post, 99),
+        )
+
+    def test_post_create(self, user_client, group, view_budget):
+        with view_budget('posts:post_create'):
+            user_client.post(
+                reverse('posts:post_create'),
+                data={'text': 'Новый пост', 'group': group.id},
+            )
+        assert Post.objects.count() == 1
+
+    def test_add_comment(self, user_client, post, view_budget):
+        add_comments(post, 10)
+        with view_budget('posts:add_comment'):
+            user_client.post(
+                reverse('posts:add_comment', kwargs={'post_id': post.id}),
+                data={'text': 'Новый комментарий'},
+            )
+        assert post.comments.count() == 11
+
+    def test_exceeded_budget_reports_repeated_sql(self, query_budget):
+        with pytest.raises(QueryBudgetExceeded) as error:
+            with query_budget(1, label='N+1'):
+                for post_id in range(3):
+                    Post.objects.filter(pk=post_id).exists()
+        assert 'N+1: 3 запросов при бюджете 1' in str(error.value)
+        assert '3 x SELECT' in str(error.value)
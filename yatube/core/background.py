@@ -0,0 +1,62 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import OperationalError, connections
+
+from core.db.sqlite3.base import is_busy
+
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.BACKGROUND_WORKERS,
+                thread_name_prefix='background',
+            )
+        return _executor
+
+
+def _run(func, args, kwargs):
+    try:
+        for attempt in range(settings.BACKGROUND_BUSY_RETRIES + 1):
+            try:
+                func(*args, **kwargs)
+                return
+            except OperationalError as error:
+                if (
+                    not is_busy(error)
+                    or attempt == settings.BACKGROUND_BUSY_RETRIES
+                ):
+                    raise
+                logger.warning(
+                    'Фоновая задача %s: база занята, повтор %s',
+                    func, attempt + 1,
+                )
+                connections.close_all()
+                time.sleep(settings.BACKGROUND_BUSY_BACKOFF * 2 ** attempt)
+    except Exception:
+        logger.exception('Фоновая задача %s завершилась ошибкой', func)
+    finally:
+        # У каждого потока свои соединения с базой, закрываем их сами
+        connections.close_all()
+
+
+def submit(func, *args, **kwargs):
+    """Выполняет func вне запроса в пуле потоков процесса. Если база
+    занята, задача повторяется целиком, поэтому func должна быть
+    идемпотентной. При BACKGROUND_TASKS_SYNC задача выполняется
+    сразу (для тестов)."""
+    if settings.BACKGROUND_TASKS_SYNC:
+        func(*args, **kwargs)
+        return
+    _get_executor().submit(_run, func, args, kwargs)
@@ -0,0 +1,149 @@
+import time
+import zlib
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+from core import metrics
+from core.staticfiles import accepted_encodings
+
+try:
+    import brotli
+except ImportError:  # без brotli ответы сжимаются только gzip
+    brotli = None
+
+# Форматы, которые уже сжаты: повторное сжатие тратит процессор
+# и почти не уменьшает размер
+COMPRESSED_TYPES = (
+    'image/', 'video/', 'audio/', 'font/woff', 'application/zip',
+    'application/gzip', 'application/x-gzip', 'application/pdf',
+    'application/octet-stream',
+)
+
+
+class GzipCompressor:
+    def __init__(self, level):
+        # wbits=31: поток в формате gzip, а не zlib
+        self.compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        return self.compressor.compress(data)
+
+    def flush(self):
+        return self.compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self.compressor.flush()
+
+
+class BrotliCompressor:
+    def __init__(self, quality):
+        self.compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data):
+        return self.compressor.process(data)
+
+    def flush(self):
+        return self.compressor.flush()
+
+    def finish(self):
+        return self.compressor.finish()
+
+
+COMPRESSORS = {
+    'br': BrotliCompressor,
+    'gzip': GzipCompressor,
+}
+
+
+def choose_encoding(request):
+    accepted = accepted_encodings(request)
+    for encoding in settings.COMPRESSION_LEVELS:
+        if encoding in accepted and (encoding != 'br' or brotli is not None):
+            return encoding
+    return None
+
+
+def is_compressible(response):
+    content_type = response.get('Content-Type', '')
+    return not (
+        response.has_header('Content-Encoding')
+        or content_type.startswith(COMPRESSED_TYPES)
+        or (
+            not response.streaming
+            and len(response.content) < settings.COMPRESSION_MIN_SIZE
+        )
+    )
+
+
+def compress_content(compressor, content):
+    started = time.thread_time()
+    compressed = compressor.compress(content) + compressor.finish()
+    return compressed, time.thread_time() - started
+
+
+def compress_stream(compressor, content, view_name):
+    """Сжимает потоковый ответ по частям: каждая часть сразу уходит
+    клиенту. Статистика записывается, когда поток закончился."""
+    raw_bytes = 0
+    output_bytes = 0
+    cpu_time = 0.0
+    for chunk in content:
+        raw_bytes += len(chunk)
+        started = time.thread_time()
+        data = compressor.compress(chunk) + compressor.flush()
+        cpu_time += time.thread_time() - started
+        output_bytes += len(data)
+        if data:
+            yield data
+    started = time.thread_time()
+    data = compressor.finish()
+    cpu_time += time.thread_time() - started
+    output_bytes += len(data)
+    yield data
+    metrics.compression_recorded(
+        view_name, raw_bytes, output_bytes, cpu_time)
+
+
+class CompressionMiddleware:
+    """Сжимает ответ gzip или brotli по Accept-Encoding, в том числе
+    потоковый. Уже сжатые файлы и ответы с Content-Encoding не
+    трогает. Размер до сжатия и процессорное время сжатия попадают
+    в метрики view (core.metrics)."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        # От Accept-Encoding зависит ответ, даже если он не сжат
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = choose_encoding(request)
+        if encoding is None or not is_compressible(response):
+            return response
+        compressor = COMPRESSORS[encoding](
+            settings.COMPRESSION_LEVELS[encoding])
+        match = request.resolver_match
+        view_name = match.view_name if match else metrics.UNRESOLVED
+        if response.streaming:
+            response.streaming_content = compress_stream(
+                compressor, response.streaming_content, view_name)
+            del response['Content-Length']
+        else:
+            raw_bytes = len(response.content)
+            compressed, cpu_time = compress_content(
+                compressor, response.content)
+            if len(compressed) >= raw_bytes:
+                metrics.compression_recorded(
+                    view_name, raw_bytes, raw_bytes, cpu_time)
+                return response
+            metrics.compression_recorded(
+                view_name, raw_bytes, len(compressed), cpu_time)
+            response.content = compressed
+            response['Content-Length'] = len(compressed)
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            # Сжатый ответ уже не совпадает побайтно с исходным
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoding
+        return response
@@ -0,0 +1,150 @@
+import random
+import re
+import time
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.sqlite3 import base
+
+# PRAGMA, которые можно задать в OPTIONS['pragmas']
+PRAGMAS = (
+    'journal_mode', 'synchronous', 'mmap_size', 'cache_size',
+    'busy_timeout', 'temp_store',
+)
+PRAGMA_VALUE = re.compile(r'^-?\d+$|^[a-zA-Z]+$')
+BUSY_MESSAGES = ('database is locked', 'database is busy')
+
+
+def apply_pragmas(connection, pragmas):
+    """Выполняет PRAGMA для соединения sqlite3."""
+    for name, value in pragmas.items():
+        if name not in PRAGMAS or not PRAGMA_VALUE.match(str(value)):
+            raise ImproperlyConfigured(
+                f'Недопустимая настройка SQLite: {name}={value!r}'
+            )
+        connection.execute(f'PRAGMA {name} = {value}')
+
+
+def is_busy(error):
+    return any(message in str(error) for message in BUSY_MESSAGES)
+
+
+def retry_busy(func, retries, backoff, max_wait=None, set_timeout=None):
+    """Вызывает func; пока база занята другим соединением, повторяет
+    вызов до retries раз с экспоненциально растущей паузой.
+    max_wait - предел всего ожидания в секундах, считая и ожидание
+    внутри SQLite (busy_timeout): на время повтора set_timeout(секунды)
+    сокращает busy_timeout до оставшегося времени, а set_timeout(None)
+    возвращает прежнее значение."""
+    deadline = None if max_wait is None else time.monotonic() + max_wait
+    attempt = 0
+    shortened = False
+    try:
+        while True:
+            try:
+                return func()
+            except base.Database.OperationalError as error:
+                if attempt == retries or not is_busy(error):
+                    raise
+                # Разброс паузы, чтобы ждущие потоки не просыпались вместе
+                pause = backoff * 2 ** attempt * random.uniform(0.5, 1.5)
+                if deadline is not None:
+                    remaining = deadline - time.monotonic() - pause
+                    if remaining <= 0:
+                        raise
+                    if set_timeout is not None:
+                        set_timeout(remaining)
+                        shortened = True
+                time.sleep(pause)
+                attempt += 1
+    finally:
+        if shortened:
+            set_timeout(None)
+
+
+def busy_timeout_setter(connection):
+    """Функция для retry_busy: задаёт busy_timeout соединения
+    в секундах (не больше исходного) или возвращает исходный."""
+    original = connection.execute('PRAGMA busy_timeout').fetchone()[0]
+
+    def set_timeout(seconds):
+        timeout = original if seconds is None else min(
+            int(seconds * 1000), original)
+        connection.execute(f'PRAGMA busy_timeout = {timeout}')
+    return set_timeout
+
+
+class RetryingCursorWrapper(base.SQLiteCursorWrapper):
+    def __init__(self, connection, wrapper):
+        super().__init__(connection)
+        self.wrapper = wrapper
+
+    def execute(self, query, params=None):
+        return self.wrapper.retry_busy(
+            lambda: super(RetryingCursorWrapper, self).execute(query, params),
+            statement=True,
+        )
+
+    def executemany(self, query, param_list):
+        # param_list может быть генератором: для повтора нужен список
+        param_list = list(param_list)
+        return self.wrapper.retry_busy(
+            lambda: super(RetryingCursorWrapper, self).executemany(
+                query, param_list),
+            statement=True,
+        )
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """SQLite с PRAGMA на каждое соединение и повтором запросов,
+    получивших "database is locked". В OPTIONS, кроме параметров
+    sqlite3.connect: pragmas (словарь), busy_retries, busy_backoff
+    (начальная пауза в секундах), busy_max_wait (предел всего ожидания
+    занятой базы в секундах, вместе с busy_timeout).
+
+    Транзакции atomic() начинаются с BEGIN IMMEDIATE. Запрос внутри
+    atomic() не повторяется: в WAL "database is locked" там означает
+    и устаревший снимок чтения, который исправит только новая
+    транзакция."""
+
+    def get_connection_params(self):
+        kwargs = super().get_connection_params()
+        self.pragmas = kwargs.pop('pragmas', {})
+        self.busy_retries = kwargs.pop('busy_retries', 0)
+        self.busy_backoff = kwargs.pop('busy_backoff', 0.05)
+        self.busy_max_wait = kwargs.pop('busy_max_wait', None)
+        return kwargs
+
+    def get_new_connection(self, conn_params):
+        connection = super().get_new_connection(conn_params)
+        apply_pragmas(connection, self.pragmas)
+        self.set_busy_timeout = busy_timeout_setter(connection)
+        return connection
+
+    def retry_busy(self, func, statement=False):
+        retries = self.busy_retries
+        # Повторять запрос внутри транзакции бесполезно: её должен
+        # начать заново вызывающий код
+        if statement and self.in_atomic_block:
+            retries = 0
+        return retry_busy(
+            func, retries, self.busy_backoff,
+            self.busy_max_wait, self.set_busy_timeout,
+        )
+
+    def _start_transaction_under_autocommit(self):
+        # BEGIN IMMEDIATE берёт блокировку записи сразу, ожидая её
+        # по busy_timeout. При обычном BEGIN переход от чтения
+        # к записи внутри atomic() получает "database is locked"
+        # без ожидания, а повторять такие запросы нельзя
+        self.cursor().execute('BEGIN IMMEDIATE')
+
+    def create_cursor(self, name=None):
+        return self.connection.cursor(
+            factory=lambda connection: RetryingCursorWrapper(
+                connection, self)
+        )
+
+    def _commit(self):
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                return self.retry_busy(self.connection.commit)
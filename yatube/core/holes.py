@@ -0,0 +1,54 @@
+import re
+from urllib.parse import parse_qsl, urlencode
+
+from django.conf import settings
+from django.template.loader import render_to_string
+from django.utils.module_loading import import_string
+
+# Место на странице для фрагмента, зависящего от пользователя.
+# Страница с такими местами одинакова для всех и кэшируется целиком;
+# HolePunchMiddleware заполняет места при каждом ответе, как ESI.
+HOLE = re.compile(rb'<!--hole:([a-z_]+):([^>]*?)-->')
+
+
+def marker(name, **kwargs):
+    # urlencode кодирует ">", поэтому комментарий не разорвать
+    return f'<!--hole:{name}:{urlencode(kwargs)}-->'
+
+
+def render_hole(request, name, args):
+    path = settings.HOLES.get(name)
+    if path is None:
+        return ''
+    return import_string(path)(request, **dict(parse_qsl(args)))
+
+
+class HolePunchMiddleware:
+    """Заполняет места для фрагментов (settings.HOLES: имя -> функция
+    (request, **аргументы), возвращающая HTML) в HTML-ответах."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (
+            response.streaming
+            or 'text/html' not in response.get('Content-Type', '')
+            or b'<!--hole:' not in response.content
+        ):
+            return response
+        charset = response.charset
+        response.content = HOLE.sub(
+            lambda match: render_hole(
+                request, match.group(1).decode(), match.group(2).decode()
+            ).encode(charset),
+            response.content,
+        )
+        if response.has_header('Content-Length'):
+            response['Content-Length'] = len(response.content)
+        return response
+
+
+def user_menu(request):
+    return render_to_string('includes/user_menu.html', request=request)
@@ -0,0 +1,49 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import Client
+
+from core import metrics
+
+
+class Command(BaseCommand):
+    help = (
+        'Запрашивает страницы с каждой кодировкой сжатия и выводит по '
+        'каждому view размер ответа до и после сжатия и время сжатия'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'urls', nargs='*', default=['/'],
+            help='Адреса страниц, по умолчанию главная',
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=10,
+            help='Сколько раз запросить каждую страницу',
+        )
+
+    def handle(self, *args, **options):
+        client = Client()
+        self.stdout.write(
+            f'{"view":<28}{"сжатие":>8}{"байт до":>10}{"байт после":>12}'
+            f'{"доля":>7}{"мс CPU":>9}'
+        )
+        for encoding in settings.COMPRESSION_LEVELS:
+            metrics.reset()
+            for url in options['urls']:
+                for _ in range(options['repeat']):
+                    response = client.get(url, HTTP_ACCEPT_ENCODING=encoding)
+                    if response.streaming:
+                        # Сжатие потока учитывается, когда он прочитан
+                        b''.join(response.streaming_content)
+            for view_name, stats in sorted(metrics.snapshot().items()):
+                if not stats.compressed:
+                    continue
+                input_bytes = stats.compress_input / stats.compressed
+                output_bytes = stats.compress_output / stats.compressed
+                self.stdout.write(
+                    f'{view_name:<28}{encoding:>8}{input_bytes:>10.0f}'
+                    f'{output_bytes:>12.0f}'
+                    f'{output_bytes / input_bytes:>7.2f}'
+                    f'{stats.compress_time / stats.compressed * 1000:>9.2f}'
+                )
+        metrics.reset()
@@ -0,0 +1,163 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.db.sqlite3.base import (apply_pragmas, busy_timeout_setter,
+                                  is_busy, retry_busy)
+
+# Наборы PRAGMA для сравнения: стандартный бэкенд Django,
+# только WAL и настройки проекта
+PROFILES = {
+    'stock': {},
+    'wal': {'journal_mode': 'wal'},
+    'project': settings.SQLITE_PRAGMAS,
+}
+SCHEMA = (
+    'CREATE TABLE comment ('
+    ' id INTEGER PRIMARY KEY, post_id INTEGER NOT NULL,'
+    ' text TEXT NOT NULL, created REAL NOT NULL)',
+    'CREATE INDEX comment_post_created ON comment (post_id, created, id)',
+)
+POSTS = 1000
+
+
+class Worker(threading.Thread):
+    def __init__(self, path, pragmas, retries, until, write):
+        super().__init__()
+        self.path = path
+        self.pragmas = pragmas
+        self.retries = retries
+        self.until = until
+        self.write = write
+        self.done = 0
+        self.errors = 0
+
+    def operation(self, connection, number):
+        post_id = number * 7919 % POSTS
+        if self.write:
+            connection.execute(
+                'INSERT INTO comment (post_id, text, created) '
+                'VALUES (?, ?, ?)',
+                (post_id, 'Комментарий ' * 10, time.time()),
+            )
+            connection.commit()
+        else:
+            connection.execute(
+                'SELECT id, text FROM comment WHERE post_id = ? '
+                'ORDER BY created, id LIMIT 20', (post_id,)
+            ).fetchall()
+
+    def attempt(self, connection, number):
+        # Если commit получил "database is locked", транзакция
+        # остаётся открытой: без отката повтор вставил бы строку
+        # ещё раз
+        try:
+            self.operation(connection, number)
+        except sqlite3.OperationalError:
+            connection.rollback()
+            raise
+
+    def run(self):
+        # Как и у Django, по умолчанию ждём занятую базу 5 секунд
+        connection = sqlite3.connect(self.path)
+        apply_pragmas(connection, self.pragmas)
+        set_timeout = busy_timeout_setter(connection)
+        number = 0
+        while time.monotonic() < self.until:
+            number += 1
+            try:
+                retry_busy(
+                    lambda: self.attempt(connection, number),
+                    self.retries, settings.SQLITE_BUSY_BACKOFF,
+                    settings.SQLITE_BUSY_MAX_WAIT, set_timeout,
+                )
+                self.done += 1
+            except sqlite3.OperationalError as error:
+                if not is_busy(error):
+                    raise
+                self.errors += 1
+        connection.close()
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает скорость чтения и записи SQLite при разных PRAGMA '
+        'под нагрузкой из нескольких потоков'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=4)
+        parser.add_argument('--writers', type=int, default=2)
+        parser.add_argument(
+            '--seconds', type=float, default=3,
+            help='Длительность замера для каждого набора',
+        )
+        parser.add_argument(
+            '--rows', type=int, default=20000,
+            help='Сколько строк создать перед замером',
+        )
+        parser.add_argument(
+            '--pragma', action='append', default=[], metavar='NAME=VALUE',
+            help='Добавить набор "custom" с этими PRAGMA',
+        )
+
+    def handle(self, *args, **options):
+        profiles = dict(PROFILES)
+        if options['pragma']:
+            try:
+                profiles['custom'] = dict(
+                    pragma.split('=', 1) for pragma in options['pragma']
+                )
+            except ValueError:
+                raise CommandError('PRAGMA задаются как NAME=VALUE')
+        self.stdout.write(
+            f'{"набор":<10}{"чтений/с":>12}{"записей/с":>12}{"ошибок":>10}'
+        )
+        for name, pragmas in profiles.items():
+            retries = 0 if name == 'stock' else settings.SQLITE_BUSY_RETRIES
+            with tempfile.TemporaryDirectory() as directory:
+                path = os.path.join(directory, 'benchmark.sqlite3')
+                self.prepare(path, pragmas, options['rows'])
+                reads, writes, errors = self.measure(
+                    path, pragmas, retries, options)
+            self.stdout.write(
+                f'{name:<10}{reads:>12.0f}{writes:>12.0f}{errors:>10}'
+            )
+
+    def prepare(self, path, pragmas, rows):
+        connection = sqlite3.connect(path)
+        apply_pragmas(connection, pragmas)
+        for statement in SCHEMA:
+            connection.execute(statement)
+        connection.executemany(
+            'INSERT INTO comment (post_id, text, created) VALUES (?, ?, ?)',
+            ((number % POSTS, 'Комментарий', number)
+             for number in range(rows)),
+        )
+        connection.commit()
+        connection.close()
+
+    def measure(self, path, pragmas, retries, options):
+        until = time.monotonic() + options['seconds']
+        workers = [
+            Worker(path, pragmas, retries, until, write=False)
+            for _ in range(options['readers'])
+        ] + [
+            Worker(path, pragmas, retries, until, write=True)
+            for _ in range(options['writers'])
+        ]
+        started = time.monotonic()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.monotonic() - started
+        reads = sum(worker.done for worker in workers if not worker.write)
+        writes = sum(worker.done for worker in workers if worker.write)
+        errors = sum(worker.errors for worker in workers)
+        return reads / elapsed, writes / elapsed, errors
@@ -0,0 +1,30 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core import replicas
+
+
+class Command(BaseCommand):
+    help = 'Копирует основную базу SQLite в реплики для чтения'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=0,
+            help='Повторять копирование каждые N секунд',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            for alias in settings.DATABASE_REPLICAS:
+                started = time.monotonic()
+                replicas.sync(alias)
+                self.stdout.write(
+                    f'{alias}: {time.monotonic() - started:.2f} с'
+                )
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
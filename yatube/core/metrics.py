@@ -0,0 +1,264 @@
+import threading
+import time
+import weakref
+from bisect import bisect_left
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+from django.utils.module_loading import import_string
+
+# Границы корзин гистограммы времени ответа, в секундах
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+UNRESOLVED = 'unresolved'
+PREFIX = 'yatube'
+
+# Каждый поток пишет только в свой набор счётчиков, поэтому
+# запросы не ждут друг друга. Блокировка нужна лишь при появлении
+# и завершении потока: набор завершившегося потока переносится
+# в _retired. /metrics складывает _retired и наборы живых потоков.
+_shards = []
+_retired = {}
+# RLock: набор потока может переноситься сборщиком мусора, пока
+# этот же поток держит блокировку
+_shards_lock = threading.RLock()
+_local = threading.local()
+
+
+class ViewStats:
+    __slots__ = (
+        'buckets', 'count', 'duration', 'queries', 'sql_time',
+        'template_time', 'response_bytes', 'compressed', 'compress_input',
+        'compress_output', 'compress_time',
+    )
+
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.duration = 0.0
+        self.queries = 0
+        self.sql_time = 0.0
+        self.template_time = 0.0
+        self.response_bytes = 0
+        # Сжатые ответы (core.compression): размер до и после сжатия
+        # и процессорное время сжатия
+        self.compressed = 0
+        self.compress_input = 0
+        self.compress_output = 0
+        self.compress_time = 0.0
+
+    def add(self, other):
+        for index, value in enumerate(other.buckets):
+            self.buckets[index] += value
+        for name in self.__slots__[1:]:
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+
+
+class RequestStats:
+    """Счётчики одного запроса: SQL и рендеринг шаблонов."""
+
+    def __init__(self):
+        self.queries = 0
+        self.sql_time = 0.0
+        self.template_time = 0.0
+        self.template_depth = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        # Обёртка connection.execute_wrapper
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.sql_time += time.perf_counter() - started
+
+
+class _ThreadMarker:
+    """Живёт в thread-local, пока жив поток."""
+
+
+def _merge(total, shard):
+    for view_name, stats in list(shard.items()):
+        total.setdefault(view_name, ViewStats()).add(stats)
+
+
+def _retire(shard):
+    with _shards_lock:
+        _shards[:] = [other for other in _shards if other is not shard]
+        _merge(_retired, shard)
+
+
+def _shard():
+    try:
+        return _local.shard
+    except AttributeError:
+        shard = {}
+        _local.marker = _ThreadMarker()
+        weakref.finalize(_local.marker, _retire, shard)
+        _local.shard = shard
+        with _shards_lock:
+            _shards.append(shard)
+        return shard
+
+
+def _view_stats(view_name):
+    shard = _shard()
+    stats = shard.get(view_name)
+    if stats is None:
+        stats = shard[view_name] = ViewStats()
+    return stats
+
+
+@contextmanager
+def template_timer():
+    """Замеряет рендеринг шаблона. Учитывается только внешний
+    рендеринг: вложенные render_to_string (фрагменты постов)
+    уже входят в его время."""
+    request_stats = getattr(_local, 'request', None)
+    if request_stats is None:
+        yield
+        return
+    request_stats.template_depth += 1
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        request_stats.template_depth -= 1
+        if not request_stats.template_depth:
+            request_stats.template_time += time.perf_counter() - started
+
+
+def record(view_name, duration, request_stats, response_bytes):
+    stats = _view_stats(view_name)
+    stats.buckets[bisect_left(BUCKETS, duration)] += 1
+    stats.count += 1
+    stats.duration += duration
+    stats.queries += request_stats.queries
+    stats.sql_time += request_stats.sql_time
+    stats.template_time += request_stats.template_time
+    stats.response_bytes += response_bytes
+
+
+def compression_recorded(view_name, input_bytes, output_bytes, cpu_time):
+    stats = _view_stats(view_name)
+    stats.compressed += 1
+    stats.compress_input += input_bytes
+    stats.compress_output += output_bytes
+    stats.compress_time += cpu_time
+
+
+def count_streamed_bytes(view_name, content):
+    """Размер потокового ответа известен только после отправки."""
+    size = 0
+    for chunk in content:
+        size += len(chunk)
+        yield chunk
+    _view_stats(view_name).response_bytes += size
+
+
+def snapshot():
+    """Сумма счётчиков всех потоков по каждому view."""
+    total = {}
+    with _shards_lock:
+        _merge(total, _retired)
+        shards = list(_shards)
+    for shard in shards:
+        _merge(total, shard)
+    return total
+
+
+def reset():
+    with _shards_lock:
+        _retired.clear()
+        for shard in _shards:
+            shard.clear()
+
+
+class MetricsMiddleware:
+    """Собирает по каждому view время ответа, число и время SQL-запросов,
+    время рендеринга шаблонов и размер ответа."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request_stats = RequestStats()
+        _local.request = request_stats
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(request_stats))
+                response = self.get_response(request)
+        finally:
+            _local.request = None
+        duration = time.perf_counter() - started
+        match = request.resolver_match
+        view_name = match.view_name if match else UNRESOLVED
+        if response.streaming:
+            response.streaming_content = count_streamed_bytes(
+                view_name, response.streaming_content)
+            response_bytes = 0
+        else:
+            response_bytes = len(response.content)
+        record(view_name, duration, request_stats, response_bytes)
+        return response
+
+
+def _labels(**labels):
+    pairs = ','.join(
+        '{}="{}"'.format(
+            name, str(value).replace('\\', '\\\\').replace('"', '\\"'))
+        for name, value in labels.items()
+    )
+    return '{' + pairs + '}'
+
+
+def _metric(lines, name, metric_type, description, samples):
+    lines.append(f'# HELP {PREFIX}_{name} {description}')
+    lines.append(f'# TYPE {PREFIX}_{name} {metric_type}')
+    for suffix, labels, value in samples:
+        lines.append(f'{PREFIX}_{name}{suffix}{_labels(**labels)} {value}')
+
+
+def render():
+    """Метрики в текстовом формате Prometheus."""
+    views = sorted(snapshot().items())
+    lines = []
+    histogram = []
+    for view_name, stats in views:
+        cumulative = 0
+        for bound, count in zip(BUCKETS + ('+Inf',), stats.buckets):
+            cumulative += count
+            histogram.append(
+                ('_bucket', {'view': view_name, 'le': bound}, cumulative))
+        histogram.append(('_sum', {'view': view_name}, stats.duration))
+        histogram.append(('_count', {'view': view_name}, stats.count))
+    _metric(lines, 'request_duration_seconds', 'histogram',
+            'Время ответа view', histogram)
+    counters = (
+        ('sql_queries_total', 'queries', 'Число SQL-запросов'),
+        ('sql_duration_seconds_total', 'sql_time', 'Время SQL-запросов'),
+        ('template_render_seconds_total', 'template_time',
+         'Время рендеринга шаблонов'),
+        ('response_bytes_total', 'response_bytes', 'Размер ответов'),
+        ('compressed_responses_total', 'compressed', 'Число сжатых ответов'),
+        ('compression_input_bytes_total', 'compress_input',
+         'Размер сжатых ответов до сжатия'),
+        ('compression_output_bytes_total', 'compress_output',
+         'Размер сжатых ответов после сжатия'),
+        ('compression_cpu_seconds_total', 'compress_time',
+         'Процессорное время сжатия ответов'),
+    )
+    for name, attr, description in counters:
+        _metric(lines, name, 'counter', description, [
+            ('', {'view': view_name}, getattr(stats, attr))
+            for view_name, stats in views
+        ])
+    for path in settings.METRICS_COLLECTORS:
+        for name, metric_type, description, samples in import_string(path)():
+            _metric(lines, name, metric_type, description, [
+                ('', labels, value) for labels, value in samples
+            ])
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,78 @@
+import re
+from collections import Counter
+from contextlib import ContextDecorator
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import CaptureQueriesContext
+
+# Литералы в SQL заменяются на ?, чтобы одинаковые запросы
+# с разными параметрами (признак N+1) считались вместе
+LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+\b")
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def normalize(sql):
+    return LITERALS.sub('?', sql)
+
+
+def report(queries):
+    """Выполненные запросы; повторяющиеся запросы идут первыми."""
+    repeats = Counter(normalize(query['sql']) for query in queries)
+    lines = [
+        f'{count} x {sql}'
+        for sql, count in repeats.most_common() if count > 1
+    ]
+    lines += [
+        f'{number}. {query["sql"]}'
+        for number, query in enumerate(queries, 1)
+    ]
+    return '\n'.join(lines)
+
+
+class query_budget(ContextDecorator):
+    """Проверяет, что блок или функция выполняет не больше limit
+    запросов к базе. При превышении ошибка перечисляет запросы.
+
+        with query_budget(3):
+            client.get(url)
+    """
+
+    def __init__(self, limit, label='', using=DEFAULT_DB_ALIAS):
+        self.limit = limit
+        self.label = label
+        self.using = using
+        self.context = None
+
+    def __enter__(self):
+        self.context = CaptureQueriesContext(connections[self.using])
+        self.context.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.context.__exit__(exc_type, exc_value, traceback)
+        if exc_type is not None:
+            return False
+        if len(self) > self.limit:
+            raise QueryBudgetExceeded(
+                f'{self.label or "Блок"}: {len(self)} запросов '
+                f'при бюджете {self.limit}\n{report(self.queries)}'
+            )
+        return False
+
+    def __len__(self):
+        return len(self.context)
+
+    @property
+    def queries(self):
+        return self.context.captured_queries
+
+
+def view_budget(view_name, using=DEFAULT_DB_ALIAS):
+    """Бюджет view из settings.QUERY_BUDGETS."""
+    return query_budget(
+        settings.QUERY_BUDGETS[view_name], label=view_name, using=using
+    )
@@ -0,0 +1,122 @@
+import os
+import random
+import sqlite3
+import threading
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# Кука "недавно писал": пока она жива, запросы клиента читают
+# с основной базы и видят свои изменения, даже если реплика отстала
+PIN_COOKIE = 'replica_pin'
+SAFE_METHODS = ('GET', 'HEAD')
+
+_local = threading.local()
+
+
+def current_replica():
+    return getattr(_local, 'alias', None)
+
+
+def snapshot_time(alias):
+    """Время, на которое снят текущий снимок реплики (unix time)."""
+    try:
+        return os.stat(connections[alias].settings_dict['NAME']).st_mtime
+    except FileNotFoundError:
+        return 0
+
+
+def use_primary_if_stale(modified):
+    """Переключает запрос на основную базу, если снимок реплики
+    старше времени modified последнего изменения нужных данных."""
+    alias = current_replica()
+    if alias is not None and snapshot_time(alias) < modified:
+        _local.alias = None
+
+
+def choose_replica(request):
+    """Реплика для запроса или None, если читать нужно с основной базы."""
+    replicas = settings.DATABASE_REPLICAS
+    match = request.resolver_match
+    if (
+        not replicas
+        or request.method not in SAFE_METHODS
+        or PIN_COOKIE in request.COOKIES
+        or match is None
+        or match.view_name not in settings.REPLICA_VIEWS
+    ):
+        return None
+    return random.choice(replicas)
+
+
+class ReplicaRouter:
+    """Чтение в запросах, выбранных ReplicaMiddleware, идёт
+    с реплики; запись и всё остальное - с основной базы."""
+
+    def db_for_read(self, model, **hints):
+        return current_replica() or DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики - копии основной базы
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        # Схема реплик приходит вместе с копией основной базы
+        return db not in settings.DATABASE_REPLICAS
+
+
+class ReplicaMiddleware:
+    """Направляет GET-запросы к view из REPLICA_VIEWS на реплику.
+    После запроса, меняющего данные, клиент на REPLICA_PIN_SECONDS
+    получает куку, и его чтения идут с основной базы."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            response = self.get_response(request)
+        finally:
+            _local.alias = None
+        if (
+            settings.DATABASE_REPLICAS
+            and request.method not in SAFE_METHODS
+        ):
+            response.set_cookie(
+                PIN_COOKIE, '1', max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True, samesite='Lax',
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        _local.alias = choose_replica(request)
+
+
+def copy_database(path, using=DEFAULT_DB_ALIAS):
+    """Снимок базы SQLite через backup API. Копия пишется рядом
+    и подменяет файл path целиком: открытые соединения реплики
+    дочитывают старый снимок, новые открывают уже свежий."""
+    started = time.time()
+    source = connections[using]
+    source.ensure_connection()
+    temp_path = f'{path}.sync'
+    target = sqlite3.connect(temp_path)
+    try:
+        source.connection.backup(target)
+        # Реплика только читается: журнал WAL ей не нужен, а его
+        # файлы -wal и -shm не должны пережить подмену базы
+        target.execute('PRAGMA journal_mode=DELETE')
+    finally:
+        target.close()
+    # Время изменения файла - момент снимка: по нему видно,
+    # какие изменения в реплику уже попали
+    os.utime(temp_path, (started, started))
+    os.replace(temp_path, path)
+
+
+def sync(alias):
+    copy_database(connections[alias].settings_dict['NAME'])
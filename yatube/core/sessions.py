@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.contrib.sessions import middleware
+
+SAFE_METHODS = ('GET', 'HEAD')
+
+
+def is_anonymous_read(request):
+    """GET к view из SESSIONLESS_APPS от клиента без куки сессии,
+    который за время запроса ничего не записал в сессию."""
+    match = request.resolver_match
+    session = getattr(request, 'session', None)
+    return (
+        request.method in SAFE_METHODS
+        and match is not None
+        and match.app_name in settings.SESSIONLESS_APPS
+        and settings.SESSION_COOKIE_NAME not in request.COOKIES
+        and session is not None
+        and not session.modified
+    )
+
+
+class SessionMiddleware(middleware.SessionMiddleware):
+    """Сессия без следов в ответе на анонимное чтение. Без куки сессия
+    не загружается из хранилища, но обращение к ней (request.user
+    в шаблоне) добавляло бы Vary: Cookie, и общие кэши хранили бы
+    страницу отдельно для каждого набора кук. Кэш перед сайтом
+    должен пропускать мимо себя запросы с кукой сессии."""
+
+    def process_response(self, request, response):
+        if is_anonymous_read(request):
+            request.session.accessed = False
+        return super().process_response(request, response)
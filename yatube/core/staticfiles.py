@@ -0,0 +1,152 @@
+import gzip
+import mimetypes
+import os
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import (ManifestStaticFilesStorage,
+                                                staticfiles_storage)
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse
+from django.templatetags.static import static
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+
+try:
+    import brotli
+except ImportError:  # без brotli остаются только gzip-копии
+    brotli = None
+
+# Форматы, которые имеет смысл сжимать: картинки PNG и JPEG
+# уже сжаты
+COMPRESSIBLE = ('.css', '.js', '.svg', '.ico', '.json', '.txt', '.xml',
+                '.html', '.map')
+# Копия сохраняется, только если она заметно меньше оригинала
+MIN_SAVING = 0.95
+ENCODINGS = {
+    'br': '.br',
+    'gzip': '.gz',
+}
+IMMUTABLE = 'public, max-age=31536000, immutable'
+
+
+def compress(path):
+    """Пишет рядом с файлом сжатые копии .gz и .br."""
+    with open(path, 'rb') as source:
+        data = source.read()
+    if len(data) < settings.STATIC_COMPRESS_MIN_SIZE:
+        return
+    variants = {'.gz': gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants['.br'] = brotli.compress(data, quality=11)
+    for suffix, compressed in variants.items():
+        if len(compressed) < len(data) * MIN_SAVING:
+            with open(path + suffix, 'wb') as target:
+                target.write(compressed)
+
+
+class CompressedManifestStorage(ManifestStaticFilesStorage):
+    """Статика с хэшем содержимого в имени и заранее сжатыми копиями.
+    Файлу без записи в манифесте исходное имя отдаётся только при DEBUG
+    или без STATIC_MANIFEST_STRICT (тесты), иначе это ошибка."""
+
+    def post_process(self, *args, **kwargs):
+        yield from super().post_process(*args, **kwargs)
+        names = set(self.hashed_files) | set(self.hashed_files.values())
+        for name in names:
+            if name.endswith(COMPRESSIBLE) and self.exists(name):
+                compress(self.path(name))
+
+    def stored_name(self, name):
+        if self.hash_key(name) not in self.hashed_files and (
+            settings.DEBUG or not settings.STATIC_MANIFEST_STRICT
+        ):
+            return name
+        return super().stored_name(name)
+
+    def is_hashed(self, name):
+        if not hasattr(self, '_hashed_names'):
+            self._hashed_names = set(self.hashed_files.values())
+        return name in self._hashed_names
+
+
+def accepted_encodings(request):
+    accepted = set()
+    for part in request.META.get('HTTP_ACCEPT_ENCODING', '').split(','):
+        encoding, _, params = part.strip().partition(';')
+        if params.replace(' ', '') not in ('q=0', 'q=0.0', 'q=0.00'):
+            accepted.add(encoding.strip().lower())
+    return accepted
+
+
+def preload_links():
+    links = []
+    for name in settings.STATIC_PRELOAD:
+        kind = 'style' if name.endswith('.css') else 'script'
+        links.append(f'<{static(name)}>; rel=preload; as={kind}')
+    return ', '.join(links)
+
+
+class StaticFilesMiddleware:
+    """Отдаёт файлы из STATIC_ROOT: сжатую копию по Accept-Encoding,
+    файлы с хэшем в имени - с Cache-Control: immutable. HTML-ответам
+    дописывает в заголовок Link предзагрузку STATIC_PRELOAD."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if (
+            settings.STATIC_ROOT
+            and request.method in ('GET', 'HEAD')
+            and request.path_info.startswith(settings.STATIC_URL)
+        ):
+            response = self.serve(
+                request, request.path_info[len(settings.STATIC_URL):])
+            if response is not None:
+                return response
+        response = self.get_response(request)
+        if (
+            settings.STATIC_PRELOAD
+            and response.status_code == 200
+            and 'text/html' in response.get('Content-Type', '')
+        ):
+            links = [response['Link']] if response.has_header('Link') else []
+            response['Link'] = ', '.join(links + [preload_links()])
+        return response
+
+    def serve(self, request, name):
+        try:
+            path = safe_join(settings.STATIC_ROOT, name)
+        except SuspiciousFileOperation:
+            return None
+        if not os.path.isfile(path):
+            return None
+        stat = os.stat(path)
+        response = get_conditional_response(
+            request, last_modified=int(stat.st_mtime))
+        if response is None:
+            content_type, _ = mimetypes.guess_type(name)
+            encoding, file_path = None, path
+            accepted = accepted_encodings(request)
+            for candidate, suffix in ENCODINGS.items():
+                if candidate in accepted and os.path.isfile(path + suffix):
+                    encoding, file_path = candidate, path + suffix
+                    break
+            response = FileResponse(
+                open(file_path, 'rb'),
+                content_type=content_type or 'application/octet-stream',
+            )
+            response['Content-Length'] = os.path.getsize(file_path)
+            if encoding:
+                response['Content-Encoding'] = encoding
+        response['Last-Modified'] = http_date(stat.st_mtime)
+        if any(os.path.isfile(path + suffix) for suffix in ENCODINGS.values()):
+            patch_vary_headers(response, ('Accept-Encoding',))
+        is_hashed = getattr(staticfiles_storage, 'is_hashed', None)
+        if is_hashed is not None and is_hashed(name):
+            response['Cache-Control'] = IMMUTABLE
+        else:
+            response['Cache-Control'] = (
+                f'public, max-age={settings.STATIC_MAX_AGE}')
+        return response
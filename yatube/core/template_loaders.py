@@ -0,0 +1,57 @@
+import re
+
+from django.conf import settings
+from django.template.loaders import app_directories, filesystem
+
+# Содержимое этих тегов выводится с сохранением пробелов
+PRESERVED = re.compile(
+    r'(<(pre|textarea)\b.*?</\2>)', re.IGNORECASE | re.DOTALL)
+# Пробелы вокруг переноса строки: отступы и пустые строки
+INDENT = re.compile(r'[ \t]*\n\s*')
+# Перенос после строки только из тегов шаблона: в ответе от такой
+# строки остался бы лишь пустой перенос
+TAG_LINE = re.compile(r'^((?:\{%.*?%\}|\{#.*?#\})+)\n', re.MULTILINE)
+
+
+def minify(source):
+    """Убирает отступы, пустые строки и переносы после строк из одних
+    тегов шаблона. Пробел между элементами остаётся переносом строки,
+    поэтому страница выглядит в браузере так же."""
+    parts = PRESERVED.split(source)
+    # После split: текст, <pre>...</pre>, имя тега, текст, ...
+    for index in range(0, len(parts), 3):
+        parts[index] = TAG_LINE.sub(
+            r'\1', INDENT.sub('\n', parts[index]))
+    return ''.join(
+        part for index, part in enumerate(parts) if index % 3 != 2)
+
+
+class MinifyingMixin:
+    """Сжимает исходник HTML-шаблона перед компиляцией. Сжатый исходник
+    запоминается по файлу: без cached.Loader (DEBUG) шаблон читается
+    на каждый запрос, но сжимается заново только после правки."""
+
+    def __init__(self, engine, *args, **kwargs):
+        super().__init__(engine, *args, **kwargs)
+        self.minified = {}
+
+    def get_contents(self, origin):
+        contents = super().get_contents(origin)
+        if (
+            not origin.template_name.endswith('.html')
+            or origin.template_name in settings.MINIFY_TEMPLATES_EXCLUDE
+        ):
+            return contents
+        source, minified = self.minified.get(origin.name, (None, None))
+        if source != contents:
+            minified = minify(contents)
+            self.minified[origin.name] = (contents, minified)
+        return minified
+
+
+class FilesystemLoader(MinifyingMixin, filesystem.Loader):
+    pass
+
+
+class AppDirectoriesLoader(MinifyingMixin, app_directories.Loader):
+    pass
@@ -0,0 +1,13 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from core import holes
+
+
+register = template.Library()
+
+
+@register.simple_tag
+def hole(name, **kwargs):
+    """Место для фрагмента пользователя, см. core.holes."""
+    return mark_safe(holes.marker(name, **kwargs))
@@ -0,0 +1,25 @@
+from unittest import mock
+
+from django.db import OperationalError
+from django.test import SimpleTestCase
+
+from core import background
+
+
+class BackgroundTests(SimpleTestCase):
+    @mock.patch('core.background.time.sleep')
+    def test_busy_task_is_retried(self, sleep):
+        """Задача, получившая "database is locked", повторяется"""
+        locked = OperationalError('database is locked')
+        task = mock.Mock(side_effect=[locked, locked, None])
+        background._run(task, (1,), {})
+        self.assertEqual(task.call_count, 3)
+        task.assert_called_with(1)
+
+    @mock.patch('core.background.time.sleep')
+    def test_other_errors_are_not_retried(self, sleep):
+        """Прочие ошибки только записываются в лог"""
+        task = mock.Mock(side_effect=OperationalError('no such table'))
+        with self.assertLogs('core.background', 'ERROR'):
+            background._run(task, (), {})
+        self.assertEqual(task.call_count, 1)
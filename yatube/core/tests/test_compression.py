@@ -0,0 +1,141 @@
+import gzip
+import io
+from unittest import mock
+
+import brotli
+from django.conf import settings
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.template import Engine
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from core import metrics
+from core.compression import is_compressible
+from core import template_loaders
+from core.template_loaders import minify
+from posts.models import Post, User
+
+
+INDEX_URL = reverse('posts:index')
+FEED_URL = reverse('posts:feed')
+DECOMPRESS = {
+    'gzip': gzip.decompress,
+    'br': brotli.decompress,
+}
+TEST_DATA = {
+    'username': 'author',
+    'test_post_text': 'Тестовый пост',
+}
+
+
+class MinifyTests(TestCase):
+    def test_indentation_is_removed(self):
+        """Отступы и пустые строки убираются, <pre> не меняется"""
+        source = (
+            '{% load static %}\n<div>\n    {% if text %}\n    <p>\n'
+            '        {{ text }}\n    </p>\n    {% endif %}\n\n</div>\n'
+            '<pre>  код\n    с отступом</pre>\n  <b>x</b>'
+        )
+        self.assertEqual(minify(source), (
+            '{% load static %}<div>\n{% if text %}<p>\n'
+            '{{ text }}\n</p>\n{% endif %}</div>\n'
+            '<pre>  код\n    с отступом</pre>\n<b>x</b>'
+        ))
+
+    def test_rendered_page_has_no_indentation(self):
+        """Страница, собранная из шаблонов, выходит без отступов"""
+        content = Client().get(INDEX_URL).content.decode()
+        self.assertNotIn('\n ', content)
+        self.assertNotIn('\n\n\n', content)
+
+    def test_source_is_minified_once(self):
+        """Без cached.Loader неизменённый шаблон не сжимается повторно"""
+        engine = Engine(
+            dirs=[settings.TEMPLATES_DIR],
+            loaders=['core.template_loaders.FilesystemLoader'],
+        )
+        with mock.patch.object(
+            template_loaders, 'minify', wraps=minify
+        ) as minify_mock:
+            engine.get_template('includes/footer.html')
+            engine.get_template('includes/footer.html')
+        self.assertEqual(minify_mock.call_count, 1)
+
+
+class CompressionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username=TEST_DATA['username'])
+        Post.objects.bulk_create(
+            Post(author=cls.user, text=f'{TEST_DATA["test_post_text"]} {i}')
+            for i in range(10)
+        )
+
+    def setUp(self):
+        metrics.reset()
+        self.guest_client = Client()
+
+    def test_response_is_compressed_by_accept_encoding(self):
+        """Ответ сжимается brotli или gzip в зависимости от Accept-Encoding"""
+        plain = self.guest_client.get(INDEX_URL)
+        self.assertNotIn('Content-Encoding', plain)
+        self.assertIn('Accept-Encoding', plain['Vary'])
+        cases = {'gzip, br': 'br', 'gzip': 'gzip', 'br;q=0, gzip': 'gzip'}
+        for accept, encoding in cases.items():
+            with self.subTest(accept=accept):
+                response = self.guest_client.get(
+                    INDEX_URL, HTTP_ACCEPT_ENCODING=accept)
+                self.assertEqual(response['Content-Encoding'], encoding)
+                self.assertEqual(
+                    int(response['Content-Length']), len(response.content))
+                self.assertEqual(
+                    DECOMPRESS[encoding](response.content), plain.content)
+
+    def test_streaming_response_is_compressed(self):
+        """Потоковый ответ сжимается по частям"""
+        plain = self.guest_client.get(FEED_URL)
+        plain_content = b''.join(plain.streaming_content)
+        for encoding, decompress in DECOMPRESS.items():
+            with self.subTest(encoding=encoding):
+                response = self.guest_client.get(
+                    FEED_URL, HTTP_ACCEPT_ENCODING=encoding)
+                self.assertEqual(response['Content-Encoding'], encoding)
+                content = b''.join(response.streaming_content)
+                self.assertEqual(decompress(content), plain_content)
+
+    def test_compressed_media_is_skipped(self):
+        """Картинки, архивы и уже сжатые ответы не сжимаются повторно"""
+        body = b'x' * 1000
+        encoded = HttpResponse(body, content_type='text/css')
+        encoded['Content-Encoding'] = 'br'
+        cases = (
+            HttpResponse(body, content_type='image/png'),
+            HttpResponse(body, content_type='application/gzip'),
+            HttpResponse(b'x' * 10),
+            encoded,
+        )
+        for response in cases:
+            with self.subTest(content_type=response['Content-Type']):
+                self.assertFalse(is_compressible(response))
+        self.assertTrue(is_compressible(HttpResponse(body)))
+
+    def test_compression_is_recorded_per_view(self):
+        """Размер до и после сжатия и время сжатия пишутся в метрики"""
+        response = self.guest_client.get(
+            INDEX_URL, HTTP_ACCEPT_ENCODING='gzip')
+        stats = metrics.snapshot()['posts:index']
+        self.assertEqual(stats.compressed, 1)
+        self.assertEqual(stats.compress_output, len(response.content))
+        self.assertGreater(stats.compress_input, stats.compress_output)
+        self.assertEqual(stats.response_bytes, len(response.content))
+
+    def test_report(self):
+        """Отчёт выводит строку для каждого view и кодировки"""
+        out = io.StringIO()
+        call_command(
+            'compression_report', INDEX_URL, FEED_URL, '--repeat', '1',
+            stdout=out,
+        )
+        for line in ('posts:index', 'posts:feed', 'gzip', 'br'):
+            self.assertIn(line, out.getvalue())
@@ -0,0 +1,73 @@
+from django.core.cache import cache
+from django.test import Client, override_settings, TestCase
+from django.urls import reverse
+
+from core import holes
+from posts.models import Follow, Post, User
+
+
+TEST_DATA = {
+    'username': 'author',
+    'reader_username': 'reader',
+    'test_post_text': 'Тестовый пост',
+}
+
+
+@override_settings(FEED_CACHE_ENABLED=True)
+class HolePunchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username=TEST_DATA['username'])
+        cls.reader = User.objects.create_user(
+            username=TEST_DATA['reader_username'])
+        cls.post = Post.objects.create(
+            author=cls.user, text=TEST_DATA['test_post_text'])
+        cls.POST_DETAIL_URL = reverse(
+            'posts:post_detail', kwargs={'post_id': cls.post.id})
+        cls.PROFILE_URL = reverse(
+            'posts:profile', kwargs={'username': cls.user.username})
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.author_client = Client()
+        self.author_client.force_login(self.user)
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def test_post_detail_holes(self):
+        """Ссылка редактирования - автору, форма комментария - вошедшим"""
+        edit_url = reverse('posts:post_edit', kwargs={'post_id': self.post.id})
+        comment_url = reverse(
+            'posts:add_comment', kwargs={'post_id': self.post.id})
+        expected = {
+            self.guest_client: (False, False),
+            self.author_client: (True, True),
+            self.reader_client: (False, True),
+        }
+        for client, (edit_link, comment_form) in expected.items():
+            with self.subTest(user=client.session.get('_auth_user_id')):
+                content = client.get(self.POST_DETAIL_URL).content.decode()
+                self.assertEqual(edit_url in content, edit_link)
+                self.assertEqual(comment_url in content, comment_form)
+                self.assertNotIn('<!--hole:', content)
+
+    def test_follow_button(self):
+        """Кнопка подписки на закэшированной странице автора"""
+        follow_url = reverse(
+            'posts:profile_follow', kwargs={'username': self.user.username})
+        unfollow_url = reverse(
+            'posts:profile_unfollow', kwargs={'username': self.user.username})
+        self.assertNotContains(self.author_client.get(self.PROFILE_URL),
+                               follow_url)
+        self.assertContains(self.reader_client.get(self.PROFILE_URL),
+                            follow_url)
+        Follow.objects.create(user=self.reader, author=self.user)
+        self.assertContains(self.reader_client.get(self.PROFILE_URL),
+                            unfollow_url)
+
+    def test_marker_arguments_are_escaped(self):
+        """Аргументы места не могут закрыть HTML-комментарий"""
+        marker = holes.marker('follow_button', author='--><script>')
+        self.assertEqual(marker.count('-->'), 1)
+        self.assertTrue(marker.endswith('-->'))
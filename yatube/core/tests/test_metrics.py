@@ -0,0 +1,114 @@
+import gc
+import threading
+from http import HTTPStatus
+from unittest import mock
+
+from django.test import Client, override_settings, TestCase
+from django.urls import reverse
+
+from core import metrics
+from posts.models import Post, User
+
+
+METRICS_URL = reverse('metrics')
+INDEX_URL = reverse('posts:index')
+TEST_DATA = {
+    'username': 'author',
+    'admin_username': 'admin',
+    'test_post_text': 'Тестовый пост',
+    'token': 'secret-token',
+}
+
+
+class MetricsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=TEST_DATA['username'])
+        cls.admin = User.objects.create_superuser(
+            TEST_DATA['admin_username'], '', 'password')
+        Post.objects.create(author=cls.user, text=TEST_DATA['test_post_text'])
+
+    def setUp(self):
+        metrics.reset()
+        self.guest_client = Client()
+        self.admin_client = Client()
+        self.admin_client.force_login(self.admin)
+
+    def scrape(self):
+        response = self.admin_client.get(METRICS_URL)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        return response.content.decode()
+
+    def test_requests_are_recorded_per_view(self):
+        """Время, SQL, шаблоны и размер ответа считаются по каждому view"""
+        response = self.guest_client.get(INDEX_URL)
+        self.guest_client.get(INDEX_URL)
+        stats = metrics.snapshot()['posts:index']
+        self.assertEqual(stats.count, 2)
+        self.assertEqual(sum(stats.buckets), 2)
+        self.assertGreater(stats.queries, 0)
+        self.assertGreater(stats.sql_time, 0)
+        self.assertGreater(stats.template_time, 0)
+        self.assertEqual(stats.response_bytes, 2 * len(response.content))
+
+    @mock.patch('core.metrics.time.perf_counter', side_effect=[0, 1, 5])
+    def test_nested_renders_are_not_counted_twice(self, perf_counter):
+        """Вложенный рендеринг входит во время внешнего"""
+        request_stats = metrics.RequestStats()
+        metrics._local.request = request_stats
+        try:
+            with metrics.template_timer():
+                with metrics.template_timer():
+                    pass
+        finally:
+            metrics._local.request = None
+        self.assertEqual(request_stats.template_time, 5)
+        self.assertEqual(request_stats.template_depth, 0)
+
+    def test_finished_threads_are_folded(self):
+        """Счётчики завершившихся потоков сохраняются, а их наборы
+        не накапливаются"""
+        shards = len(metrics._shards)
+
+        def work():
+            metrics.record('thread', 0.001, metrics.RequestStats(), 10)
+
+        for _ in range(50):
+            thread = threading.Thread(target=work)
+            thread.start()
+            thread.join()
+        gc.collect()
+        self.assertLessEqual(len(metrics._shards), shards)
+        stats = metrics.snapshot()['thread']
+        self.assertEqual(stats.count, 50)
+        self.assertEqual(stats.response_bytes, 500)
+
+    def test_prometheus_format(self):
+        """Метрики отдаются в текстовом формате Prometheus"""
+        self.guest_client.get(INDEX_URL)
+        content = self.scrape()
+        self.assertIn(
+            '# TYPE yatube_request_duration_seconds histogram', content)
+        self.assertIn(
+            'yatube_request_duration_seconds_bucket'
+            '{view="posts:index",le="+Inf"} 1',
+            content,
+        )
+        self.assertIn(
+            'yatube_request_duration_seconds_count{view="posts:index"} 1',
+            content,
+        )
+        self.assertIn('yatube_sql_queries_total{view="posts:index"}', content)
+
+    @override_settings(METRICS_TOKEN=TEST_DATA['token'])
+    def test_metrics_are_protected(self):
+        """Метрики доступны только персоналу или с токеном"""
+        response = self.guest_client.get(METRICS_URL)
+        self.assertEqual(response.status_code, HTTPStatus.FORBIDDEN)
+        response = self.guest_client.get(
+            METRICS_URL, HTTP_AUTHORIZATION='Bearer wrong')
+        self.assertEqual(response.status_code, HTTPStatus.FORBIDDEN)
+        response = self.guest_client.get(
+            METRICS_URL, HTTP_AUTHORIZATION=f'Bearer {TEST_DATA["token"]}')
+        self.assertEqual(response.status_code, HTTPStatus.OK)
@@ -0,0 +1,102 @@
+import os
+import sqlite3
+import tempfile
+import time
+from unittest import mock
+
+from django.http import HttpResponse
+from django.test import (override_settings, RequestFactory, TestCase,
+                         TransactionTestCase)
+from django.urls import resolve, reverse
+
+from core import replicas
+from posts.models import Post, User
+
+
+INDEX_URL = reverse('posts:index')
+SEARCH_URL = reverse('posts:search')
+REPLICA = 'replica0'
+TEST_DATA = {
+    'username': 'author',
+    'test_post_text': 'Тестовый пост',
+}
+
+
+@override_settings(DATABASE_REPLICAS=[REPLICA])
+class ReplicaRoutingTests(TestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.router = replicas.ReplicaRouter()
+
+    def route(self, request):
+        """База для чтения внутри view и ответ middleware."""
+        request.resolver_match = resolve(request.path)
+        used = []
+
+        def get_response(request):
+            middleware.process_view(request, None, (), {})
+            used.append(self.router.db_for_read(Post))
+            return HttpResponse()
+
+        middleware = replicas.ReplicaMiddleware(get_response)
+        response = middleware(request)
+        self.assertIsNone(replicas.current_replica())
+        return used[0], response
+
+    def test_reads_of_feed_pages_go_to_replica(self):
+        """GET страниц лент читает с реплики, остальное - с основной"""
+        requests = {
+            self.factory.get(INDEX_URL): REPLICA,
+            self.factory.head(INDEX_URL): REPLICA,
+            self.factory.get(SEARCH_URL): 'default',
+            self.factory.post(INDEX_URL): 'default',
+        }
+        for request, alias in requests.items():
+            with self.subTest(method=request.method, path=request.path):
+                self.assertEqual(self.route(request)[0], alias)
+        self.assertEqual(self.router.db_for_write(Post), 'default')
+
+    def test_writer_is_pinned_to_primary(self):
+        """После записи клиент читает свои изменения с основной базы"""
+        _, response = self.route(self.factory.post(INDEX_URL))
+        self.assertIn(replicas.PIN_COOKIE, response.cookies)
+        request = self.factory.get(INDEX_URL)
+        request.COOKIES[replicas.PIN_COOKIE] = '1'
+        self.assertEqual(self.route(request)[0], 'default')
+
+    def test_stale_replica_is_not_used(self):
+        """Если данные изменились после снимка, чтение идёт с основной"""
+        request = self.factory.get(INDEX_URL)
+        request.resolver_match = resolve(INDEX_URL)
+        middleware = replicas.ReplicaMiddleware(None)
+        snapshot = time.time()
+        with mock.patch.object(
+            replicas, 'snapshot_time', return_value=snapshot
+        ):
+            for modified, alias in ((snapshot - 1, REPLICA),
+                                    (snapshot + 1, 'default')):
+                with self.subTest(alias=alias):
+                    middleware.process_view(request, None, (), {})
+                    replicas.use_primary_if_stale(modified)
+                    self.assertEqual(
+                        self.router.db_for_read(Post), alias)
+        replicas._local.alias = None
+
+
+class ReplicaSyncTests(TransactionTestCase):
+    def test_copy_database(self):
+        """Снимок основной базы содержит её данные"""
+        user = User.objects.create_user(username=TEST_DATA['username'])
+        Post.objects.create(author=user, text=TEST_DATA['test_post_text'])
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'replica.sqlite3')
+            started = time.time()
+            replicas.copy_database(path)
+            self.assertGreaterEqual(os.stat(path).st_mtime, int(started))
+            replica = sqlite3.connect(path)
+            try:
+                texts = replica.execute(
+                    'SELECT text FROM posts_post').fetchall()
+            finally:
+                replica.close()
+        self.assertEqual(texts, [(TEST_DATA['test_post_text'],)])
@@ -0,0 +1,57 @@
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Post, User
+
+
+INDEX_URL = reverse('posts:index')
+ABOUT_URL = reverse('about:author')
+LOGIN_URL = reverse('users:login')
+TEST_DATA = {
+    'username': 'author',
+    'test_post_text': 'Тестовый пост',
+}
+
+
+class SessionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username=TEST_DATA['username'])
+        cls.post = Post.objects.create(
+            author=cls.user, text=TEST_DATA['test_post_text'])
+
+    def setUp(self):
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def vary(self, response):
+        return response.get('Vary', '')
+
+    def test_anonymous_reads_do_not_vary_on_cookie(self):
+        """Анонимные GET к лентам и about не зависят от кук"""
+        post_url = reverse(
+            'posts:post_detail', kwargs={'post_id': self.post.id})
+        for url in (INDEX_URL, post_url, ABOUT_URL):
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertNotIn('Cookie', self.vary(response))
+                self.assertEqual(list(response.cookies), [])
+
+    def test_other_requests_keep_session(self):
+        """Вход на сайт и страницы вошедших зависят от кук"""
+        self.assertIn('Cookie', self.vary(self.guest_client.get(LOGIN_URL)))
+        self.assertIn(
+            'Cookie', self.vary(self.authorized_client.get(INDEX_URL)))
+
+    def test_session_is_not_read_from_database(self):
+        """Сессия вошедшего пользователя хранится в подписанной куке"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.authorized_client.get(INDEX_URL)
+        self.assertEqual(response.context['user'], self.user)
+        self.assertFalse(any(
+            'django_session' in query['sql']
+            for query in queries.captured_queries
+        ))
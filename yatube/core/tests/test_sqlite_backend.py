@@ -0,0 +1,124 @@
+import io
+import os
+import sqlite3
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+
+from core.db.sqlite3 import base
+
+
+class SQLiteBackendTests(TestCase):
+    def test_connection_pragmas(self):
+        """PRAGMA из настроек применяются к соединению Django"""
+        expected = {
+            'busy_timeout': settings.SQLITE_PRAGMAS['busy_timeout'],
+            'cache_size': settings.SQLITE_PRAGMAS['cache_size'],
+            # temp_store = memory
+            'temp_store': 2,
+        }
+        with connection.cursor() as cursor:
+            for name, value in expected.items():
+                with self.subTest(pragma=name):
+                    cursor.execute(f'PRAGMA {name}')
+                    self.assertEqual(cursor.fetchone()[0], value)
+
+    @mock.patch('core.db.sqlite3.base.time.sleep')
+    def test_statement_in_atomic_block_is_not_retried(self, sleep):
+        """Запрос внутри atomic() не повторяется, вне его - повторяется"""
+        locked = sqlite3.OperationalError('database is locked')
+        with transaction.atomic():
+            func = mock.Mock(side_effect=[locked, 'ok'])
+            with self.assertRaises(sqlite3.OperationalError):
+                connection.retry_busy(func, statement=True)
+            self.assertEqual(func.call_count, 1)
+        connection.in_atomic_block = False
+        try:
+            func = mock.Mock(side_effect=[locked, 'ok'])
+            self.assertEqual(connection.retry_busy(func, statement=True), 'ok')
+        finally:
+            connection.in_atomic_block = True
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(
+                cursor.fetchone()[0], settings.SQLITE_PRAGMAS['busy_timeout'])
+
+
+class SQLiteTransactionTests(TransactionTestCase):
+    def test_transactions_take_write_lock_at_start(self):
+        """atomic() начинает транзакцию с BEGIN IMMEDIATE"""
+        with CaptureQueriesContext(connection) as queries:
+            with transaction.atomic():
+                pass
+        self.assertEqual(queries.captured_queries[0]['sql'], 'BEGIN IMMEDIATE')
+
+
+class SQLitePragmaTests(SimpleTestCase):
+    def test_wal_on_file_database(self):
+        """Файловая база переходит на журнал WAL"""
+        with tempfile.TemporaryDirectory() as directory:
+            database = sqlite3.connect(os.path.join(directory, 'test.db'))
+            try:
+                base.apply_pragmas(database, settings.SQLITE_PRAGMAS)
+                mode = database.execute('PRAGMA journal_mode').fetchone()
+            finally:
+                database.close()
+        self.assertEqual(mode, ('wal',))
+
+    def test_unknown_pragma_is_rejected(self):
+        """Неизвестные PRAGMA и значения с SQL не выполняются"""
+        database = sqlite3.connect(':memory:')
+        for pragmas in ({'writable_schema': 1}, {'cache_size': '1; DROP'}):
+            with self.subTest(pragmas=pragmas):
+                with self.assertRaises(ImproperlyConfigured):
+                    base.apply_pragmas(database, pragmas)
+        database.close()
+
+    @mock.patch('core.db.sqlite3.base.time.sleep')
+    def test_busy_database_is_retried(self, sleep):
+        """Занятая база - повтор с паузой, другие ошибки - сразу"""
+        locked = sqlite3.OperationalError('database is locked')
+        func = mock.Mock(side_effect=[locked, locked, 'ok'])
+        self.assertEqual(base.retry_busy(func, 3, 0.01), 'ok')
+        self.assertEqual(sleep.call_count, 2)
+        func = mock.Mock(side_effect=[locked] * 3)
+        with self.assertRaises(sqlite3.OperationalError):
+            base.retry_busy(func, 2, 0.01)
+        func = mock.Mock(side_effect=sqlite3.OperationalError('no table'))
+        with self.assertRaises(sqlite3.OperationalError):
+            base.retry_busy(func, 3, 0.01)
+        self.assertEqual(func.call_count, 1)
+
+    @mock.patch('core.db.sqlite3.base.time.sleep')
+    def test_retries_stop_at_max_wait(self, sleep):
+        """Повторы не выходят за max_wait, busy_timeout сокращается"""
+        locked = sqlite3.OperationalError('database is locked')
+        func = mock.Mock(side_effect=[locked, 'ok'])
+        set_timeout = mock.Mock()
+        self.assertEqual(
+            base.retry_busy(func, 5, 0.01, 10, set_timeout), 'ok')
+        timeout = set_timeout.call_args_list[0][0][0]
+        self.assertTrue(0 < timeout < 10)
+        set_timeout.assert_called_with(None)
+        func = mock.Mock(side_effect=locked)
+        set_timeout = mock.Mock()
+        with self.assertRaises(sqlite3.OperationalError):
+            base.retry_busy(func, 5, 0.01, 0, set_timeout)
+        self.assertEqual(func.call_count, 1)
+        set_timeout.assert_not_called()
+
+    def test_benchmark(self):
+        """Бенчмарк выводит строку для каждого набора PRAGMA"""
+        out = io.StringIO()
+        call_command(
+            'sqlite_benchmark', '--seconds', '0.1', '--rows', '100',
+            '--readers', '1', '--writers', '1', stdout=out,
+        )
+        for name in ('stock', 'wal', 'project'):
+            self.assertIn(name, out.getvalue())
@@ -0,0 +1,111 @@
+import gzip
+import os
+import shutil
+import tempfile
+
+import brotli
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.test import (Client, RequestFactory, TestCase,
+                         override_settings)
+from django.urls import reverse
+
+from core.staticfiles import (CompressedManifestStorage, IMMUTABLE,
+                              StaticFilesMiddleware)
+
+STATIC_ROOT = tempfile.mkdtemp()
+CSS = 'css/bootstrap.min.css'
+
+
+@override_settings(STATIC_ROOT=STATIC_ROOT)
+class StaticFilesTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        with override_settings(STATIC_ROOT=STATIC_ROOT):
+            call_command('collectstatic', interactive=False, verbosity=0)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(STATIC_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.client = Client()
+        self.url = staticfiles_storage.url(CSS)
+        with open(os.path.join(STATIC_ROOT, CSS), 'rb') as source:
+            self.original = source.read()
+
+    def test_names_are_hashed_and_compressed(self):
+        """collectstatic добавляет хэш к имени и пишет .gz и .br"""
+        name = staticfiles_storage.stored_name(CSS)
+        self.assertNotEqual(name, CSS)
+        path = os.path.join(STATIC_ROOT, name)
+        with open(path + '.gz', 'rb') as variant:
+            self.assertEqual(gzip.decompress(variant.read()), self.original)
+        with open(path + '.br', 'rb') as variant:
+            self.assertEqual(brotli.decompress(variant.read()), self.original)
+
+    def test_encoding_negotiation(self):
+        """Сжатая копия выбирается по Accept-Encoding"""
+        cases = {
+            'gzip, deflate, br': 'br',
+            'gzip': 'gzip',
+            'br;q=0, gzip': 'gzip',
+            '': None,
+        }
+        for accept, encoding in cases.items():
+            with self.subTest(accept=accept):
+                response = self.client.get(
+                    self.url, HTTP_ACCEPT_ENCODING=accept)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.get('Content-Encoding'), encoding)
+                self.assertIn('Accept-Encoding', response['Vary'])
+                self.assertEqual(response['Content-Type'], 'text/css')
+        response = self.client.get(self.url)
+        self.assertEqual(b''.join(response.streaming_content), self.original)
+
+    def test_cache_control(self):
+        """Файлы с хэшем кэшируются навсегда, без хэша - ненадолго"""
+        response = self.client.get(self.url)
+        self.assertEqual(response['Cache-Control'], IMMUTABLE)
+        response = self.client.get('/static/' + CSS)
+        self.assertNotIn('immutable', response['Cache-Control'])
+
+    def test_missing_file_is_not_served(self):
+        """Отсутствующие файлы и выход за STATIC_ROOT не отдаются"""
+        for url in ('/static/css/missing.css', '/static/../manage.py'):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_pages_preload_critical_css(self):
+        """HTML-страницы предзагружают CSS по имени с хэшем"""
+        response = self.client.get(reverse('posts:index'))
+        self.assertEqual(
+            response['Link'], f'<{self.url}>; rel=preload; as=style')
+        self.assertContains(response, self.url)
+
+    def test_existing_link_header_is_kept(self):
+        """Предзагрузка дописывается к заголовку Link ответа"""
+        link = '</feed/>; rel=alternate'
+
+        def view(request):
+            response = HttpResponse()
+            response['Link'] = link
+            return response
+
+        response = StaticFilesMiddleware(view)(
+            RequestFactory().get(reverse('posts:index')))
+        self.assertEqual(
+            response['Link'], f'{link}, <{self.url}>; rel=preload; as=style')
+
+    @override_settings(STATIC_MANIFEST_STRICT=True)
+    def test_missing_manifest_entry_is_an_error(self):
+        """Файл без записи в манифесте не отдаётся под исходным именем"""
+        with tempfile.TemporaryDirectory() as location:
+            storage = CompressedManifestStorage(location=location)
+            with self.assertRaises(ValueError):
+                storage.stored_name(CSS)
+            with self.settings(DEBUG=True):
+                self.assertEqual(storage.stored_name(CSS), CSS)
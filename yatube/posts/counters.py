@@ -0,0 +1,112 @@
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+
+from posts.models import Group, Post, PostCounter
+
+
+# Ключ счётчика всех постов сайта
+ALL_POSTS = 'posts'
+
+
+def group_key(group_id):
+    return f'posts:group:{group_id}'
+
+
+def post_keys(author_id, group_id):
+    """Ключи счётчиков, в которые входит пост. Посты автора
+    считает его статистика (posts.stats)."""
+    keys = [ALL_POSTS]
+    if group_id is not None:
+        keys.append(group_key(group_id))
+    return keys
+
+
+def change(keys, delta):
+    """Сдвигает счётчики на delta в текущей транзакции.
+    Отсутствующие счётчики не создаются: их значение
+    посчитается при первом чтении."""
+    if not keys or not delta:
+        return
+    PostCounter.objects.filter(key__in=keys, value__gte=-delta).update(
+        value=F('value') + delta
+    )
+
+
+def get_count(key, queryset):
+    """Значение счётчика; при первом обращении считается по queryset."""
+    value = (
+        PostCounter.objects.filter(key=key)
+        .values_list('value', flat=True).first()
+    )
+    if value is not None:
+        return value
+    return recount(key, queryset)
+
+
+def recount(key, queryset):
+    """Пересчитывает счётчик по queryset и сохраняет значение."""
+    with transaction.atomic():
+        value = queryset.count()
+        try:
+            with transaction.atomic():
+                PostCounter.objects.create(key=key, value=value)
+        except IntegrityError:
+            PostCounter.objects.filter(key=key).update(value=value)
+    return value
+
+
+def drop(keys):
+    PostCounter.objects.filter(key__in=keys).delete()
+
+
+def id_batches(queryset, batch_size):
+    """id объектов пачками по возрастанию, без OFFSET."""
+    last_id = 0
+    while True:
+        ids = list(
+            queryset.filter(pk__gt=last_id).order_by('pk')
+            .values_list('pk', flat=True)[:batch_size]
+        )
+        if not ids:
+            return
+        yield ids
+        last_id = ids[-1]
+
+
+def _sync(actual, repair):
+    """Сравнивает сохранённые счётчики с фактическими значениями,
+    при repair исправляет расхождения. Возвращает расхождения."""
+    stored = dict(
+        PostCounter.objects.filter(key__in=actual)
+        .values_list('key', 'value')
+    )
+    drift = [
+        (key, stored[key], value) for key, value in actual.items()
+        if key in stored and stored[key] != value
+    ]
+    if repair:
+        with transaction.atomic():
+            for key, _, value in drift:
+                PostCounter.objects.filter(key=key).update(value=value)
+            PostCounter.objects.bulk_create(
+                [
+                    PostCounter(key=key, value=value)
+                    for key, value in actual.items() if key not in stored
+                ],
+                ignore_conflicts=True,
+            )
+    return drift
+
+
+def verify(batch_size=500, repair=False):
+    """Проверяет все счётчики пачками по batch_size объектов.
+    Возвращает список расхождений (ключ, сохранено, фактически)."""
+    drift = _sync({ALL_POSTS: Post.objects.count()}, repair)
+    for ids in id_batches(Group.objects.all(), batch_size):
+        counts = dict(
+            Post.objects.filter(group_id__in=ids)
+            .order_by().values_list('group_id').annotate(Count('id'))
+        )
+        actual = {group_key(pk): counts.get(pk, 0) for pk in ids}
+        drift.extend(_sync(actual, repair))
+    return drift
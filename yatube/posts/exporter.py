@@ -0,0 +1,147 @@
+import csv
+import io
+import json
+import zlib
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from posts.models import Comment, Post
+
+FORMATS = ('jsonl', 'csv')
+# Поля выгрузки: имя в файле -> поле модели. Формат совпадает
+# с форматом import_posts, поэтому выгрузку можно загрузить обратно.
+KINDS = {
+    'posts': {
+        'model': Post,
+        'type': 'post',
+        'date': 'pub_date',
+        'fields': {
+            'id': 'id',
+            'author': 'author__username',
+            'group': 'group__slug',
+            'text': 'text',
+            'pub_date': 'pub_date',
+            'image': 'image',
+        },
+    },
+    'comments': {
+        'model': Comment,
+        'type': 'comment',
+        'date': 'created',
+        'fields': {
+            'id': 'id',
+            'post': 'post_id',
+            'author': 'author__username',
+            'text': 'text',
+            'created': 'created',
+        },
+    },
+}
+CONTENT_TYPES = {
+    'jsonl': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+
+def parse_since(value):
+    """Дата since из запроса или командной строки (ISO 8601). Без
+    часового пояса считается в текущем. Неверная дата - ValueError."""
+    if value is None:
+        return None
+    try:
+        since = parse_datetime(value)
+    except ValueError:
+        since = None
+    if since is None:
+        raise ValueError(f'Неверная дата: {value}')
+    if timezone.is_naive(since):
+        since = timezone.make_aware(since)
+    return since
+
+
+class Export:
+    """Выгрузка постов или комментариев по возрастанию (дата, id).
+    Таблица читается пачками по ключу: каждая пачка - отдельный
+    короткий запрос, и в памяти лежит не больше chunk_size строк.
+    После выгрузки watermark - дата последней строки, её можно
+    передать как since в следующий раз."""
+
+    def __init__(self, kind, since=None, chunk_size=1000):
+        self.kind = KINDS[kind]
+        self.since = since
+        self.chunk_size = chunk_size
+        self.watermark = since
+        self.count = 0
+
+    def batches(self):
+        date = self.kind['date']
+        fields = self.kind['fields']
+        queryset = (
+            self.kind['model'].objects.order_by(date, 'id')
+            .values_list(*fields.values())
+        )
+        if self.since is not None:
+            queryset = queryset.filter(**{f'{date}__gt': self.since})
+        date_index = list(fields).index(date)
+        last = None
+        while True:
+            batch = queryset
+            if last is not None:
+                batch = batch.filter(
+                    Q(**{f'{date}__gt': last[date_index]})
+                    | Q(**{date: last[date_index], 'id__gt': last[0]})
+                )
+            rows = list(
+                batch[:self.chunk_size].iterator(chunk_size=self.chunk_size)
+            )
+            if not rows:
+                return
+            last = rows[-1]
+            self.watermark = last[date_index]
+            self.count += len(rows)
+            yield [
+                {'type': self.kind['type'], **dict(zip(fields, row))}
+                for row in rows
+            ]
+            if len(rows) < self.chunk_size:
+                return
+
+    def lines(self, file_format):
+        """Текст выгрузки кусками, по куску на пачку строк."""
+        if file_format == 'jsonl':
+            for rows in self.batches():
+                yield ''.join(
+                    json.dumps(
+                        row, ensure_ascii=False, cls=DjangoJSONEncoder
+                    ) + '\n'
+                    for row in rows
+                )
+            return
+        buffer = io.StringIO()
+        writer = csv.DictWriter(
+            buffer, ['type', *self.kind['fields']], lineterminator='\n')
+        writer.writeheader()
+        for rows in self.batches():
+            writer.writerows(rows)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue()
+
+    def chunks(self, file_format, compress=False):
+        """Байты выгрузки; при compress - поток gzip."""
+        if not compress:
+            for text in self.lines(file_format):
+                yield text.encode()
+            return
+        # wbits=31: формат gzip с заголовком и контрольной суммой
+        compressor = zlib.compressobj(wbits=31)
+        for text in self.lines(file_format):
+            data = compressor.compress(text.encode())
+            if data:
+                yield data
+        yield compressor.flush()
@@ -0,0 +1,223 @@
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+from core import replicas
+
+
+# Области кэша: вся лента, лента группы, лента автора и страница поста.
+# Пост меняет поколения только своих областей, поэтому
+# новый пост сбрасывает ровно те ленты, в которые он попадает.
+# SITE меняется при правке групп и пользователей: их названия и имена
+# выводятся на любых страницах.
+ALL = 'all'
+SITE = 'site'
+HIT = 'hit'
+MISS = 'miss'
+
+
+def group_scope(slug):
+    return f'group:{slug}'
+
+
+def author_scope(username):
+    return f'author:{username}'
+
+
+def post_scope(post_id):
+    return f'post:{post_id}'
+
+
+def post_scopes(author_username, group_slug, post_id=None):
+    scopes = [ALL, author_scope(author_username)]
+    if group_slug is not None:
+        scopes.append(group_scope(group_slug))
+    if post_id is not None:
+        scopes.append(post_scope(post_id))
+    return scopes
+
+
+def _generation_key(scope):
+    return f'feed-gen:{scope}'
+
+
+def _modified_key(scope):
+    return f'feed-modified:{scope}'
+
+
+def _initial_generation():
+    # Вытесненное из кэша поколение начинается заново с текущего
+    # времени, чтобы не совпасть с уже использованными значениями
+    return int(time.time() * 1000)
+
+
+def get_generations(scopes):
+    keys = [_generation_key(scope) for scope in scopes]
+    generations = cache.get_many(keys)
+    for key in keys:
+        if key not in generations:
+            cache.add(key, _initial_generation(), None)
+            generations[key] = cache.get(key)
+    return [generations[key] for key in keys]
+
+
+def last_modified(scopes):
+    """Время последнего изменения областей (unix time).
+    Неизвестное время считается текущим."""
+    keys = [_modified_key(scope) for scope in scopes]
+    times = cache.get_many(keys)
+    for key in keys:
+        if key not in times:
+            cache.add(key, time.time(), None)
+            times[key] = cache.get(key) or time.time()
+    return max(times.values())
+
+
+def bump(scopes):
+    """Переходит на новое поколение областей:
+    старые страницы больше не будут найдены в кэше."""
+    scopes = set(scopes)
+    for scope in scopes:
+        key = _generation_key(scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, _initial_generation(), None)
+    now = time.time()
+    cache.set_many({_modified_key(scope): now for scope in scopes}, None)
+
+
+def _stats_key(view_name, outcome):
+    return f'feed-stats:{view_name}:{outcome}'
+
+
+def _count(view_name, outcome):
+    key = _stats_key(view_name, outcome)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 1, None)
+
+
+def stats():
+    """Попадания и промахи кэша по каждому view."""
+    keys = [
+        _stats_key(view_name, outcome)
+        for view_name in settings.FEED_CACHE_TIMEOUTS
+        for outcome in (HIT, MISS)
+    ]
+    values = cache.get_many(keys)
+    return {
+        view_name: {
+            outcome: values.get(_stats_key(view_name, outcome), 0)
+            for outcome in (HIT, MISS)
+        }
+        for view_name in settings.FEED_CACHE_TIMEOUTS
+    }
+
+
+def page_key(view_name, generations, request):
+    path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    generation = '.'.join(str(value) for value in generations)
+    return f'feed-page:{view_name}:{generation}:{path}'
+
+
+def request_scopes(request, get_scopes, args, kwargs):
+    # Области страницы считаются один раз на запрос:
+    # get_scopes может обращаться к базе
+    if not hasattr(request, '_feed_scopes'):
+        request._feed_scopes = get_scopes(*args, **kwargs)
+    return request._feed_scopes
+
+
+def cache_feed(view_name, get_scopes):
+    """Кэширует страницу ленты, одну для всех пользователей: части,
+    зависящие от пользователя, заполняются после кэша (core.holes).
+    get_scopes получает аргументы view и возвращает области ленты
+    или None, если страницу кэшировать не нужно.
+    Время жизни задаётся в settings.FEED_CACHE_TIMEOUTS."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            timeout = settings.FEED_CACHE_TIMEOUTS.get(view_name)
+            if (
+                not settings.FEED_CACHE_ENABLED
+                or not timeout
+                or request.method not in ('GET', 'HEAD')
+            ):
+                return view(request, *args, **kwargs)
+            scopes = request_scopes(request, get_scopes, args, kwargs)
+            if scopes is None:
+                return view(request, *args, **kwargs)
+            generations = get_generations([SITE, *scopes])
+            key = page_key(view_name, generations, request)
+            response = cache.get(key)
+            if response is not None:
+                _count(view_name, HIT)
+                response['X-Feed-Cache'] = HIT
+                return response
+            _count(view_name, MISS)
+            response = view(request, *args, **kwargs)
+            if response.status_code == 200 and not response.cookies:
+                cache.set(key, response, timeout)
+            response['X-Feed-Cache'] = MISS
+            return response
+        return wrapper
+    return decorator
+
+
+def page_etag(request, generations):
+    # Страница зависит от пользователя: ссылки редактирования,
+    # шапка с именем, форма комментария
+    generation = '.'.join(str(value) for value in generations)
+    return quote_etag(f'{request.user.pk or 0}-{generation}')
+
+
+def conditional_feed(get_scopes):
+    """Отвечает 304 на GET с совпавшим If-None-Match или
+    If-Modified-Since, не вызывая view: валидаторы берутся из поколений
+    областей без обращения к базе. get_scopes получает аргументы view
+    и может вернуть None - тогда view выполняется как обычно."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+            scopes = request_scopes(request, get_scopes, args, kwargs)
+            if scopes is None:
+                return view(request, *args, **kwargs)
+            scopes = [SITE, *scopes]
+            etag = page_etag(request, get_generations(scopes))
+            modified = last_modified(scopes)
+            # Отставшая реплика не должна попасть в кэш под новым ETag
+            replicas.use_primary_if_stale(modified)
+            # Время изменения не зависит от пользователя,
+            # поэтому Last-Modified отдаётся только анонимам.
+            # Last-Modified точен до секунды: пока не прошла секунда
+            # с изменения, следующее изменение может получить то же
+            # значение, и проверяются только по ETag
+            if (
+                request.user.is_authenticated
+                or time.time() - modified < 1
+            ):
+                modified = None
+            else:
+                modified = int(modified)
+            response = get_conditional_response(
+                request, etag=etag, last_modified=modified
+            )
+            if response is None:
+                response = view(request, *args, **kwargs)
+            if response.status_code in (200, 304):
+                response['ETag'] = etag
+                if modified is not None:
+                    response['Last-Modified'] = http_date(modified)
+                patch_cache_control(response, no_cache=True)
+            return response
+        return wrapper
+    return decorator
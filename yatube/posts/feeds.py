@@ -0,0 +1,91 @@
+import io
+from itertools import chain
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.urls import reverse
+from django.utils.feedgenerator import Atom1Feed
+from django.utils.html import escape, linebreaks
+from django.utils.text import Truncator
+from django.utils.xmlutils import SimplerXMLGenerator
+
+# Сколько постов читается из базы за раз и сколько записей
+# ленты собирается в один кусок ответа
+CHUNK_SIZE = 20
+TITLE_LENGTH = 50
+
+
+class StreamingAtom1Feed(Atom1Feed):
+    """Atom-лента, которая пишется по частям из итератора постов
+    и не держит в памяти все записи сразу."""
+
+    updated = None
+
+    def latest_post_date(self):
+        return self.updated or super().latest_post_date()
+
+    def stream(self, entries, encoding='utf-8'):
+        buffer = io.StringIO()
+        handler = SimplerXMLGenerator(buffer, encoding)
+
+        def flush():
+            data = buffer.getvalue().encode(encoding)
+            buffer.seek(0)
+            buffer.truncate()
+            return data
+
+        # Время обновления ленты - время самой свежей записи
+        first = next(entries, None)
+        if first is not None:
+            self.updated = first['updateddate']
+            entries = chain([first], entries)
+        handler.startDocument()
+        handler.startElement('feed', self.root_attributes())
+        self.add_root_elements(handler)
+        for number, entry in enumerate(entries, 1):
+            self.add_item(**entry)
+            item = self.items.pop()
+            handler.startElement('entry', self.item_attributes(item))
+            self.add_item_elements(handler, item)
+            handler.endElement('entry')
+            if number % CHUNK_SIZE == 0:
+                yield flush()
+        handler.endElement('feed')
+        yield flush()
+
+
+def post_entry(request, post):
+    link = request.build_absolute_uri(
+        reverse('posts:post_detail', kwargs={'post_id': post.id})
+    )
+    return {
+        'title': Truncator(post.text).chars(TITLE_LENGTH),
+        'link': link,
+        'description': linebreaks(escape(post.text)),
+        'author_name': post.author.get_full_name() or post.author.username,
+        'pubdate': post.pub_date,
+        'updateddate': post.pub_date,
+        'unique_id': link,
+        'categories': [post.group.title] if post.group_id else None,
+    }
+
+
+def atom_response(request, title, link, posts):
+    """Потоковый ответ с последними ATOM_FEED_ENTRIES постами.
+    Посты читаются из базы порциями при отправке ответа."""
+    feed = StreamingAtom1Feed(
+        title=title,
+        link=request.build_absolute_uri(link),
+        description=title,
+        language=settings.LANGUAGE_CODE,
+        feed_url=request.build_absolute_uri(),
+    )
+    posts = (
+        posts.select_related('author', 'group')
+        [:settings.ATOM_FEED_ENTRIES]
+        .iterator(chunk_size=CHUNK_SIZE)
+    )
+    entries = (post_entry(request, post) for post in posts)
+    return StreamingHttpResponse(
+        feed.stream(entries), content_type=feed.content_type
+    )
@@ -1,12 +1,14 @@
 from django import forms
 
 from posts.models import Comment, Post
+from posts.uploads import PostImageField
 
 
 class PostForm(forms.ModelForm):
     class Meta:
         model = Post
         fields = ('text', 'group', 'image')
+        field_classes = {'image': PostImageField}
         help_texts = {
             'text': ('Введите текст поста'),
             'group': ('Выберите группу для поста'),
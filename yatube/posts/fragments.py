@@ -0,0 +1,56 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils import translation
+from django.utils.safestring import mark_safe
+
+from posts import thumbnails
+
+TEMPLATE = 'posts/includes/post_template.html'
+
+
+def version(post):
+    """Версия фрагмента: всё, что выводит post_template.html.
+    Правка поста, смена имени автора, группы или её названия
+    и готовность миниатюры дают новую версию, поэтому старые
+    фрагменты не нужно удалять - они вытесняются из кэша сами."""
+    thumbnail = None
+    if post.image:
+        thumbnail = thumbnails.ready_thumbnail(post.image, 'post')
+    group = post.group if post.group_id else None
+    parts = (
+        post.text,
+        post.pub_date.isoformat(),
+        post.image.name or '',
+        thumbnail.name if thumbnail is not None else '',
+        post.author.get_full_name(),
+        group.slug if group else '',
+        group.title if group else '',
+        translation.get_language() or '',
+    )
+    return hashlib.md5('\0'.join(parts).encode()).hexdigest()
+
+
+def fragment_key(post):
+    return f'post-fragment:{post.pk}:{version(post)}'
+
+
+def render_posts(posts):
+    """HTML постов страницы. Готовые фрагменты берутся из кэша одним
+    get_many, недостающие рендерятся и сохраняются одним set_many."""
+    posts = list(posts)
+    timeout = settings.POST_FRAGMENT_TIMEOUT
+    keys = [fragment_key(post) for post in posts]
+    cached = cache.get_many(keys) if timeout else {}
+    rendered = {}
+    fragments = []
+    for post, key in zip(posts, keys):
+        html = cached.get(key)
+        if html is None:
+            html = rendered[key] = render_to_string(TEMPLATE, {'post': post})
+        fragments.append(mark_safe(html))
+    if rendered and timeout:
+        cache.set_many(rendered, timeout)
+    return fragments
@@ -0,0 +1,34 @@
+from django.template.loader import render_to_string
+
+from posts.forms import CommentForm
+from posts.models import Follow
+
+
+# Фрагменты страниц постов, которые зависят от пользователя
+# (см. core.holes): сами страницы кэшируются одни на всех.
+
+def post_edit_link(request, post_id, author):
+    if request.user.username != author:
+        return ''
+    return render_to_string(
+        'posts/includes/post_edit_link.html', {'post_id': post_id})
+
+
+def comment_form(request, post_id):
+    if not request.user.is_authenticated:
+        return ''
+    context = {'post_id': post_id, 'comment_form': CommentForm()}
+    return render_to_string(
+        'posts/includes/comment_form.html', context, request=request)
+
+
+def follow_button(request, author):
+    user = request.user
+    if not user.is_authenticated or user.username == author:
+        return ''
+    following = Follow.objects.filter(
+        user=user, author__username=author).exists()
+    return render_to_string(
+        'posts/includes/follow_button.html',
+        {'author': author, 'following': following},
+    )
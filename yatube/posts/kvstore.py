@@ -0,0 +1,91 @@
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from sorl.thumbnail.conf import settings as sorl_settings
+from sorl.thumbnail.kvstores.base import add_prefix
+from sorl.thumbnail.kvstores.cached_db_kvstore import EMPTY_VALUE, KVStore
+from sorl.thumbnail.models import KVStore as KVStoreModel
+
+
+class LRUKVStore(KVStore):
+    """Хранилище sorl-thumbnail с ограниченным LRU-кэшем в памяти процесса
+    перед кэшем Django и базой данных. Записи для целой страницы
+    загружаются заранее одним запросом через prefetch()."""
+
+    def __init__(self):
+        super().__init__()
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'prefetched': 0}
+
+    def _remember(self, key, value):
+        with self._lock:
+            self._lru[key] = value
+            self._lru.move_to_end(key)
+            while len(self._lru) > settings.THUMBNAIL_LRU_SIZE:
+                self._lru.popitem(last=False)
+
+    def _get_raw(self, key):
+        with self._lock:
+            if key in self._lru:
+                self._lru.move_to_end(key)
+                self._stats['hits'] += 1
+                return self._lru[key]
+            self._stats['misses'] += 1
+        value = super()._get_raw(key)
+        # Отсутствующие записи не запоминаются: миниатюру может
+        # создать другой процесс, и она должна появиться сразу
+        if value is not None:
+            self._remember(key, value)
+        return value
+
+    def _set_raw(self, key, value):
+        super()._set_raw(key, value)
+        self._remember(key, value)
+
+    def _delete_raw(self, *keys):
+        super()._delete_raw(*keys)
+        with self._lock:
+            for key in keys:
+                self._lru.pop(key, None)
+
+    def prefetch(self, image_files):
+        """Загружает записи для image_files: сначала из кэша Django,
+        остальные - одним запросом к базе."""
+        keys = {add_prefix(image_file.key) for image_file in image_files}
+        with self._lock:
+            keys -= self._lru.keys()
+        if not keys:
+            return
+        found = self.cache.get_many(keys)
+        missing = keys - found.keys()
+        if missing:
+            from_db = dict(
+                KVStoreModel.objects.filter(key__in=missing)
+                .values_list('key', 'value')
+            )
+            # Как и sorl, запоминаем отсутствие записи в кэше Django
+            self.cache.set_many(
+                {key: from_db.get(key, EMPTY_VALUE) for key in missing},
+                sorl_settings.THUMBNAIL_CACHE_TIMEOUT,
+            )
+            found.update(from_db)
+        for key, value in found.items():
+            if value != EMPTY_VALUE:
+                self._remember(key, value)
+        with self._lock:
+            self._stats['prefetched'] += len(found)
+
+    def clear_lru(self):
+        """Очищает кэш в памяти процесса: кэш Django и база
+        не меняются."""
+        with self._lock:
+            self._lru.clear()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats, size=len(self._lru))
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0
+        return stats
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+
+from posts import counters, stats
+
+
+class Command(BaseCommand):
+    help = (
+        'Сверяет счётчики постов и статистику авторов '
+        'с таблицами постов, комментариев и подписок'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--repair',
+            action='store_true',
+            help='Исправить найденные расхождения',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Сколько групп или авторов проверять за один запрос',
+        )
+
+    def handle(self, *args, **options):
+        drift = counters.verify(options['batch_size'], options['repair'])
+        drift += stats.verify(options['batch_size'], options['repair'])
+        for key, stored, actual in drift:
+            self.stdout.write(f'{key}: сохранено {stored}, на деле {actual}')
+        if not drift:
+            self.stdout.write(self.style.SUCCESS('Расхождений нет'))
+        elif options['repair']:
+            self.stdout.write(self.style.SUCCESS(
+                f'Исправлено счётчиков: {len(drift)}'
+            ))
+        else:
+            self.stdout.write(self.style.WARNING(
+                f'Найдено расхождений: {len(drift)}'
+            ))
@@ -0,0 +1,65 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import exporter
+
+
+class Command(BaseCommand):
+    help = (
+        'Потоково выгружает посты или комментарии в JSONL или CSV. '
+        'Дата последней строки выводится в конце: её можно передать '
+        'в --since, чтобы выгрузить только новые записи.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=exporter.KINDS)
+        parser.add_argument(
+            '--format',
+            choices=exporter.FORMATS,
+            default='jsonl',
+            help='Формат выгрузки',
+        )
+        parser.add_argument(
+            '--since',
+            help='Выгрузить записи новее этой даты (ISO 8601)',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='Сколько строк читать из базы за один запрос',
+        )
+        parser.add_argument(
+            '--gzip',
+            action='store_true',
+            help='Сжать выгрузку gzip',
+        )
+        parser.add_argument(
+            '--output',
+            help='Файл выгрузки; по умолчанию - стандартный вывод',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            since = exporter.parse_since(options['since'])
+        except ValueError:
+            raise CommandError('Неверная дата в --since')
+        export = exporter.Export(
+            options['kind'], since, options['chunk_size'])
+        chunks = export.chunks(options['format'], options['gzip'])
+        if options['output'] is None:
+            output = sys.stdout.buffer
+        else:
+            output = open(options['output'], 'wb')
+        try:
+            for chunk in chunks:
+                output.write(chunk)
+        finally:
+            if options['output'] is not None:
+                output.close()
+        watermark = export.watermark.isoformat() if export.watermark else ''
+        self.stderr.write(
+            f'Выгружено записей: {export.count}; '
+            f'последняя дата: {watermark}'
+        )
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from posts import feed_cache
+
+
+class Command(BaseCommand):
+    help = 'Показывает попадания и промахи кэша страниц лент'
+
+    def handle(self, *args, **options):
+        for view_name, counts in feed_cache.stats().items():
+            total = counts[feed_cache.HIT] + counts[feed_cache.MISS]
+            ratio = counts[feed_cache.HIT] / total if total else 0
+            self.stdout.write(
+                f'{view_name}: попаданий {counts[feed_cache.HIT]}, '
+                f'промахов {counts[feed_cache.MISS]}, доля {ratio:.1%}'
+            )
@@ -0,0 +1,70 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import importer
+
+
+class Command(BaseCommand):
+    help = (
+        'Импортирует группы, посты и комментарии из JSONL или CSV. '
+        'Тип записи задаёт поле type: group, post (по умолчанию) '
+        'или comment. Прерванный импорт продолжается с места остановки.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл с записями')
+        parser.add_argument(
+            '--format',
+            choices=importer.FORMATS,
+            help='Формат файла; по умолчанию - по расширению',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='Сколько записей вставлять в одной транзакции',
+        )
+        parser.add_argument(
+            '--restart',
+            action='store_true',
+            help='Начать импорт файла сначала',
+        )
+        parser.add_argument(
+            '--no-thumbnails',
+            action='store_true',
+            help='Не создавать миниатюры после импорта',
+        )
+
+    def report(self, imported, rate):
+        self.stdout.write(f'Импортировано {imported}, {rate:.0f} записей/с')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format']
+        if file_format is None:
+            file_format = os.path.splitext(path)[1].lstrip('.').lower()
+        if file_format not in importer.FORMATS:
+            raise CommandError(f'Неизвестный формат файла: {path}')
+        posts_importer = importer.Importer(
+            os.path.abspath(path),
+            chunk_size=options['chunk_size'],
+            make_thumbnails=not options['no_thumbnails'],
+        )
+        try:
+            posts_importer.run(
+                path, file_format, options['restart'], self.report)
+        except (importer.ImportRecordError, OSError) as error:
+            raise CommandError(error)
+        if posts_importer.skipped:
+            self.stdout.write(self.style.WARNING(
+                'Пропущено комментариев к неизвестным постам: '
+                f'{posts_importer.skipped}'
+            ))
+        if posts_importer.missing_images:
+            self.stdout.write(self.style.WARNING(
+                f'Не найдено картинок: {posts_importer.missing_images}'
+            ))
+        self.stdout.write(self.style.SUCCESS(
+            f'Импорт завершён, записей: {posts_importer.imported}'
+        ))
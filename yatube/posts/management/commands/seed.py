@@ -0,0 +1,75 @@
+from datetime import datetime, time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from posts import importer, seeding
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет базу синтетическими пользователями, группами, постами '
+        'и комментариями для проверки на больших объёмах'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--users', type=int, default=10000)
+        parser.add_argument('--groups', type=int, default=1000)
+        parser.add_argument('--posts', type=int, default=1000000)
+        parser.add_argument('--comments', type=int, default=1000000)
+        parser.add_argument(
+            '--images',
+            type=int,
+            default=0,
+            help='Сколько разных картинок создать; 0 - без картинок',
+        )
+        parser.add_argument(
+            '--image-share',
+            type=float,
+            default=0.1,
+            help='Доля постов с картинкой',
+        )
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=365,
+            help='За сколько дней распределить посты',
+        )
+        parser.add_argument(
+            '--until',
+            default='2026-01-01',
+            help='Дата последнего поста; от неё зависит воспроизводимость',
+        )
+        parser.add_argument('--chunk-size', type=int, default=5000)
+
+    def report(self, imported, rate):
+        self.stdout.write(f'Создано {imported}, {rate:.0f} записей/с')
+
+    def handle(self, *args, **options):
+        if options['users'] < 1 or options['groups'] < 1:
+            raise CommandError('Нужен хотя бы один пользователь и группа')
+        until = parse_date(options['until'])
+        if until is None:
+            raise CommandError('Неверная дата в --until')
+        seeder = seeding.Seeder(
+            options['seed'],
+            users=options['users'],
+            groups=options['groups'],
+            posts=options['posts'],
+            comments=options['comments'],
+            images=options['images'],
+            image_share=options['image_share'],
+            days=options['days'],
+            until=timezone.make_aware(datetime.combine(until, time())),
+        )
+        seeder.create_users_and_groups()
+        # Дальше работает импорт: пачки bulk_create и одна
+        # перестройка поиска, счётчиков и миниатюр в конце
+        posts_importer = importer.Importer(
+            'seed', chunk_size=options['chunk_size'])
+        posts_importer.import_records(seeder.records(), self.report)
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово, записей: {posts_importer.imported}'
+        ))
@@ -0,0 +1,36 @@
+from django.conf import settings
+from sorl.thumbnail import default
+
+from posts import feed_cache
+
+
+def thumbnail_kvstore():
+    """Попадания в LRU хранилища миниатюр этого процесса."""
+    kvstore = default.kvstore
+    if not hasattr(kvstore, 'stats'):
+        return []
+    stats = kvstore.stats()
+    return [
+        ('thumbnail_kvstore_lookups_total', 'counter',
+         'Обращения к хранилищу миниатюр', [
+             ({'outcome': 'hit'}, stats['hits']),
+             ({'outcome': 'miss'}, stats['misses']),
+         ]),
+        ('thumbnail_kvstore_prefetched_total', 'counter',
+         'Записи миниатюр, загруженные заранее', [({}, stats['prefetched'])]),
+        ('thumbnail_kvstore_lru_size', 'gauge',
+         'Записей в LRU миниатюр', [({}, stats['size'])]),
+    ]
+
+
+def feed_cache_outcomes():
+    """Попадания и промахи кэша страниц лент."""
+    if not settings.FEED_CACHE_ENABLED:
+        return []
+    return [
+        ('feed_cache_requests_total', 'counter', 'Запросы к кэшу лент', [
+            ({'view': view_name, 'outcome': outcome}, count)
+            for view_name, counts in feed_cache.stats().items()
+            for outcome, count in counts.items()
+        ]),
+    ]
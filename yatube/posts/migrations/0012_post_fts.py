@@ -0,0 +1,37 @@
+from django.db import migrations
+
+
+CREATE_FTS = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS posts_post_fts USING fts5("
+    "text, tokenize = 'unicode61 remove_diacritics 2')"
+)
+FILL_FTS = (
+    'INSERT INTO posts_post_fts (rowid, text) '
+    'SELECT id, text FROM posts_post'
+)
+DROP_FTS = 'DROP TABLE IF EXISTS posts_post_fts'
+
+
+def create_index(apps, schema_editor):
+    # Полнотекстовый индекс FTS5 есть только в SQLite
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(CREATE_FTS)
+    schema_editor.execute(FILL_FTS)
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(DROP_FTS)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0011_authorstats'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
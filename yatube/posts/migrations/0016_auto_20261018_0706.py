@@ -0,0 +1,20 @@
+# Generated by Django 2.2.16 on 2026-10-18 07:06
+
+from django.db import migrations
+
+
+def drop_author_counters(apps, schema_editor):
+    # Посты автора считает AuthorStats, счётчики авторов не нужны
+    PostCounter = apps.get_model('posts', 'PostCounter')
+    PostCounter.objects.filter(key__startswith='posts:author:').delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0015_auto_20261018_0633'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_author_counters, migrations.RunPython.noop),
+    ]
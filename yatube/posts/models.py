@@ -1,5 +1,5 @@
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.db import models, transaction
 
 
 User = get_user_model()
@@ -16,6 +16,7 @@ class Post(models.Model):
     )
     author = models.ForeignKey(
         User,
+        db_index=False,
         on_delete=models.CASCADE,
         verbose_name='Автор поста',
         related_name='posts'
@@ -24,6 +25,7 @@ class Post(models.Model):
         'Group',
         blank=True,
         null=True,
+        db_index=False,
         on_delete=models.SET_NULL,
         verbose_name='Группа',
         help_text='Группа, к которой будет относиться пост',
@@ -46,13 +48,33 @@ class Post(models.Model):
     )
 
     class Meta:
-        ordering = ('-pub_date',)
+        ordering = ('-pub_date', '-id')
+        # Индексы повторяют порядок ленты, чтобы страница читалась
+        # по индексу без сортировки; они же заменяют индексы
+        # внешних ключей author и group
+        indexes = [
+            models.Index(
+                fields=['-pub_date', '-id'], name='post_feed_idx'),
+            models.Index(
+                fields=['group', '-pub_date', '-id'],
+                name='post_group_feed_idx'),
+            models.Index(
+                fields=['author', '-pub_date', '-id'],
+                name='post_author_feed_idx'),
+        ]
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
 
     def __str__(self):
         return self.text[:15]
 
+    def save(self, *args, **kwargs):
+        # Обработчики post_save меняют счётчики постов, статистику
+        # автора и поисковый индекс: всё это фиксируется одной
+        # транзакцией с самим постом
+        with transaction.atomic(using=kwargs.get('using'), savepoint=False):
+            super().save(*args, **kwargs)
+
 
 class Group(models.Model):
     title = models.CharField(
@@ -76,6 +98,7 @@ class Group(models.Model):
 class Comment(models.Model):
     post = models.ForeignKey(
         'Post',
+        db_index=False,
         on_delete=models.CASCADE,
         verbose_name='Комментарий',
         help_text='Комментарий к посту',
@@ -96,5 +119,169 @@ class Comment(models.Model):
         auto_now_add=True
     )
 
+    class Meta:
+        # Комментарии поста и выгрузка читаются по индексу
+        # в порядке создания
+        indexes = [
+            models.Index(
+                fields=['post', 'created', 'id'],
+                name='comment_post_created_idx'),
+            models.Index(
+                fields=['created', 'id'], name='comment_created_idx'),
+        ]
+
     def __str__(self):
         return self.text[:15]
+
+
+class PostCounter(models.Model):
+    key = models.CharField(
+        max_length=64,
+        unique=True,
+        verbose_name='Ключ счётчика'
+    )
+    value = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Число постов'
+    )
+
+    class Meta:
+        verbose_name = 'Счётчик постов'
+        verbose_name_plural = 'Счётчики постов'
+
+    def __str__(self):
+        return f'{self.key}={self.value}'
+
+
+class AuthorStats(models.Model):
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        verbose_name='Автор',
+        related_name='stats'
+    )
+    posts_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Число постов'
+    )
+    comments_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Число комментариев'
+    )
+    last_post_date = models.DateTimeField(
+        blank=True,
+        null=True,
+        verbose_name='Дата последнего поста'
+    )
+    followers_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Число подписчиков'
+    )
+
+    class Meta:
+        verbose_name = 'Статистика автора'
+        verbose_name_plural = 'Статистика авторов'
+
+    def __str__(self):
+        return str(self.user)
+
+
+class ImportProgress(models.Model):
+    source = models.CharField(
+        max_length=255,
+        unique=True,
+        verbose_name='Источник импорта'
+    )
+    position = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Обработано записей'
+    )
+
+    class Meta:
+        verbose_name = 'Прогресс импорта'
+        verbose_name_plural = 'Прогресс импорта'
+
+    def __str__(self):
+        return f'{self.source}: {self.position}'
+
+
+class Follow(models.Model):
+    user = models.ForeignKey(
+        User,
+        db_index=False,
+        on_delete=models.CASCADE,
+        verbose_name='Подписчик',
+        related_name='follower'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        verbose_name='Автор',
+        related_name='following'
+    )
+    # Для авторов с очень большим числом подписчиков посты не
+    # раскладываются по лентам при публикации, а забираются читателем:
+    # до какой даты посты автора уже перенесены в ленту подписчика
+    pulled_until = models.DateTimeField(
+        blank=True,
+        null=True,
+        verbose_name='Посты забраны в ленту до'
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'author'], name='unique_follow'),
+            models.CheckConstraint(
+                check=~models.Q(user=models.F('author')),
+                name='no_self_follow'),
+        ]
+        verbose_name = 'Подписка'
+        verbose_name_plural = 'Подписки'
+
+    def __str__(self):
+        return f'{self.user} -> {self.author}'
+
+
+class TimelineEntry(models.Model):
+    """Пост в ленте подписок пользователя. Дата и автор поста
+    повторены здесь, чтобы лента читалась одним диапазоном индекса."""
+    user = models.ForeignKey(
+        User,
+        db_index=False,
+        on_delete=models.CASCADE,
+        verbose_name='Читатель',
+        related_name='timeline'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        verbose_name='Пост',
+        related_name='timeline_entries'
+    )
+    author = models.ForeignKey(
+        User,
+        db_index=False,
+        on_delete=models.CASCADE,
+        verbose_name='Автор поста',
+        related_name='+'
+    )
+    pub_date = models.DateTimeField(verbose_name='Дата публикации')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post'], name='unique_timeline_entry'),
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date', '-post'],
+                name='timeline_feed_idx'),
+            models.Index(
+                fields=['user', 'author'], name='timeline_author_idx'),
+        ]
+        verbose_name = 'Запись ленты подписок'
+        verbose_name_plural = 'Записи лент подписок'
+
+    def __str__(self):
+        return f'{self.user}: {self.post_id}'
@@ -0,0 +1,32 @@
+from django.db import connection
+
+from posts.search import FTS_TABLE
+
+# Строка плана SQLite, когда строки сортируются не по индексу,
+# а во временном B-дереве после чтения всей выборки
+TEMP_SORT = 'USE TEMP B-TREE'
+
+
+def explain(sql):
+    """План запроса SQLite построчно."""
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def temp_sorts(queries):
+    """Запросы из CaptureQueriesContext, которые сортируют строки во
+    временном B-дереве. Возвращает список пар (sql, план).
+    Ранжирование полнотекстового поиска так устроено всегда,
+    поэтому запросы к индексу FTS не проверяются."""
+    if connection.vendor != 'sqlite':
+        return []
+    found = []
+    for query in queries:
+        sql = query['sql']
+        if not sql.startswith('SELECT') or FTS_TABLE in sql:
+            continue
+        plan = explain(sql)
+        if any(TEMP_SORT in line for line in plan):
+            found.append((sql, plan))
+    return found
@@ -0,0 +1,143 @@
+import re
+
+from django.db import connection
+from django.db.models.expressions import RawSQL
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from posts.models import Post
+
+
+# Полнотекстовый индекс SQLite FTS5 по тексту постов,
+# rowid записи индекса совпадает с id поста
+FTS_TABLE = 'posts_post_fts'
+SNIPPET_TOKENS = 16
+# Служебные символы вокруг найденных слов в отрывке:
+# отрывок экранируется целиком, затем они заменяются на <mark>
+MARK_START = '\x02'
+MARK_END = '\x03'
+WORD = re.compile(r'\w+')
+
+
+def is_available():
+    return connection.vendor == 'sqlite'
+
+
+def match_expression(query):
+    """Переводит пользовательский запрос в выражение MATCH:
+    каждое слово ищется по префиксу, все слова обязательны."""
+    words = WORD.findall(query.lower())
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def index_post(post_id, text):
+    if not is_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [post_id])
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, text) VALUES (%s, %s)',
+            [post_id, text]
+        )
+
+
+def unindex_post(post_id):
+    if not is_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [post_id])
+
+
+def rebuild():
+    """Заполняет индекс заново по таблице постов."""
+    if not is_available():
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE}')
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, text) '
+            f'SELECT id, text FROM {Post._meta.db_table}'
+        )
+        count = cursor.rowcount
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('optimize')"
+        )
+    return count
+
+
+def filter_posts(queryset, query):
+    """Оставляет в queryset посты, найденные по индексу."""
+    expression = match_expression(query)
+    if not expression:
+        return queryset.none()
+    if not is_available():
+        return queryset.filter(text__icontains=query)
+    return queryset.filter(id__in=RawSQL(
+        f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s',
+        [expression]
+    ))
+
+
+def _highlight(snippet):
+    return mark_safe(
+        escape(snippet)
+        .replace(MARK_START, '<mark>')
+        .replace(MARK_END, '</mark>')
+    )
+
+
+class SearchResults:
+    """Найденные посты по убыванию релевантности.
+    Поддерживает count() и срезы, поэтому подходит для Paginator:
+    из индекса читается только запрошенная страница."""
+
+    def __init__(self, query):
+        self.query = query
+        self.expression = match_expression(query)
+
+    def count(self):
+        if not self.expression:
+            return 0
+        if not is_available():
+            return Post.objects.filter(text__icontains=self.query).count()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT count(*) FROM {FTS_TABLE} '
+                f'WHERE {FTS_TABLE} MATCH %s',
+                [self.expression]
+            )
+            return cursor.fetchone()[0]
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, page_slice):
+        if not self.expression:
+            return []
+        limit = page_slice.stop - page_slice.start
+        if not is_available():
+            posts = Post.objects.filter(
+                text__icontains=self.query
+            ).select_related('author', 'group')[page_slice]
+            for post in posts:
+                post.snippet = post.text
+            return posts
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid, snippet({FTS_TABLE}, 0, %s, %s, %s, %s) '
+                f'FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s '
+                f'ORDER BY rank LIMIT %s OFFSET %s',
+                [MARK_START, MARK_END, '…', SNIPPET_TOKENS,
+                 self.expression, limit, page_slice.start]
+            )
+            snippets = dict(cursor.fetchall())
+        posts = Post.objects.select_related('author', 'group').in_bulk(
+            list(snippets)
+        )
+        results = []
+        for post_id, snippet in snippets.items():
+            if post_id in posts:
+                post = posts[post_id]
+                post.snippet = _highlight(snippet)
+                results.append(post)
+        return results
@@ -0,0 +1,130 @@
+import io
+import random
+from datetime import timedelta
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db.models import Max
+from faker import Faker
+from PIL import Image
+
+from posts import importer
+from posts.models import Group, Post, User
+
+# Показатель закона Ципфа: чем больше, тем сильнее популярные
+# авторы, группы и посты отрываются от остальных
+ZIPF_EXPONENT = 1.1
+WORDS = 3000
+NO_GROUP_SHARE = 0.2
+IMAGE_SIZES = ((1600, 1200), (1200, 1600), (800, 600), (3000, 2000))
+
+
+def zipf_weights(count):
+    """Накопленные веса рангов 1..count для random.choices."""
+    return list(accumulate(
+        1 / rank ** ZIPF_EXPONENT for rank in range(1, count + 1)
+    ))
+
+
+class Seeder:
+    """Синтетические данные для проверки на объёмах продакшена.
+    Авторы, группы и комментарии к постам распределены по Ципфу;
+    при одном и том же seed на пустой базе данные совпадают."""
+
+    def __init__(self, seed, users, groups, posts, comments, images=0,
+                 image_share=0.1, days=365, until=None):
+        self.random = random.Random(seed)
+        self.fake = Faker('ru_RU')
+        self.fake.seed_instance(seed)
+        self.users = users
+        self.groups = groups
+        self.posts = posts
+        self.comments = comments
+        self.images = images
+        self.image_share = image_share
+        self.days = days
+        self.until = until
+
+    def text(self, words, low, high):
+        return ' '.join(self.random.choices(
+            words, k=self.random.randint(low, high)
+        )).capitalize()
+
+    def create_users_and_groups(self):
+        # Уже созданные прошлым запуском записи пропускаются
+        password = make_password(None)
+        User.objects.bulk_create([
+            User(
+                username=f'seed-user-{number}',
+                first_name=self.fake.first_name(),
+                last_name=self.fake.last_name(),
+                password=password,
+            )
+            for number in range(self.users)
+        ], ignore_conflicts=True)
+        Group.objects.bulk_create([
+            Group(
+                slug=f'seed-group-{number}',
+                title=self.fake.catch_phrase()[:200],
+                description=self.fake.paragraph(),
+            )
+            for number in range(self.groups)
+        ], ignore_conflicts=True)
+
+    def create_images(self):
+        names = []
+        for number in range(self.images):
+            size = IMAGE_SIZES[number % len(IMAGE_SIZES)]
+            color = tuple(self.random.randrange(256) for _ in range(3))
+            buffer = io.BytesIO()
+            Image.new('RGB', size, color).save(buffer, format='JPEG')
+            names.append(default_storage.save(
+                f'posts/seed-{number}.jpg', ContentFile(buffer.getvalue())
+            ))
+        return names
+
+    def records(self):
+        """Записи в формате import_posts: сначала посты, затем
+        комментарии, которые чаще достаются популярным постам."""
+        words = self.fake.words(WORDS)
+        images = self.create_images()
+        users = zipf_weights(self.users)
+        groups = zipf_weights(self.groups)
+        first_id = (Post.objects.aggregate(last=Max('id'))['last'] or 0) + 1
+        step = timedelta(days=self.days) / max(self.posts, 1)
+        start = self.until - timedelta(days=self.days)
+        for number in range(self.posts):
+            record = {
+                'id': first_id + number,
+                'author': 'seed-user-{}'.format(self.random.choices(
+                    range(self.users), cum_weights=users)[0]),
+                'text': self.text(words, 5, 80),
+                'pub_date': (start + step * number).isoformat(),
+            }
+            if self.random.random() >= NO_GROUP_SHARE:
+                record['group'] = 'seed-group-{}'.format(self.random.choices(
+                    range(self.groups), cum_weights=groups)[0])
+            if images and self.random.random() < self.image_share:
+                record['image'] = self.random.choice(images)
+            yield record
+        if not self.posts:
+            return
+        # Ранг популярности поста не связан с его id
+        popular = list(range(first_id, first_id + self.posts))
+        self.random.shuffle(popular)
+        weights = zipf_weights(self.posts)
+        for _ in range(self.comments):
+            post_id = self.random.choices(popular, cum_weights=weights)[0]
+            pub_date = start + step * (post_id - first_id)
+            created = pub_date + timedelta(
+                minutes=self.random.randint(1, 60 * 24 * 7))
+            yield {
+                'type': importer.COMMENT,
+                'post': post_id,
+                'author': 'seed-user-{}'.format(self.random.choices(
+                    range(self.users), cum_weights=users)[0]),
+                'text': self.text(words, 3, 30),
+                'created': min(created, self.until).isoformat(),
+            }
@@ -0,0 +1,188 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from core import background
+from posts import counters, feed_cache, search, stats, thumbnails, timeline
+from posts.models import Comment, Follow, Group, Post, TimelineEntry, User
+
+
+@receiver(pre_save, sender=Post)
+def remember_old_values(sender, instance, raw, **kwargs):
+    """Запоминает автора и группу поста до изменения."""
+    instance._old_values = None
+    if raw or instance._state.adding or instance.pk is None:
+        return
+    instance._old_values = (
+        Post.objects.filter(pk=instance.pk)
+        .values(
+            'author_id', 'group_id', 'author__username', 'group__slug',
+            'image'
+        ).first()
+    )
+
+
+def submit_on_commit(func, *args):
+    # Фоновая задача должна видеть данные, сохранённые в транзакции
+    transaction.on_commit(lambda: background.submit(func, *args))
+
+
+def bump_feeds_on_commit(scopes):
+    # Поколение меняется после фиксации транзакции, иначе
+    # читатель успеет закэшировать старые данные под новым ключом
+    transaction.on_commit(lambda: feed_cache.bump(scopes))
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, raw, **kwargs):
+    if raw:
+        return
+    keys = counters.post_keys(instance.author_id, instance.group_id)
+    scopes = feed_cache.post_scopes(
+        instance.author.username,
+        instance.group.slug if instance.group_id else None,
+        instance.pk
+    )
+    old_values = getattr(instance, '_old_values', None) or {}
+    if instance.image and instance.image.name != old_values.get('image'):
+        image_name = instance.image.name
+        transaction.on_commit(lambda: thumbnails.schedule(image_name))
+    # Пост сохраняется и удаляется в транзакции (Post.save,
+    # Collector.delete): изменения счётчиков входят в неё же
+    with transaction.atomic(savepoint=False):
+        search.index_post(instance.pk, instance.text)
+        if created:
+            counters.change(keys, 1)
+            stats.post_added(instance.author_id, instance.pub_date)
+            bump_feeds_on_commit(scopes)
+            submit_on_commit(timeline.fan_out, instance.pk)
+            return
+        if not old_values:
+            bump_feeds_on_commit(scopes)
+            return
+        bump_feeds_on_commit(scopes + feed_cache.post_scopes(
+            old_values['author__username'], old_values['group__slug']
+        ))
+        old_keys = counters.post_keys(
+            old_values['author_id'], old_values['group_id']
+        )
+        counters.change(set(old_keys) - set(keys), -1)
+        counters.change(set(keys) - set(old_keys), 1)
+        if old_values['author_id'] != instance.author_id:
+            stats.post_removed(old_values['author_id'])
+            stats.post_added(instance.author_id, instance.pub_date)
+            # Пост переходит в ленты подписчиков нового автора
+            TimelineEntry.objects.filter(post_id=instance.pk).delete()
+            submit_on_commit(timeline.fan_out, instance.pk)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    keys = counters.post_keys(instance.author_id, instance.group_id)
+    username = (
+        User.objects.filter(pk=instance.author_id)
+        .values_list('username', flat=True).first()
+    )
+    slug = None
+    if instance.group_id is not None:
+        slug = (
+            Group.objects.filter(pk=instance.group_id)
+            .values_list('slug', flat=True).first()
+        )
+    # Пост сохраняется и удаляется в транзакции (Post.save,
+    # Collector.delete): изменения счётчиков входят в неё же
+    with transaction.atomic(savepoint=False):
+        search.unindex_post(instance.pk)
+        counters.change(keys, -1)
+        stats.post_removed(instance.author_id)
+        bump_feeds_on_commit(
+            feed_cache.post_scopes(username, slug, instance.pk)
+        )
+
+
+@receiver(post_delete, sender=Group)
+def drop_group_counter(sender, instance, **kwargs):
+    counters.drop([counters.group_key(instance.pk)])
+
+
+@receiver(pre_save, sender=Group)
+def bump_group_feed(sender, instance, raw, **kwargs):
+    """Изменение группы сбрасывает кэш её ленты,
+    в том числе по прежнему адресу."""
+    if raw or instance.pk is None:
+        return
+    old_slug = (
+        Group.objects.filter(pk=instance.pk)
+        .values_list('slug', flat=True).first()
+    )
+    bump_feeds_on_commit([
+        feed_cache.SITE,
+        feed_cache.group_scope(instance.slug),
+        feed_cache.group_scope(old_slug),
+    ])
+
+
+@receiver(pre_save, sender=User)
+def bump_author_feed(sender, instance, raw, update_fields, **kwargs):
+    """Смена имени автора сбрасывает его ленту и общую ленту;
+    в лентах групп новое имя появится по истечении времени жизни кэша."""
+    if raw or instance.pk is None or update_fields == {'last_login'}:
+        return
+    old_username = (
+        User.objects.filter(pk=instance.pk)
+        .values_list('username', flat=True).first()
+    )
+    bump_feeds_on_commit([
+        feed_cache.ALL,
+        feed_cache.SITE,
+        feed_cache.author_scope(instance.username),
+        feed_cache.author_scope(old_username),
+    ])
+
+
+@receiver(post_save, sender=Comment)
+def update_stats_on_comment(sender, instance, created, raw, **kwargs):
+    if raw:
+        return
+    if created:
+        stats.comments_changed(instance.author_id, 1)
+    bump_feeds_on_commit([feed_cache.post_scope(instance.post_id)])
+
+
+@receiver(post_delete, sender=Comment)
+def update_stats_on_comment_delete(sender, instance, **kwargs):
+    stats.comments_changed(instance.author_id, -1)
+    bump_feeds_on_commit([feed_cache.post_scope(instance.post_id)])
+
+
+def follow_scopes(instance):
+    # Кнопка подписки на странице автора
+    username = (
+        User.objects.filter(pk=instance.author_id)
+        .values_list('username', flat=True).first()
+    )
+    return [feed_cache.author_scope(username)]
+
+
+@receiver(post_save, sender=Follow)
+def follow_saved(sender, instance, created, raw, **kwargs):
+    if raw or not created:
+        return
+    stats.followers_changed(instance.author_id, 1)
+    bump_feeds_on_commit(follow_scopes(instance))
+    submit_on_commit(timeline.follow_added, instance.pk)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    stats.followers_changed(instance.author_id, -1)
+    TimelineEntry.objects.filter(
+        user_id=instance.user_id, author_id=instance.author_id
+    ).delete()
+    bump_feeds_on_commit(follow_scopes(instance))
+    followers = stats.followers_count(instance.author_id)
+    if followers == settings.TIMELINE_FANOUT_LIMIT:
+        # Автор перестал быть "забираемым": посты, опубликованные
+        # до этого, нужно донести подписчикам
+        submit_on_commit(timeline.catch_up, instance.author_id)
@@ -0,0 +1,151 @@
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Count, F, Max, Q, Value, When
+
+from posts.counters import id_batches
+from posts.models import AuthorStats, Comment, Follow, Post
+
+STAT_FIELDS = (
+    'posts_count', 'comments_count', 'last_post_date', 'followers_count',
+)
+
+
+def for_author(user):
+    """Статистика автора; если записи ещё нет, она считается и создаётся.
+    Загруженная через select_related('stats') запись запросов не требует."""
+    try:
+        return user.stats
+    except AuthorStats.DoesNotExist:
+        return rebuild(user.pk)
+
+
+def rebuild(user_id):
+    """Пересчитывает статистику автора по постам и комментариям."""
+    with transaction.atomic():
+        values = _actual([user_id])[user_id]
+        try:
+            with transaction.atomic():
+                return AuthorStats.objects.create(user_id=user_id, **values)
+        except IntegrityError:
+            AuthorStats.objects.filter(user_id=user_id).update(**values)
+            return AuthorStats.objects.get(user_id=user_id)
+
+
+def post_added(author_id, pub_date):
+    AuthorStats.objects.filter(user_id=author_id).update(
+        posts_count=F('posts_count') + 1,
+        last_post_date=Case(
+            When(
+                Q(last_post_date__isnull=True)
+                | Q(last_post_date__lt=pub_date),
+                then=Value(pub_date)
+            ),
+            default=F('last_post_date'),
+        ),
+    )
+
+
+def post_removed(author_id):
+    """Уменьшает число постов; дата последнего поста
+    берётся заново, так как удалён мог быть именно он."""
+    last_post_date = (
+        Post.objects.filter(author_id=author_id)
+        .aggregate(last=Max('pub_date'))['last']
+    )
+    AuthorStats.objects.filter(user_id=author_id, posts_count__gt=0).update(
+        posts_count=F('posts_count') - 1,
+        last_post_date=last_post_date,
+    )
+
+
+def comments_changed(author_id, delta):
+    AuthorStats.objects.filter(
+        user_id=author_id, comments_count__gte=-delta
+    ).update(comments_count=F('comments_count') + delta)
+
+
+def followers_changed(author_id, delta):
+    """Сдвигает число подписчиков; строка статистики создаётся сразу:
+    по ней ленты находят авторов, посты которых забираются при чтении
+    (timeline.pull), а фоновая раскладка её не создаёт."""
+    updated = AuthorStats.objects.filter(
+        user_id=author_id, followers_count__gte=-delta
+    ).update(followers_count=F('followers_count') + delta)
+    if not updated:
+        rebuild(author_id)
+
+
+def _stored_followers_count(author_id):
+    return (
+        AuthorStats.objects.filter(user_id=author_id)
+        .values_list('followers_count', flat=True).first()
+    )
+
+
+def followers_count(author_id):
+    count = _stored_followers_count(author_id)
+    if count is None:
+        return rebuild(author_id).followers_count
+    return count
+
+
+def peek_followers_count(author_id):
+    """Число подписчиков без записи в базу (для фоновых задач):
+    без строки статистики подписчики считаются запросом."""
+    count = _stored_followers_count(author_id)
+    if count is None:
+        return Follow.objects.filter(author_id=author_id).count()
+    return count
+
+
+def _actual(user_ids):
+    """Фактическая статистика авторов по таблицам."""
+    posts = {
+        row['author_id']: row for row in
+        Post.objects.filter(author_id__in=user_ids).order_by()
+        .values('author_id').annotate(count=Count('id'), last=Max('pub_date'))
+    }
+    comments = dict(
+        Comment.objects.filter(author_id__in=user_ids).order_by()
+        .values_list('author_id').annotate(Count('id'))
+    )
+    followers = dict(
+        Follow.objects.filter(author_id__in=user_ids).order_by()
+        .values_list('author_id').annotate(Count('id'))
+    )
+    return {
+        user_id: {
+            'posts_count': posts.get(user_id, {}).get('count', 0),
+            'comments_count': comments.get(user_id, 0),
+            'last_post_date': posts.get(user_id, {}).get('last'),
+            'followers_count': followers.get(user_id, 0),
+        }
+        for user_id in user_ids
+    }
+
+
+def verify(batch_size=500, repair=False):
+    """Сверяет сохранённую статистику авторов с таблицами пачками
+    по batch_size авторов, при repair исправляет расхождения.
+    Отсутствующая статистика посчитается при первом обращении.
+    Возвращает список расхождений (ключ, сохранено, фактически)."""
+    drift = []
+    for ids in id_batches(AuthorStats.objects.all(), batch_size):
+        stored = list(
+            AuthorStats.objects.filter(pk__in=ids)
+            .values('user_id', *STAT_FIELDS)
+        )
+        actual = _actual([row['user_id'] for row in stored])
+        for row in stored:
+            values = actual[row['user_id']]
+            changed = [
+                field for field in STAT_FIELDS if row[field] != values[field]
+            ]
+            drift.extend(
+                (f'stats:{row["user_id"]}:{field}', row[field], values[field])
+                for field in changed
+            )
+            if repair and changed:
+                AuthorStats.objects.filter(user_id=row['user_id']).update(
+                    **{field: values[field] for field in changed}
+                )
+    return drift
@@ -0,0 +1,12 @@
+from django import template
+
+from posts import fragments
+
+
+register = template.Library()
+
+
+@register.simple_tag
+def post_fragments(posts):
+    """HTML постов страницы из кэша фрагментов."""
+    return fragments.render_posts(posts)
@@ -0,0 +1,12 @@
+from django import template
+
+from posts import thumbnails
+
+
+register = template.Library()
+
+
+@register.simple_tag
+def ready_thumbnail(image, alias):
+    """Готовая миниатюра картинки или None, пока она создаётся в фоне."""
+    return thumbnails.ready_thumbnail(image, alias)
@@ -0,0 +1,93 @@
+from http import HTTPStatus
+
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Post, User
+from posts.utils import COMMENTS_ON_PAGE
+
+
+TEST_DATA = {
+    'username': 'author',
+    'test_post_text': 'Тестовый пост',
+    'test_comment_text': 'Комментарий',
+}
+
+
+class PostCommentsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=TEST_DATA['username'])
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text=TEST_DATA['test_post_text'],
+        )
+        cls.POST_DETAIL_URL = reverse(
+            'posts:post_detail',
+            kwargs={'post_id': cls.post.id}
+        )
+        cls.POST_COMMENTS_URL = reverse(
+            'posts:post_comments',
+            kwargs={'post_id': cls.post.id}
+        )
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def add_comments(self, count):
+        start = User.objects.count()
+        readers = [
+            User.objects.create_user(username=f'reader{number}')
+            for number in range(start, start + count)
+        ]
+        Comment.objects.bulk_create(
+            Comment(
+                post=self.post,
+                author=reader,
+                text=f'{TEST_DATA["test_comment_text"]} {number}',
+            )
+            for number, reader in enumerate(readers)
+        )
+
+    def test_post_detail_shows_first_page_of_comments(self):
+        """На странице поста выводится только первая страница комментариев"""
+        self.add_comments(COMMENTS_ON_PAGE + 5)
+        response = self.guest_client.get(self.POST_DETAIL_URL)
+        comments = response.context['comments']
+        self.assertEqual(len(comments), COMMENTS_ON_PAGE)
+        self.assertTrue(comments.has_next())
+        self.assertContains(response, self.POST_COMMENTS_URL)
+
+    def test_fragment_returns_next_comments(self):
+        """Фрагмент комментариев отдаёт следующую страницу"""
+        self.add_comments(COMMENTS_ON_PAGE + 5)
+        first_page = self.guest_client.get(
+            self.POST_DETAIL_URL).context['comments']
+        response = self.guest_client.get(
+            self.POST_COMMENTS_URL + '?cursor=' + first_page.next_cursor
+        )
+        comments = response.context['comments']
+        self.assertEqual(len(comments), 5)
+        self.assertFalse(comments.has_next())
+        self.assertTemplateUsed(
+            response, 'posts/includes/comments_list.html')
+
+    def test_fragment_of_missing_post_is_not_found(self):
+        """Фрагмент комментариев несуществующего поста - 404 без ETag"""
+        response = self.guest_client.get(reverse(
+            'posts:post_comments', kwargs={'post_id': self.post.id + 1}))
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+        self.assertNotIn('ETag', response)
+
+    def test_comment_authors_are_loaded_in_one_query(self):
+        """Число запросов не зависит от числа комментариев"""
+        self.add_comments(1)
+        # Первый запрос создаёт статистику автора
+        self.guest_client.get(self.POST_DETAIL_URL)
+        # Запрос валидаторов страницы, пост и комментарии
+        with self.assertNumQueries(3):
+            self.guest_client.get(self.POST_DETAIL_URL)
+        self.add_comments(COMMENTS_ON_PAGE)
+        with self.assertNumQueries(3):
+            self.guest_client.get(self.POST_DETAIL_URL)
@@ -0,0 +1,112 @@
+import time
+from http import HTTPStatus
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import Client, TransactionTestCase
+from django.urls import reverse
+
+from posts.models import Comment, Group, Post, User
+
+
+INDEX_URL = reverse('posts:index')
+TEST_DATA = {
+    'username': 'author',
+    'test_group_title': 'Тестовая группа',
+    'test_group_slug': 'test-slug',
+    'test_group_description': 'Тестовое описание',
+    'test_post_text': 'Тестовый пост',
+    'test_comment_text': 'Тестовый комментарий',
+}
+
+
+class ConditionalGetTests(TransactionTestCase):
+    # Поколения меняются после фиксации транзакции,
+    # поэтому тесты выполняются без общей транзакции
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username=TEST_DATA['username'])
+        self.group = Group.objects.create(
+            title=TEST_DATA['test_group_title'],
+            slug=TEST_DATA['test_group_slug'],
+            description=TEST_DATA['test_group_description'],
+        )
+        self.post = Post.objects.create(
+            author=self.user,
+            group=self.group,
+            text=TEST_DATA['test_post_text'],
+        )
+        self.POST_DETAIL_URL = reverse(
+            'posts:post_detail', kwargs={'post_id': self.post.id}
+        )
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def revalidate(self, client, url, response):
+        return client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+
+    def test_unchanged_pages_get_not_modified(self):
+        """Неизменившаяся страница отдаётся как 304 без рендеринга"""
+        urls_queries = {
+            INDEX_URL: 0,
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}): 0,
+            reverse('posts:profile', kwargs={'username': self.user}): 0,
+            self.POST_DETAIL_URL: 1,
+        }
+        for url, queries in urls_queries.items():
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+                with self.assertNumQueries(queries):
+                    response = self.revalidate(
+                        self.guest_client, url, response)
+                self.assertEqual(
+                    response.status_code, HTTPStatus.NOT_MODIFIED)
+                self.assertEqual(response.templates, [])
+
+    def test_if_modified_since_for_guests(self):
+        """Анонимам отдаётся Last-Modified, и он проверяется"""
+        # Первый запрос запоминает время изменения; через 2 секунды
+        # после него Last-Modified уже отдаётся
+        self.guest_client.get(INDEX_URL)
+        later = time.time() + 2
+        with mock.patch('posts.feed_cache.time.time', return_value=later):
+            response = self.guest_client.get(INDEX_URL)
+            response = self.guest_client.get(
+                INDEX_URL, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+        response = self.authorized_client.get(INDEX_URL)
+        self.assertFalse(response.has_header('Last-Modified'))
+
+    def test_no_last_modified_within_second_of_change(self):
+        """Сразу после изменения Last-Modified не отдаётся: изменение
+        в ту же секунду получило бы то же значение"""
+        response = self.guest_client.get(INDEX_URL)
+        self.assertFalse(response.has_header('Last-Modified'))
+        self.assertTrue(response.has_header('ETag'))
+
+    def test_changes_invalidate_validators(self):
+        """Новый пост и комментарий меняют валидаторы своих страниц"""
+        index = self.guest_client.get(INDEX_URL)
+        detail = self.guest_client.get(self.POST_DETAIL_URL)
+        Comment.objects.create(
+            post=self.post,
+            author=self.user,
+            text=TEST_DATA['test_comment_text'],
+        )
+        response = self.revalidate(self.guest_client, INDEX_URL, index)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+        response = self.revalidate(
+            self.guest_client, self.POST_DETAIL_URL, detail)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        Post.objects.create(author=self.user, text=TEST_DATA['test_post_text'])
+        response = self.revalidate(self.guest_client, INDEX_URL, index)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_validators_depend_on_user(self):
+        """Страница гостя не подходит авторизованному пользователю"""
+        response = self.guest_client.get(self.POST_DETAIL_URL)
+        response = self.revalidate(
+            self.authorized_client, self.POST_DETAIL_URL, response)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
@@ -0,0 +1,117 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import Client, TestCase, TransactionTestCase
+from django.urls import reverse
+
+from posts import counters
+from posts.models import Group, Post, PostCounter, User
+
+
+INDEX_URL = reverse('posts:index')
+TEST_DATA = {
+    'username': 'author',
+    'test_group_title': 'Тестовая группа',
+    'test_group_slug': 'test-slug',
+    'test_group_description': 'Тестовое описание',
+    'test_new_group_title': 'Новая тестовая группа',
+    'test_new_group_slug': 'test-slug-new',
+    'test_post_text': 'Тестовый пост',
+}
+
+
+class PostCounterTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=TEST_DATA['username'])
+        cls.group = Group.objects.create(
+            title=TEST_DATA['test_group_title'],
+            slug=TEST_DATA['test_group_slug'],
+            description=TEST_DATA['test_group_description'],
+        )
+        cls.new_group = Group.objects.create(
+            title=TEST_DATA['test_new_group_title'],
+            slug=TEST_DATA['test_new_group_slug'],
+            description=TEST_DATA['test_group_description'],
+        )
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def counts(self):
+        return {
+            'all': counters.get_count(
+                counters.ALL_POSTS, Post.objects.all()),
+            'group': counters.get_count(
+                counters.group_key(self.group.id), self.group.posts.all()),
+            'new_group': counters.get_count(
+                counters.group_key(self.new_group.id),
+                self.new_group.posts.all()),
+        }
+
+    def create_post(self, group):
+        return Post.objects.create(
+            author=self.user,
+            text=TEST_DATA['test_post_text'],
+            group=group,
+        )
+
+    def test_counters_follow_create_delete_and_group_change(self):
+        """Счётчики меняются при создании, удалении и смене группы поста"""
+        self.create_post(self.group)
+        self.assertEqual(
+            self.counts(),
+            {'all': 1, 'group': 1, 'new_group': 0}
+        )
+        post = self.create_post(self.group)
+        post.group = self.new_group
+        post.save()
+        self.assertEqual(
+            self.counts(),
+            {'all': 2, 'group': 1, 'new_group': 1}
+        )
+        post.delete()
+        self.assertEqual(
+            self.counts(),
+            {'all': 1, 'group': 1, 'new_group': 0}
+        )
+
+    def test_index_paginator_takes_count_from_counter(self):
+        """Постраничный вывод берёт число постов из счётчика"""
+        self.create_post(self.group)
+        self.counts()
+        with self.assertNumQueries(2):
+            response = self.guest_client.get(INDEX_URL)
+        self.assertEqual(response.context['page_obj'].paginator.count, 1)
+
+    def test_check_counters_repairs_drift(self):
+        """Команда check_counters находит и исправляет расхождения"""
+        self.create_post(self.group)
+        self.counts()
+        PostCounter.objects.filter(key=counters.ALL_POSTS).update(value=7)
+        out = StringIO()
+        call_command('check_counters', '--batch-size=1', stdout=out)
+        self.assertIn(counters.ALL_POSTS, out.getvalue())
+        self.assertEqual(
+            PostCounter.objects.get(key=counters.ALL_POSTS).value, 7)
+        call_command(
+            'check_counters', '--repair', '--batch-size=1', stdout=out)
+        self.assertEqual(
+            PostCounter.objects.get(key=counters.ALL_POSTS).value, 1)
+
+
+class PostCounterTransactionTests(TransactionTestCase):
+    def test_failed_counter_update_rolls_back_post(self):
+        """Пост и его счётчики сохраняются одной транзакцией"""
+        user = User.objects.create_user(username=TEST_DATA['username'])
+        Post.objects.create(author=user, text=TEST_DATA['test_post_text'])
+        with mock.patch(
+            'posts.signals.stats.post_added', side_effect=RuntimeError
+        ):
+            with self.assertRaises(RuntimeError):
+                Post.objects.create(
+                    author=user, text=TEST_DATA['test_post_text'])
+        self.assertEqual(Post.objects.count(), 1)
+        self.assertEqual(counters.verify(), [])
@@ -0,0 +1,130 @@
+import gzip
+import json
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from http import HTTPStatus
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import CommandError, call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from posts import exporter
+from posts.models import Comment, Post, User
+
+
+EXPORT_POSTS_URL = reverse('posts:export', kwargs={'kind': 'posts'})
+TEST_DATA = {
+    'username': 'author',
+    'admin_username': 'admin',
+    'test_post_text': 'Тестовый пост',
+    'test_comment_text': 'Тестовый комментарий',
+}
+
+
+class ExportTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=TEST_DATA['username'])
+        cls.admin = User.objects.create_superuser(
+            TEST_DATA['admin_username'], '', 'password')
+        start = timezone.now() - timedelta(days=1)
+        Post.objects.bulk_create([
+            Post(author=cls.user, text=TEST_DATA['test_post_text'])
+            for _ in range(5)
+        ])
+        # Два поста с одинаковой датой проверяют порядок по id
+        for number, post in enumerate(Post.objects.order_by('id')):
+            Post.objects.filter(pk=post.pk).update(
+                pub_date=start + timedelta(hours=min(number, 3)))
+        cls.post_ids = list(
+            Post.objects.order_by('pub_date', 'id')
+            .values_list('id', flat=True)
+        )
+        cls.comment = Comment.objects.create(
+            post=Post.objects.first(),
+            author=cls.user,
+            text=TEST_DATA['test_comment_text'],
+        )
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(dir=settings.BASE_DIR)
+        self.admin_client = Client()
+        self.admin_client.force_login(self.admin)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def export(self, kind, *args):
+        path = os.path.join(self.directory, 'export')
+        stderr = StringIO()
+        call_command(
+            'export_posts', kind, '--output', path, '--chunk-size', '2',
+            *args, stderr=stderr,
+        )
+        return path, stderr.getvalue()
+
+    def test_command_exports_all_rows_in_keyset_order(self):
+        """Команда выгружает все строки по возрастанию даты и id"""
+        path, _ = self.export('posts')
+        with open(path, encoding='utf-8') as file:
+            rows = [json.loads(line) for line in file]
+        self.assertEqual([row['id'] for row in rows], self.post_ids)
+        self.assertEqual(rows[0]['author'], TEST_DATA['username'])
+
+    def test_since_watermark(self):
+        """С --since выгружаются только записи новее отметки"""
+        _, report = self.export('posts', '--chunk-size', '3')
+        watermark = report.split('последняя дата: ')[1].strip()
+        path, _ = self.export('posts', '--since', watermark)
+        with open(path, encoding='utf-8') as file:
+            self.assertEqual(file.read(), '')
+        since = Post.objects.get(pk=self.post_ids[0]).pub_date
+        path, _ = self.export('posts', '--since', since.isoformat())
+        with open(path, encoding='utf-8') as file:
+            self.assertEqual(len(file.readlines()), 4)
+
+    def test_gzip_csv(self):
+        """Выгрузка в CSV со сжатием gzip"""
+        path, _ = self.export('comments', '--format', 'csv', '--gzip')
+        with gzip.open(path, 'rt', encoding='utf-8') as file:
+            lines = file.read().splitlines()
+        self.assertEqual(lines[0], 'type,id,post,author,text,created')
+        self.assertEqual(len(lines), 2)
+
+    def test_endpoint_streams_for_staff_only(self):
+        """Выгрузка по адресу доступна только персоналу"""
+        response = Client().get(EXPORT_POSTS_URL)
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+        response = self.admin_client.get(EXPORT_POSTS_URL, {'gzip': 1})
+        self.assertTrue(response.streaming)
+        content = gzip.decompress(b''.join(response.streaming_content))
+        self.assertEqual(len(content.splitlines()), len(self.post_ids))
+
+    def test_since_is_parsed_in_current_timezone(self):
+        """Дата без часового пояса считается в текущем"""
+        since = exporter.parse_since('2024-01-02T03:04:05')
+        self.assertTrue(timezone.is_aware(since))
+        self.assertEqual(
+            timezone.localtime(since).replace(tzinfo=None).isoformat(),
+            '2024-01-02T03:04:05'
+        )
+        self.assertIsNone(exporter.parse_since(None))
+
+    def test_invalid_since_is_rejected(self):
+        """Неверная дата в since - ошибка, а не выгрузка всей таблицы"""
+        for since in ('garbage', '2024-13-45T00:00:00'):
+            with self.subTest(since=since):
+                response = self.admin_client.get(
+                    EXPORT_POSTS_URL, {'since': since})
+                self.assertEqual(
+                    response.status_code, HTTPStatus.BAD_REQUEST)
+                with self.assertRaisesMessage(
+                    CommandError, 'Неверная дата в --since'
+                ):
+                    call_command('export_posts', 'posts', '--since', since)
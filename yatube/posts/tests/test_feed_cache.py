@@ -0,0 +1,100 @@
+from django.core.cache import cache
+from django.test import Client, override_settings, TransactionTestCase
+from django.urls import reverse
+
+from posts import feed_cache
+from posts.models import Group, Post, User
+
+
+INDEX_URL = reverse('posts:index')
+TEST_DATA = {
+    'username': 'author',
+    'test_group_title': 'Тестовая группа',
+    'test_group_slug': 'test-slug',
+    'test_group_description': 'Тестовое описание',
+    'test_other_group_title': 'Другая группа',
+    'test_other_group_slug': 'other-slug',
+    'test_post_text': 'Тестовый пост',
+}
+
+
+@override_settings(FEED_CACHE_ENABLED=True)
+class FeedCacheTests(TransactionTestCase):
+    # Поколения меняются после фиксации транзакции,
+    # поэтому тесты выполняются без общей транзакции
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username=TEST_DATA['username'])
+        self.group = Group.objects.create(
+            title=TEST_DATA['test_group_title'],
+            slug=TEST_DATA['test_group_slug'],
+            description=TEST_DATA['test_group_description'],
+        )
+        self.other_group = Group.objects.create(
+            title=TEST_DATA['test_other_group_title'],
+            slug=TEST_DATA['test_other_group_slug'],
+            description=TEST_DATA['test_group_description'],
+        )
+        self.GROUP_LIST_URL = reverse(
+            'posts:group_list',
+            kwargs={'slug': self.group.slug}
+        )
+        self.OTHER_GROUP_LIST_URL = reverse(
+            'posts:group_list',
+            kwargs={'slug': self.other_group.slug}
+        )
+        self.PROFILE_URL = reverse(
+            'posts:profile',
+            kwargs={'username': self.user.username}
+        )
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def cache_status(self, url):
+        return self.guest_client.get(url)['X-Feed-Cache']
+
+    def test_second_request_is_served_from_cache(self):
+        """Повторный запрос ленты отдаётся из кэша"""
+        for url in (INDEX_URL, self.GROUP_LIST_URL, self.PROFILE_URL):
+            with self.subTest(url=url):
+                self.assertEqual(self.cache_status(url), feed_cache.MISS)
+                self.assertEqual(self.cache_status(url), feed_cache.HIT)
+        self.assertEqual(
+            feed_cache.stats()['posts:index'],
+            {feed_cache.HIT: 1, feed_cache.MISS: 1}
+        )
+
+    def test_new_post_invalidates_only_its_feeds(self):
+        """Новый пост сбрасывает кэш только своих лент"""
+        urls = (
+            INDEX_URL,
+            self.GROUP_LIST_URL,
+            self.OTHER_GROUP_LIST_URL,
+            self.PROFILE_URL,
+        )
+        for url in urls:
+            self.cache_status(url)
+        Post.objects.create(
+            author=self.user,
+            text=TEST_DATA['test_post_text'],
+            group=self.group,
+        )
+        expected = {
+            INDEX_URL: feed_cache.MISS,
+            self.GROUP_LIST_URL: feed_cache.MISS,
+            self.OTHER_GROUP_LIST_URL: feed_cache.HIT,
+            self.PROFILE_URL: feed_cache.MISS,
+        }
+        for url, status in expected.items():
+            with self.subTest(url=url):
+                self.assertEqual(self.cache_status(url), status)
+
+    def test_page_is_shared_by_all_users(self):
+        """Кэшированная страница одна на всех, шапка у каждого своя"""
+        guest_response = self.guest_client.get(INDEX_URL)
+        response = self.authorized_client.get(INDEX_URL)
+        self.assertEqual(response['X-Feed-Cache'], feed_cache.HIT)
+        username = f'Пользователь: {self.user.username}'
+        self.assertContains(response, username)
+        self.assertNotContains(guest_response, username)
@@ -0,0 +1,96 @@
+from http import HTTPStatus
+from xml.etree import ElementTree
+
+from django.test import Client, override_settings, TestCase
+from django.urls import reverse
+
+from posts.models import Group, Post, User
+
+
+ATOM = '{http://www.w3.org/2005/Atom}'
+FEED_URL = reverse('posts:feed')
+TEST_DATA = {
+    'username': 'author',
+    'other_username': 'other',
+    'test_group_title': 'Тестовая группа',
+    'test_group_slug': 'test-slug',
+    'test_group_description': 'Тестовое описание',
+    'test_post_text': 'Тестовый пост <b>с разметкой</b>',
+}
+
+
+class AtomFeedTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=TEST_DATA['username'])
+        cls.other_user = User.objects.create_user(
+            username=TEST_DATA['other_username'])
+        cls.group = Group.objects.create(
+            title=TEST_DATA['test_group_title'],
+            slug=TEST_DATA['test_group_slug'],
+            description=TEST_DATA['test_group_description'],
+        )
+        cls.group_post = Post.objects.create(
+            author=cls.user,
+            group=cls.group,
+            text=TEST_DATA['test_post_text'],
+        )
+        cls.other_post = Post.objects.create(
+            author=cls.other_user,
+            text=TEST_DATA['test_post_text'],
+        )
+        cls.GROUP_FEED_URL = reverse(
+            'posts:group_feed', kwargs={'slug': cls.group.slug})
+        cls.PROFILE_FEED_URL = reverse(
+            'posts:profile_feed', kwargs={'username': cls.other_user})
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def entries(self, url):
+        response = self.guest_client.get(url)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertTrue(response.streaming)
+        feed = ElementTree.fromstring(b''.join(response.streaming_content))
+        return [
+            entry.find(ATOM + 'link').get('href')
+            for entry in feed.iter(ATOM + 'entry')
+        ]
+
+    def post_url(self, post):
+        return 'http://testserver' + reverse(
+            'posts:post_detail', kwargs={'post_id': post.id})
+
+    def test_feeds_contain_their_posts(self):
+        """Каждая лента содержит только свои посты, новые первыми"""
+        feeds_posts = {
+            FEED_URL: [self.other_post, self.group_post],
+            self.GROUP_FEED_URL: [self.group_post],
+            self.PROFILE_FEED_URL: [self.other_post],
+        }
+        for url, posts in feeds_posts.items():
+            with self.subTest(url=url):
+                self.assertEqual(
+                    self.entries(url),
+                    [self.post_url(post) for post in posts],
+                )
+
+    @override_settings(ATOM_FEED_ENTRIES=1)
+    def test_feed_is_capped(self):
+        """В ленту попадает не больше ATOM_FEED_ENTRIES постов"""
+        self.assertEqual(
+            self.entries(FEED_URL), [self.post_url(self.other_post)])
+
+    def test_unknown_group_feed_not_found(self):
+        """Лента несуществующей группы отдаёт 404"""
+        response = self.guest_client.get(
+            reverse('posts:group_feed', kwargs={'slug': 'unknown'}))
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_feed_supports_etag(self):
+        """Повторный запрос с тем же ETag получает 304"""
+        response = self.guest_client.get(FEED_URL)
+        response = self.guest_client.get(
+            FEED_URL, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
@@ -0,0 +1,142 @@
+from django.db import connection
+from django.test import Client, override_settings, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts import query_plans, timeline
+from posts.models import AuthorStats, Follow, Post, TimelineEntry, User
+from posts.utils import POST_ON_PAGE
+
+
+FOLLOW_INDEX_URL = reverse('posts:follow_index')
+TEST_DATA = {
+    'username': 'reader',
+    'author_username': 'author',
+    'other_username': 'other',
+    'test_post_text': 'Тестовый пост',
+    'new_post_text': 'Новый пост',
+    'other_post_text': 'Чужой пост',
+}
+
+
+class FollowTests(TransactionTestCase):
+    # Ленты заполняются фоновыми задачами после фиксации транзакции,
+    # поэтому тесты выполняются без общей транзакции
+    def setUp(self):
+        self.user = User.objects.create_user(username=TEST_DATA['username'])
+        self.author = User.objects.create_user(
+            username=TEST_DATA['author_username'])
+        self.other = User.objects.create_user(
+            username=TEST_DATA['other_username'])
+        self.post = Post.objects.create(
+            author=self.author, text=TEST_DATA['test_post_text'])
+        self.FOLLOW_URL = reverse(
+            'posts:profile_follow', kwargs={'username': self.author})
+        self.UNFOLLOW_URL = reverse(
+            'posts:profile_unfollow', kwargs={'username': self.author})
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def feed_texts(self, url=FOLLOW_INDEX_URL):
+        response = self.authorized_client.get(url)
+        return [post.text for post in response.context['posts']]
+
+    def test_follow_and_unfollow(self):
+        """Подписка добавляет посты автора в ленту, отписка убирает"""
+        self.authorized_client.get(self.FOLLOW_URL)
+        self.assertTrue(
+            Follow.objects.filter(user=self.user, author=self.author).exists()
+        )
+        self.assertEqual(self.feed_texts(), [TEST_DATA['test_post_text']])
+        self.authorized_client.get(self.UNFOLLOW_URL)
+        self.assertFalse(Follow.objects.filter(user=self.user).exists())
+        self.assertEqual(self.feed_texts(), [])
+
+    def test_cannot_follow_self_or_twice(self):
+        """На себя подписаться нельзя, повторная подписка не дублируется"""
+        self.authorized_client.get(self.FOLLOW_URL)
+        self.authorized_client.get(self.FOLLOW_URL)
+        self.authorized_client.get(
+            reverse('posts:profile_follow', kwargs={'username': self.user})
+        )
+        self.assertEqual(Follow.objects.count(), 1)
+
+    def test_new_post_is_fanned_out_to_followers(self):
+        """Новый пост попадает только в ленты подписчиков автора"""
+        Follow.objects.create(user=self.user, author=self.author)
+        Post.objects.create(
+            author=self.author, text=TEST_DATA['new_post_text'])
+        Post.objects.create(
+            author=self.other, text=TEST_DATA['other_post_text'])
+        self.assertEqual(
+            TimelineEntry.objects.filter(user=self.user).count(), 2
+        )
+        self.assertEqual(self.feed_texts(), [
+            TEST_DATA['new_post_text'], TEST_DATA['test_post_text']
+        ])
+
+    def test_fan_out_does_not_write_stats(self):
+        """Без строки статистики раскладка только читает число
+        подписчиков и не пишет в базу ничего, кроме лент"""
+        Follow.objects.create(user=self.user, author=self.author)
+        AuthorStats.objects.filter(user=self.author).delete()
+        TimelineEntry.objects.all().delete()
+        timeline.fan_out(self.post.pk)
+        self.assertFalse(
+            AuthorStats.objects.filter(user=self.author).exists())
+        self.assertEqual(self.feed_texts(), [TEST_DATA['test_post_text']])
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=0)
+    def test_posts_of_popular_author_are_pulled(self):
+        """Посты автора с большим числом подписчиков не раскладываются
+        при публикации, а забираются при чтении ленты"""
+        Follow.objects.create(user=self.user, author=self.author)
+        new_post = Post.objects.create(
+            author=self.author, text=TEST_DATA['new_post_text'])
+        self.assertFalse(
+            TimelineEntry.objects.filter(post=new_post).exists()
+        )
+        self.assertEqual(self.feed_texts(), [
+            TEST_DATA['new_post_text'], TEST_DATA['test_post_text']
+        ])
+
+    @override_settings(
+        TIMELINE_FANOUT_LIMIT=0, TIMELINE_BACKFILL=1, TIMELINE_BATCH_SIZE=2)
+    def test_pull_copies_whole_gap(self):
+        """При чтении ленты забираются все посты после последнего
+        забранного, а не только TIMELINE_BACKFILL новых"""
+        Follow.objects.create(user=self.user, author=self.author)
+        self.feed_texts()
+        new_posts = [
+            Post.objects.create(
+                author=self.author, text=TEST_DATA['new_post_text'])
+            for _ in range(5)
+        ]
+        self.feed_texts()
+        self.assertEqual(
+            TimelineEntry.objects.filter(
+                user=self.user, post__in=new_posts).count(),
+            len(new_posts)
+        )
+        self.assertEqual(
+            Follow.objects.get(user=self.user).pulled_until,
+            new_posts[-1].pub_date
+        )
+
+    def test_feed_is_keyset_paged_by_index(self):
+        """Лента подписок читается курсорными страницами по индексу"""
+        Follow.objects.create(user=self.user, author=self.author)
+        for _ in range(POST_ON_PAGE):
+            Post.objects.create(
+                author=self.author, text=TEST_DATA['new_post_text'])
+        with CaptureQueriesContext(connection) as queries:
+            response = self.authorized_client.get(FOLLOW_INDEX_URL)
+        self.assertEqual(len(response.context['posts']), POST_ON_PAGE)
+        sorts = query_plans.temp_sorts(queries.captured_queries)
+        self.assertEqual(sorts, [], '\n'.join(
+            f'{sql}\n{plan}' for sql, plan in sorts))
+        next_cursor = response.context['page_obj'].next_cursor
+        self.assertEqual(
+            self.feed_texts(f'{FOLLOW_INDEX_URL}?cursor={next_cursor}'),
+            [TEST_DATA['test_post_text']]
+        )
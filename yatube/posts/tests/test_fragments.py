@@ -0,0 +1,95 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts import fragments
+from posts.models import Group, Post, User
+
+
+INDEX_URL = reverse('posts:index')
+TEST_DATA = {
+    'username': 'author',
+    'test_group_title': 'Тестовая группа',
+    'test_group_slug': 'test-slug',
+    'new_group_title': 'Новое название',
+    'test_post_text': 'Тестовый пост',
+    'new_post_text': 'Исправленный пост',
+    'first_name': 'Лев',
+    'last_name': 'Толстой',
+}
+
+
+class PostFragmentTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username=TEST_DATA['username'])
+        cls.group = Group.objects.create(
+            title=TEST_DATA['test_group_title'],
+            slug=TEST_DATA['test_group_slug'],
+        )
+        cls.post = Post.objects.create(
+            author=cls.user,
+            group=cls.group,
+            text=TEST_DATA['test_post_text'],
+        )
+        cls.GROUP_URL = reverse(
+            'posts:group_list', kwargs={'slug': cls.group.slug}
+        )
+        cls.PROFILE_URL = reverse(
+            'posts:profile', kwargs={'username': cls.user.username}
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def count_renders(self):
+        return mock.patch(
+            'posts.fragments.render_to_string', wraps=render_to_string
+        )
+
+    def test_fragment_is_shared_between_feeds(self):
+        """Пост рендерится один раз для главной, группы и профиля"""
+        with self.count_renders() as render:
+            for url in (INDEX_URL, self.GROUP_URL, self.PROFILE_URL):
+                with self.subTest(url=url):
+                    response = self.client.get(url)
+                    self.assertContains(
+                        response, TEST_DATA['test_post_text']
+                    )
+        self.assertEqual(render.call_count, 1)
+
+    def test_changes_render_new_fragment(self):
+        """Правка поста, имени автора и группы видна сразу"""
+        self.client.get(INDEX_URL)
+        changes = (
+            (Post, self.post.pk, {'text': TEST_DATA['new_post_text']},
+             TEST_DATA['new_post_text']),
+            (User, self.user.pk, {
+                'first_name': TEST_DATA['first_name'],
+                'last_name': TEST_DATA['last_name'],
+            }, f'{TEST_DATA["first_name"]} {TEST_DATA["last_name"]}'),
+            (Group, self.group.pk, {'title': TEST_DATA['new_group_title']},
+             TEST_DATA['new_group_title']),
+        )
+        for model, pk, values, expected in changes:
+            with self.subTest(model=model.__name__):
+                # update() не вызывает сигналов: версия фрагмента
+                # зависит только от данных поста
+                model.objects.filter(pk=pk).update(**values)
+                self.assertContains(self.client.get(INDEX_URL), expected)
+
+    def test_fragments_are_read_with_one_get_many(self):
+        """Фрагменты страницы читаются из кэша одним get_many"""
+        posts = Post.objects.select_related('author', 'group')
+        fragments.render_posts(posts)
+        with mock.patch('posts.fragments.cache') as fragment_cache:
+            fragment_cache.get_many.return_value = {
+                fragments.fragment_key(post): 'html' for post in posts
+            }
+            self.assertEqual(fragments.render_posts(posts), ['html'])
+        fragment_cache.get_many.assert_called_once()
+        fragment_cache.set_many.assert_not_called()
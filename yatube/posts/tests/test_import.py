@@ -0,0 +1,137 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from posts import counters, search, stats
+from posts.models import Comment, Group, Post, User
+
+
+TEST_DATA = {
+    'username': 'author',
+    'test_group_title': 'Тестовая группа',
+    'test_group_slug': 'test-slug',
+    'test_post_text': 'Импортированный пост про котов',
+    'test_comment_text': 'Импортированный комментарий',
+    'test_pub_date': '2015-05-17T10:00:00+00:00',
+}
+RECORDS = [
+    {
+        'type': 'group',
+        'slug': TEST_DATA['test_group_slug'],
+        'title': TEST_DATA['test_group_title'],
+    },
+    {
+        'id': 7,
+        'author': TEST_DATA['username'],
+        'group': TEST_DATA['test_group_slug'],
+        'text': TEST_DATA['test_post_text'],
+        'pub_date': TEST_DATA['test_pub_date'],
+    },
+    {
+        'id': 8,
+        'author': TEST_DATA['username'],
+        'text': TEST_DATA['test_post_text'],
+    },
+    {
+        'type': 'comment',
+        'post': 7,
+        'author': 'reader',
+        'text': TEST_DATA['test_comment_text'],
+    },
+]
+
+
+class ImportPostsTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def write(self, name, content):
+        path = os.path.join(self.directory, name)
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(content)
+        return path
+
+    def write_jsonl(self, records):
+        return self.write('posts.jsonl', ''.join(
+            json.dumps(record, ensure_ascii=False) + '\n'
+            for record in records
+        ))
+
+    def import_posts(self, path, *args):
+        call_command(
+            'import_posts', path, '--no-thumbnails', *args, stdout=StringIO())
+
+    def test_import_creates_records_and_side_effects(self):
+        """Импорт создаёт записи и перестраивает индекс и счётчики"""
+        self.import_posts(self.write_jsonl(RECORDS))
+        group = Group.objects.get(slug=TEST_DATA['test_group_slug'])
+        author = User.objects.get(username=TEST_DATA['username'])
+        post = Post.objects.get(id=7)
+        self.assertEqual(post.group, group)
+        self.assertEqual(post.pub_date.isoformat(), TEST_DATA['test_pub_date'])
+        self.assertEqual(Post.objects.count(), 2)
+        self.assertEqual(
+            Comment.objects.get().author.username, 'reader')
+        self.assertEqual(search.SearchResults('котов').count(), 2)
+        self.assertEqual(
+            counters.get_count(counters.group_key(group.id), None), 1)
+        self.assertEqual(stats.for_author(author).posts_count, 2)
+
+    def test_import_resumes_after_failure(self):
+        """После ошибки импорт продолжается с первой невставленной пачки"""
+        broken = RECORDS[:3] + [{'type': 'comment', 'post': 7}]
+        path = self.write_jsonl(broken)
+        with self.assertRaises(CommandError):
+            self.import_posts(path, '--chunk-size', '1')
+        self.assertEqual(Post.objects.count(), 2)
+        self.write_jsonl(RECORDS)
+        self.import_posts(path, '--chunk-size', '1')
+        self.assertEqual(Post.objects.count(), 2)
+        self.assertEqual(Comment.objects.count(), 1)
+
+    def test_bad_ids_are_reported_with_record_number(self):
+        """Нечисловой id поста называет номер записи"""
+        bad_comment = {**RECORDS[3], 'post': 'abc'}
+        path = self.write_jsonl(RECORDS[:3] + [bad_comment])
+        with self.assertRaisesMessage(
+            CommandError, "Запись 4: неверный id 'abc'"
+        ):
+            self.import_posts(path)
+
+    def test_malformed_lines_are_reported_with_record_number(self):
+        """Неверный JSON и не объект называют номер записи"""
+        lines = {
+            '{"author": "x", ': 'Запись 2: неверный JSON',
+            '[1, 2]': 'Запись 2: запись должна быть объектом',
+        }
+        for line, message in lines.items():
+            with self.subTest(line=line):
+                path = self.write('posts.jsonl', (
+                    json.dumps(RECORDS[0], ensure_ascii=False)
+                    + '\n' + line + '\n'
+                ))
+                with self.assertRaisesMessage(CommandError, message):
+                    self.import_posts(path, '--restart')
+
+    def test_csv_import(self):
+        """Посты импортируются из CSV"""
+        path = self.write(
+            'posts.csv',
+            'author,group,text,pub_date\n'
+            f'{TEST_DATA["username"]},,{TEST_DATA["test_post_text"]},'
+            f'{TEST_DATA["test_pub_date"]}\n'
+        )
+        self.import_posts(path)
+        post = Post.objects.get()
+        self.assertEqual(post.author.username, TEST_DATA['username'])
+        self.assertIsNone(post.group)
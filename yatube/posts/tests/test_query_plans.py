@@ -0,0 +1,84 @@
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts import query_plans
+from posts.models import Comment, Group, Post, User
+from posts.utils import POST_ON_PAGE
+
+
+TEST_DATA = {
+    'username': 'author',
+    'admin_username': 'admin',
+    'test_group_title': 'Тестовая группа',
+    'test_group_slug': 'test-slug',
+    'test_group_description': 'Тестовое описание',
+    'test_post_text': 'Тестовый пост',
+    'test_comment_text': 'Тестовый комментарий',
+}
+
+
+class QueryPlanTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=TEST_DATA['username'])
+        cls.admin = User.objects.create_superuser(
+            TEST_DATA['admin_username'], '', 'password')
+        cls.group = Group.objects.create(
+            title=TEST_DATA['test_group_title'],
+            slug=TEST_DATA['test_group_slug'],
+            description=TEST_DATA['test_group_description'],
+        )
+        Post.objects.bulk_create([
+            Post(
+                author=cls.user,
+                group=cls.group,
+                text=TEST_DATA['test_post_text'],
+            )
+            for _ in range(POST_ON_PAGE * 2)
+        ])
+        cls.post = Post.objects.first()
+        Comment.objects.bulk_create([
+            Comment(
+                post=cls.post,
+                author=cls.user,
+                text=TEST_DATA['test_comment_text'],
+            )
+            for _ in range(3)
+        ])
+
+    def test_views_read_pages_by_index(self):
+        """Запросы страниц не сортируют строки во временном B-дереве"""
+        post_kwargs = {'post_id': self.post.id}
+        urls = [
+            reverse('posts:index'),
+            reverse('posts:index') + '?page=2',
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.user}),
+            reverse('posts:post_detail', kwargs=post_kwargs),
+            reverse('posts:post_comments', kwargs=post_kwargs),
+            reverse('posts:feed'),
+            reverse('posts:group_feed', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile_feed', kwargs={'username': self.user}),
+            reverse('posts:export', kwargs={'kind': 'posts'}),
+            reverse('posts:export', kwargs={'kind': 'comments'}),
+        ]
+        client = Client()
+        client.force_login(self.admin)
+        # Курсорные страницы: следующая и последняя
+        page_obj = client.get(urls[0]).context['page_obj']
+        urls += [
+            f'{urls[0]}?cursor={page_obj.next_cursor}',
+            f'{urls[0]}?cursor={page_obj.paginator.last_cursor}',
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                with CaptureQueriesContext(connection) as queries:
+                    response = client.get(url)
+                    if response.streaming:
+                        b''.join(response.streaming_content)
+                sorts = query_plans.temp_sorts(queries.captured_queries)
+                self.assertEqual(sorts, [], '\n'.join(
+                    f'{sql}\n{plan}' for sql, plan in sorts))
@@ -0,0 +1,90 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts import search
+from posts.models import Post, User
+
+
+SEARCH_URL = reverse('posts:search')
+ADMIN_POSTS_URL = reverse('admin:posts_post_changelist')
+TEST_DATA = {
+    'username': 'author',
+    'admin_username': 'admin',
+    'admin_password': 'Admin_Password1',
+    'test_post_text': 'Пост про котов и <b>собак</b>',
+    'test_other_post_text': 'Кот, кот и ещё раз кот',
+    'test_edited_post_text': 'Теперь этот пост про попугаев',
+}
+
+
+class PostSearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=TEST_DATA['username'])
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text=TEST_DATA['test_post_text'],
+        )
+        cls.other_post = Post.objects.create(
+            author=cls.user,
+            text=TEST_DATA['test_other_post_text'],
+        )
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def found(self, query):
+        response = self.guest_client.get(SEARCH_URL, {'q': query})
+        return list(response.context['page_obj'])
+
+    def test_search_returns_ranked_posts_with_snippets(self):
+        """Поиск находит посты по префиксу слова, выше - более релевантные"""
+        posts = self.found('кот')
+        self.assertEqual(posts, [self.other_post, self.post])
+        self.assertIn('<mark>', posts[0].snippet)
+
+    def test_snippet_escapes_post_text(self):
+        """Отрывок не выводит HTML из текста поста"""
+        response = self.guest_client.get(SEARCH_URL, {'q': 'собак'})
+        self.assertContains(response, '&lt;b&gt;<mark>собак</mark>')
+
+    def test_index_follows_edit_and_delete(self):
+        """Индекс обновляется при изменении и удалении поста"""
+        post = Post.objects.get(pk=self.post.pk)
+        post.text = TEST_DATA['test_edited_post_text']
+        post.save()
+        self.assertEqual(self.found('попугаев'), [post])
+        self.assertEqual(self.found('собак'), [])
+        post.delete()
+        self.assertEqual(self.found('попугаев'), [])
+
+    def test_empty_query_finds_nothing(self):
+        """Пустой запрос и запрос из знаков препинания ничего не находят"""
+        self.assertEqual(self.found(''), [])
+        self.assertEqual(self.found('"*('), [])
+
+    def test_rebuild_command_restores_index(self):
+        """Команда rebuild_search_index заполняет индекс заново"""
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {search.FTS_TABLE}')
+        self.assertEqual(self.found('кот'), [])
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(len(self.found('кот')), 2)
+
+    def test_admin_search_uses_index(self):
+        """Поиск в админке идёт по полнотекстовому индексу"""
+        User.objects.create_superuser(
+            TEST_DATA['admin_username'], '', TEST_DATA['admin_password'])
+        admin_client = Client()
+        admin_client.login(
+            username=TEST_DATA['admin_username'],
+            password=TEST_DATA['admin_password'],
+        )
+        response = admin_client.get(ADMIN_POSTS_URL, {'q': 'собак'})
+        self.assertEqual(
+            list(response.context['cl'].result_list), [self.post])
@@ -0,0 +1,37 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from posts import search
+from posts.models import Comment, Group, Post, User
+
+
+SEED_ARGS = (
+    '--users', '5', '--groups', '3', '--posts', '30', '--comments', '40',
+)
+
+
+class SeedCommandTests(TestCase):
+    def seed(self, *args):
+        call_command('seed', *SEED_ARGS, *args, stdout=StringIO())
+        return list(Post.objects.order_by('id').values_list(
+            'author__username', 'group__slug', 'text', 'pub_date'))
+
+    def test_seed_creates_requested_volumes(self):
+        """Команда создаёт заданное число записей и индексирует посты"""
+        self.seed()
+        self.assertEqual(User.objects.count(), 5)
+        self.assertEqual(Group.objects.count(), 3)
+        self.assertEqual(Post.objects.count(), 30)
+        self.assertEqual(Comment.objects.count(), 40)
+        word = Post.objects.first().text.split()[0]
+        self.assertGreater(search.SearchResults(word).count(), 0)
+
+    def test_seed_is_reproducible(self):
+        """Один и тот же seed на пустой базе даёт те же данные"""
+        first = self.seed('--seed', '7')
+        Post.objects.all().delete()
+        User.objects.all().delete()
+        Group.objects.all().delete()
+        self.assertEqual(self.seed('--seed', '7'), first)
@@ -0,0 +1,89 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts import stats
+from posts.models import AuthorStats, Comment, Post, User
+
+
+TEST_DATA = {
+    'username': 'author',
+    'reader_username': 'reader',
+    'test_post_text': 'Тестовый пост',
+    'test_comment_text': 'Тестовый комментарий',
+}
+
+
+class AuthorStatsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=TEST_DATA['username'])
+        cls.reader = User.objects.create_user(
+            username=TEST_DATA['reader_username'])
+        cls.PROFILE_URL = reverse(
+            'posts:profile',
+            kwargs={'username': cls.user.username}
+        )
+
+    def setUp(self):
+        self.guest_client = Client()
+        stats.rebuild(self.user.id)
+        stats.rebuild(self.reader.id)
+
+    def create_post(self):
+        return Post.objects.create(
+            author=self.user,
+            text=TEST_DATA['test_post_text'],
+        )
+
+    def test_stats_follow_posts_and_comments(self):
+        """Статистика автора меняется вместе с постами и комментариями"""
+        first_post = self.create_post()
+        last_post = self.create_post()
+        comment = Comment.objects.create(
+            post=first_post,
+            author=self.reader,
+            text=TEST_DATA['test_comment_text'],
+        )
+        author_stats = AuthorStats.objects.get(user=self.user)
+        self.assertEqual(author_stats.posts_count, 2)
+        self.assertEqual(author_stats.last_post_date, last_post.pub_date)
+        self.assertEqual(
+            AuthorStats.objects.get(user=self.reader).comments_count, 1)
+        comment.delete()
+        last_post.delete()
+        author_stats.refresh_from_db()
+        self.assertEqual(author_stats.posts_count, 1)
+        self.assertEqual(author_stats.last_post_date, first_post.pub_date)
+        self.assertEqual(
+            AuthorStats.objects.get(user=self.reader).comments_count, 0)
+
+    def test_missing_stats_are_rebuilt_on_read(self):
+        """Отсутствующая статистика пересчитывается при чтении"""
+        self.create_post()
+        AuthorStats.objects.filter(user=self.user).delete()
+        user = User.objects.get(pk=self.user.pk)
+        self.assertEqual(stats.for_author(user).posts_count, 1)
+
+    def test_profile_author_block_costs_no_queries(self):
+        """Профиль показывает число постов без отдельного COUNT"""
+        self.create_post()
+        with self.assertNumQueries(2):
+            response = self.guest_client.get(self.PROFILE_URL)
+        self.assertEqual(response.context['author_stats'].posts_count, 1)
+        self.assertEqual(response.context['page_obj'].paginator.count, 1)
+
+    def test_check_counters_repairs_stats(self):
+        """check_counters находит и исправляет расхождения статистики"""
+        self.create_post()
+        AuthorStats.objects.filter(user=self.user).update(posts_count=7)
+        out = StringIO()
+        call_command('check_counters', stdout=out)
+        self.assertIn(f'stats:{self.user.id}:posts_count', out.getvalue())
+        call_command('check_counters', '--repair', stdout=out)
+        self.assertEqual(
+            AuthorStats.objects.get(user=self.user).posts_count, 1)
+        self.assertEqual(stats.verify(), [])
@@ -0,0 +1,112 @@
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, override_settings, TransactionTestCase
+from django.urls import reverse
+from sorl.thumbnail import default
+
+from posts import thumbnails
+from posts.kvstore import LRUKVStore
+from posts.models import Post, User
+
+
+CREATE_POST_URL = reverse('posts:post_create')
+PLACEHOLDER = 'img/placeholder.svg'
+TEST_DATA = {
+    'username': 'author',
+    'test_post_text': 'Тестовый пост с картинкой',
+    'test_image': (
+        b'\x47\x49\x46\x38\x39\x61\x02\x00'
+        b'\x01\x00\x80\x00\x00\x00\x00\x00'
+        b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+        b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+        b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+        b'\x0A\x00\x3B'
+    ),
+}
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class PostThumbnailTests(TransactionTestCase):
+    # Миниатюры ставятся в очередь после фиксации транзакции,
+    # поэтому тесты выполняются без общей транзакции
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        # LRU хранилища миниатюр живёт в процессе и переживает
+        # очистку базы между тестами
+        default.kvstore.clear_lru()
+        self.user = User.objects.create_user(username=TEST_DATA['username'])
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def uploaded_image(self):
+        return SimpleUploadedFile(
+            name='test_image.gif',
+            content=TEST_DATA['test_image'],
+            content_type='image/gif'
+        )
+
+    def test_thumbnail_is_ready_after_upload(self):
+        """Миниатюра создаётся при сохранении формы с картинкой"""
+        self.authorized_client.post(
+            CREATE_POST_URL,
+            data={
+                'text': TEST_DATA['test_post_text'],
+                'image': self.uploaded_image(),
+            },
+        )
+        post = Post.objects.get()
+        thumbnail = thumbnails.thumbnail_file(post.image, 'post')
+        self.assertIsNotNone(default.kvstore.get(thumbnail))
+        response = self.authorized_client.get(
+            reverse('posts:post_detail', kwargs={'post_id': post.id})
+        )
+        self.assertContains(response, thumbnail.url)
+        self.assertNotContains(response, PLACEHOLDER)
+
+    def test_placeholder_until_thumbnail_is_ready(self):
+        """Пока миниатюры нет, выводится заглушка"""
+        Post.objects.bulk_create([Post(
+            author=self.user,
+            text=TEST_DATA['test_post_text'],
+            image=self.uploaded_image(),
+        )])
+        post = Post.objects.get()
+        post_detail_url = reverse(
+            'posts:post_detail', kwargs={'post_id': post.id}
+        )
+        response = self.authorized_client.get(post_detail_url)
+        self.assertContains(response, PLACEHOLDER)
+        # Задача, поставленная первым просмотром, создала миниатюру
+        response = self.authorized_client.get(post_detail_url)
+        self.assertNotContains(response, PLACEHOLDER)
+
+    def test_page_thumbnails_are_prefetched_in_one_query(self):
+        """Записи о миниатюрах страницы загружаются одним запросом"""
+        for _ in range(3):
+            Post.objects.create(
+                author=self.user,
+                text=TEST_DATA['test_post_text'],
+                image=self.uploaded_image(),
+            )
+        posts = list(Post.objects.all())
+        files = [thumbnails.thumbnail_file(post.image, 'post')
+                 for post in posts]
+        cache.clear()
+        kvstore = LRUKVStore()
+        with self.assertNumQueries(1):
+            kvstore.prefetch(files)
+        with self.assertNumQueries(0):
+            for thumbnail in files:
+                self.assertIsNotNone(kvstore.get(thumbnail))
+        self.assertEqual(kvstore.stats()['hits'], len(files))
+        self.assertEqual(kvstore.stats()['hit_rate'], 1)
@@ -0,0 +1,93 @@
+import io
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, override_settings, TransactionTestCase
+from django.urls import reverse
+from PIL import Image
+
+from posts.models import Post, User
+
+
+CREATE_POST_URL = reverse('posts:post_create')
+TEST_DATA = {
+    'username': 'author',
+    'test_post_text': 'Тестовый пост с большой картинкой',
+    'test_image': (
+        b'\x47\x49\x46\x38\x39\x61\x02\x00'
+        b'\x01\x00\x80\x00\x00\x00\x00\x00'
+        b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+        b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+        b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+        b'\x0A\x00\x3B'
+    ),
+}
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def jpeg_with_exif(size):
+    image = Image.new('RGB', size, 'red')
+    exif = Image.Exif()
+    # Тег Make: производитель камеры
+    exif[0x010F] = 'Camera'
+    buffer = io.BytesIO()
+    image.save(buffer, format='JPEG', exif=exif.tobytes())
+    return buffer.getvalue()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, FILE_UPLOAD_MAX_MEMORY_SIZE=0)
+class PostImageUploadTests(TransactionTestCase):
+    # Оригинал обрабатывается фоновой задачей после фиксации транзакции
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.user = User.objects.create_user(username=TEST_DATA['username'])
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def create_post(self, name, content):
+        return self.authorized_client.post(
+            CREATE_POST_URL,
+            data={
+                'text': TEST_DATA['test_post_text'],
+                'image': SimpleUploadedFile(name, content),
+            },
+        )
+
+    @override_settings(UPLOAD_MAX_SIZE=10)
+    def test_too_large_file_is_rejected(self):
+        """Файл больше UPLOAD_MAX_SIZE отклоняется до раскодирования"""
+        response = self.create_post('test_image.gif', TEST_DATA['test_image'])
+        self.assertFormError(
+            response, 'form', 'image', 'Файл больше 10\xa0байт.')
+        self.assertFalse(Post.objects.exists())
+
+    @override_settings(POST_IMAGE_MAX_PIXELS=1)
+    def test_too_many_pixels_are_rejected(self):
+        """Картинка с числом пикселей больше лимита отклоняется"""
+        response = self.create_post('test_image.gif', TEST_DATA['test_image'])
+        self.assertTrue(
+            response.context['form'].has_error('image', 'too_many_pixels'))
+        self.assertFalse(Post.objects.exists())
+
+    @override_settings(POST_IMAGE_MAX_SIDE=10)
+    def test_large_original_is_downscaled_without_metadata(self):
+        """Большой оригинал уменьшается, а метаданные удаляются"""
+        self.create_post('photo.jpg', jpeg_with_exif((40, 20)))
+        post = Post.objects.get()
+        with Image.open(post.image.path) as image:
+            self.assertEqual(image.size, (10, 5))
+            self.assertNotIn('exif', image.info)
+
+    def test_small_original_is_kept(self):
+        """Небольшая картинка без метаданных сохраняется как есть"""
+        self.create_post('test_image.gif', TEST_DATA['test_image'])
+        post = Post.objects.get()
+        with open(post.image.path, 'rb') as image:
+            self.assertEqual(image.read(), TEST_DATA['test_image'])
@@ -3,6 +3,7 @@ from django.test import Client, TestCase
 from django.urls import reverse
 
 from posts.models import Group, Post, User
+from posts.utils import FeedPaginator
 
 
 INDEX_URL = reverse('posts:index')
@@ -232,3 +233,65 @@ class PaginatorViewsTest(TestCase):
                     reverse_page + '?page=2'
                 )
                 self.assertEqual(len(response.context['page_obj']), 3)
+
+    def test_next_cursor_page_matches_second_page(self):
+        """Курсор следующей страницы выдаёт те же посты,
+        что и вторая страница"""
+        reverses_for_paging = [
+            INDEX_URL,
+            self.GROUP_LIST_URL,
+            self.PROFILE_URL
+        ]
+        for reverse_page in reverses_for_paging:
+            with self.subTest(reverse_page=reverse_page):
+                first_page = self.guest_client.get(
+                    reverse_page).context['page_obj']
+                response = self.guest_client.get(
+                    reverse_page + '?cursor=' + first_page.next_cursor
+                )
+                cursor_page = response.context['page_obj']
+                second_page = self.guest_client.get(
+                    reverse_page + '?page=2').context['page_obj']
+                self.assertEqual(list(cursor_page), list(second_page))
+                self.assertFalse(cursor_page.has_next())
+                self.assertTrue(cursor_page.has_previous())
+
+    def test_previous_cursor_returns_first_page(self):
+        """Курсор предыдущей страницы возвращает на первую страницу"""
+        first_page = self.guest_client.get(INDEX_URL).context['page_obj']
+        second_page = self.guest_client.get(
+            INDEX_URL + '?cursor=' + first_page.next_cursor
+        ).context['page_obj']
+        response = self.guest_client.get(
+            INDEX_URL + '?cursor=' + second_page.previous_cursor
+        )
+        page_obj = response.context['page_obj']
+        self.assertEqual(list(page_obj), list(first_page))
+        self.assertFalse(page_obj.has_previous())
+
+    def test_last_cursor_returns_oldest_posts(self):
+        """Курсор последней страницы выдаёт самые старые посты"""
+        first_page = self.guest_client.get(INDEX_URL).context['page_obj']
+        response = self.guest_client.get(
+            INDEX_URL + '?cursor=' + first_page.paginator.last_cursor
+        )
+        page_obj = response.context['page_obj']
+        self.assertEqual(page_obj[len(page_obj) - 1], self.post_list[0])
+        self.assertFalse(page_obj.has_next())
+
+    def test_broken_cursor_returns_first_page(self):
+        """Испорченный курсор открывает первую страницу"""
+        response = self.guest_client.get(INDEX_URL + '?cursor=broken')
+        self.assertEqual(
+            response.context['page_obj'][0],
+            self.post_list[-1]
+        )
+
+    def test_elided_page_range(self):
+        """Номера страниц сокращаются многоточием"""
+        paginator = FeedPaginator(Post.objects.all(), 1)
+        self.assertEqual(
+            list(paginator.get_elided_page_range(7)),
+            [1, paginator.ELLIPSIS, 5, 6, 7, 8, 9,
+             paginator.ELLIPSIS, 13]
+        )
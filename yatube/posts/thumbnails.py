@@ -0,0 +1,104 @@
+import threading
+
+from django.conf import settings
+from sorl.thumbnail import default, get_thumbnail
+from sorl.thumbnail.conf import defaults as sorl_defaults
+from sorl.thumbnail.conf import settings as sorl_settings
+from sorl.thumbnail.images import ImageFile
+
+from core import background
+from posts import feed_cache, uploads
+from posts.models import Post
+
+
+# Имена картинок, для которых миниатюры уже готовятся:
+# повторные просмотры не ставят ту же задачу в очередь
+_pending = set()
+_pending_lock = threading.Lock()
+
+
+def thumbnail_options(source, geometry, options):
+    """Опции миниатюры с умолчаниями sorl, как в get_thumbnail:
+    от них зависит имя файла и ключ в хранилище sorl."""
+    backend = default.backend
+    options = dict(options)
+    if sorl_settings.THUMBNAIL_PRESERVE_FORMAT:
+        options.setdefault('format', backend._get_format(source))
+    for key, value in backend.default_options.items():
+        options.setdefault(key, value)
+    for key, attr in backend.extra_options:
+        value = getattr(sorl_settings, attr)
+        if value != getattr(sorl_defaults, attr):
+            options.setdefault(key, value)
+    return options
+
+
+def thumbnail_file(image, alias):
+    """Файл миниатюры (ещё не загруженный из хранилища sorl)."""
+    geometry, options = settings.THUMBNAIL_GEOMETRIES[alias]
+    source = ImageFile(image)
+    name = default.backend._get_thumbnail_filename(
+        source, geometry, thumbnail_options(source, geometry, options)
+    )
+    return ImageFile(name, default.storage)
+
+
+def ready_thumbnail(image, alias):
+    """Готовая миниатюра или None, если она ещё не создана.
+    Для отсутствующей миниатюры ставится фоновая задача."""
+    if not image:
+        return None
+    thumbnail = default.kvstore.get(thumbnail_file(image, alias))
+    if thumbnail is None:
+        schedule(image.name)
+    return thumbnail
+
+
+def prefetch(posts):
+    """Загружает записи о миниатюрах всех постов страницы одним запросом,
+    чтобы шаблон не обращался к хранилищу sorl за каждой картинкой."""
+    kvstore = default.kvstore
+    if not hasattr(kvstore, 'prefetch'):
+        return
+    kvstore.prefetch([
+        thumbnail_file(post.image, alias)
+        for post in posts if post.image
+        for alias in settings.THUMBNAIL_GEOMETRIES
+    ])
+
+
+def generate(image_name):
+    """Обрабатывает загруженный оригинал и создаёт миниатюры
+    во всех размерах из настроек."""
+    try:
+        post = (
+            Post.objects.select_related('author', 'group')
+            .filter(image=image_name).first()
+        )
+        if post is None:
+            return
+        # Сначала приводим оригинал к допустимому размеру:
+        # миниатюры строятся уже из него
+        name = uploads.normalize(post.image)
+        if name != post.image.name:
+            Post.objects.filter(pk=post.pk).update(image=name)
+            post.image.name = name
+        for geometry, options in settings.THUMBNAIL_GEOMETRIES.values():
+            get_thumbnail(post.image, geometry, **options)
+        # Закэшированные страницы с заглушкой больше не нужны
+        feed_cache.bump(feed_cache.post_scopes(
+            post.author.username,
+            post.group.slug if post.group_id else None,
+            post.pk
+        ))
+    finally:
+        with _pending_lock:
+            _pending.discard(image_name)
+
+
+def schedule(image_name):
+    with _pending_lock:
+        if image_name in _pending:
+            return
+        _pending.add(image_name)
+    background.submit(generate, image_name)
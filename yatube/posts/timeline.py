@@ -0,0 +1,138 @@
+from itertools import islice
+
+from django.conf import settings
+from django.db.models import Q
+
+from posts import stats
+from posts.models import Follow, Post, TimelineEntry
+
+# Порядок ленты подписок, совпадает с индексом timeline_feed_idx
+ORDERING = ('-pub_date', '-post_id')
+
+
+def is_pulled(followers_count):
+    """Посты автора с таким числом подписчиков не раскладываются
+    по лентам при публикации, а забираются при чтении ленты."""
+    return followers_count > settings.TIMELINE_FANOUT_LIMIT
+
+
+def add_entries(user_ids, posts):
+    """Добавляет посты (словари id, author_id, pub_date) в ленты
+    пользователей; уже добавленные пропускаются."""
+    TimelineEntry.objects.bulk_create([
+        TimelineEntry(
+            user_id=user_id,
+            post_id=post['id'],
+            author_id=post['author_id'],
+            pub_date=post['pub_date'],
+        )
+        for user_id in user_ids
+        for post in posts
+    ], ignore_conflicts=True)
+
+
+def fan_out(post_id):
+    """Раскладывает новый пост по лентам подписчиков автора
+    пачками по TIMELINE_BATCH_SIZE подписчиков."""
+    post = (
+        Post.objects.filter(pk=post_id)
+        .values('id', 'author_id', 'pub_date').first()
+    )
+    if post is None:
+        return
+    if is_pulled(stats.peek_followers_count(post['author_id'])):
+        return
+    followers = (
+        Follow.objects.filter(author_id=post['author_id']).order_by()
+        .values_list('user_id', flat=True)
+        .iterator(chunk_size=settings.TIMELINE_BATCH_SIZE)
+    )
+    while True:
+        user_ids = list(islice(followers, settings.TIMELINE_BATCH_SIZE))
+        if not user_ids:
+            return
+        add_entries(user_ids, [post])
+
+
+def copy_posts(follow_id, user_id, author_id, since=None):
+    """Переносит в ленту подписчика посты автора: без since - последние
+    TIMELINE_BACKFILL, иначе все опубликованные после since, пачками
+    от старых к новым. pulled_until - дата последнего перенесённого
+    поста, поэтому прерванный перенос продолжится с того же места."""
+    posts = Post.objects.filter(author_id=author_id)
+    if since is None:
+        posts = list(
+            posts.values('id', 'author_id', 'pub_date')
+            [:settings.TIMELINE_BACKFILL]
+        )
+        if posts:
+            add_entries([user_id], posts)
+            Follow.objects.filter(pk=follow_id).update(
+                pulled_until=posts[0]['pub_date'])
+        return
+    posts = posts.order_by('pub_date', 'id')
+    after = Q(pub_date__gt=since)
+    while True:
+        batch = list(
+            posts.filter(after).values('id', 'author_id', 'pub_date')
+            [:settings.TIMELINE_BATCH_SIZE]
+        )
+        if not batch:
+            return
+        add_entries([user_id], batch)
+        last = batch[-1]
+        Follow.objects.filter(pk=follow_id).update(
+            pulled_until=last['pub_date'])
+        after = Q(pub_date__gt=last['pub_date']) | Q(
+            pub_date=last['pub_date'], id__gt=last['id'])
+
+
+def follow_added(follow_id):
+    """Новая подписка: в ленту попадают последние посты автора."""
+    follow = (
+        Follow.objects.filter(pk=follow_id)
+        .values('id', 'user_id', 'author_id').first()
+    )
+    if follow is not None:
+        copy_posts(follow['id'], follow['user_id'], follow['author_id'])
+
+
+def pull(user_id):
+    """Забирает в ленту новые посты авторов, которые из-за числа
+    подписчиков не раскладываются по лентам при публикации."""
+    limit = settings.TIMELINE_FANOUT_LIMIT
+    follows = (
+        Follow.objects.filter(user_id=user_id)
+        .filter(
+            Q(author__stats__followers_count__gt=limit)
+            # Статистику могли удалить (импорт): считаем её заново
+            | Q(author__stats__isnull=True)
+        )
+        .values_list('id', 'author_id', 'pulled_until', 'author__stats')
+    )
+    for follow_id, author_id, pulled_until, stats_id in follows:
+        if stats_id is None and not is_pulled(
+            stats.followers_count(author_id)
+        ):
+            continue
+        copy_posts(follow_id, user_id, author_id, pulled_until)
+
+
+def catch_up(author_id):
+    """Автор снова раскладывает посты при публикации: подписчикам,
+    которые давно не читали ленту, переносятся пропущенные посты."""
+    follows = list(
+        Follow.objects.filter(author_id=author_id)
+        .values_list('id', 'user_id', 'pulled_until')
+    )
+    for follow_id, user_id, pulled_until in follows:
+        copy_posts(follow_id, user_id, author_id, pulled_until)
+
+
+def entries(user):
+    """Лента подписок пользователя: один диапазон индекса
+    timeline_feed_idx вместе с постами, авторами и группами."""
+    return (
+        TimelineEntry.objects.filter(user=user)
+        .select_related('post__author', 'post__group')
+    )
@@ -0,0 +1,108 @@
+import io
+
+from django import forms
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.template.defaultfilters import filesizeformat
+from PIL import Image, ImageOps
+
+# Метаданные, которые не сохраняются в оригинале картинки
+METADATA_KEYS = ('exif', 'xmp', 'XML:com.adobe.xmp', 'comment')
+JPEG_QUALITY = 85
+
+
+class LimitedUploadHandler(TemporaryFileUploadHandler):
+    """Пишет загрузку во временный файл по частям. После
+    UPLOAD_MAX_SIZE байт данные больше не пишутся на диск, но размер
+    файла считается полностью, чтобы форма могла его отклонить."""
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.received = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received <= settings.UPLOAD_MAX_SIZE:
+            self.file.write(raw_data)
+
+
+class PostImageField(forms.ImageField):
+    """Поле картинки, которое проверяет размер файла и число пикселей
+    до того, как ImageField раскодирует картинку."""
+
+    default_error_messages = {
+        'too_large': 'Файл больше %(limit)s.',
+        'too_many_pixels': (
+            'Картинка больше %(limit)s мегапикселей.'
+        ),
+    }
+
+    def to_python(self, data):
+        if data and data.size > settings.UPLOAD_MAX_SIZE:
+            raise forms.ValidationError(
+                self.error_messages['too_large'],
+                code='too_large',
+                params={'limit': filesizeformat(settings.UPLOAD_MAX_SIZE)},
+            )
+        if data:
+            self.check_pixels(data)
+        return super().to_python(data)
+
+    def check_pixels(self, data):
+        # Image.open читает только заголовок, пиксели не раскодируются
+        try:
+            with Image.open(data) as image:
+                width, height = image.size
+        except Exception:
+            # Ошибку формата покажет проверка ImageField
+            return
+        finally:
+            data.seek(0)
+        if width * height > settings.POST_IMAGE_MAX_PIXELS:
+            raise forms.ValidationError(
+                self.error_messages['too_many_pixels'],
+                code='too_many_pixels',
+                params={
+                    'limit': settings.POST_IMAGE_MAX_PIXELS // 1000000,
+                },
+            )
+
+
+def needs_normalizing(image):
+    max_side = settings.POST_IMAGE_MAX_SIDE
+    return (
+        max(image.size) > max_side
+        or any(key in image.info for key in METADATA_KEYS)
+    )
+
+
+def normalize(field_file):
+    """Убирает метаданные из оригинала и уменьшает его до
+    POST_IMAGE_MAX_SIDE по большей стороне. Возвращает имя файла:
+    хранилище может выдать новое, если старое успели занять."""
+    storage = field_file.storage
+    name = field_file.name
+    with storage.open(name) as source, Image.open(source) as image:
+        if getattr(image, 'is_animated', False):
+            return name
+        if not needs_normalizing(image):
+            return name
+        image_format = image.format
+        icc_profile = image.info.get('icc_profile')
+        max_side = settings.POST_IMAGE_MAX_SIDE
+        # Для JPEG thumbnail() раскодирует картинку сразу в уменьшенном
+        # масштабе (draft), поэтому память ограничена итоговым размером
+        image.thumbnail((max_side, max_side))
+        image = ImageOps.exif_transpose(image)
+        if image_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+        options = {}
+        if icc_profile:
+            options['icc_profile'] = icc_profile
+        if image_format == 'JPEG':
+            options.update(quality=JPEG_QUALITY, optimize=True)
+        buffer = io.BytesIO()
+        image.save(buffer, format=image_format, **options)
+    storage.delete(name)
+    return storage.save(name, ContentFile(buffer.getvalue()))
@@ -11,11 +11,46 @@ urlpatterns = [
         views.group_list,
         name='group_list'
     ),
+    path(
+        'group/<slug:slug>/feed/',
+        views.group_feed,
+        name='group_feed'
+    ),
     path(
         '',
         views.index,
         name='index'
     ),
+    path(
+        'feed/',
+        views.index_feed,
+        name='feed'
+    ),
+    path(
+        'follow/',
+        views.follow_index,
+        name='follow_index'
+    ),
+    path(
+        'search/',
+        views.search_posts,
+        name='search'
+    ),
+    path(
+        'profile/<str:username>/feed/',
+        views.profile_feed,
+        name='profile_feed'
+    ),
+    path(
+        'profile/<str:username>/follow/',
+        views.profile_follow,
+        name='profile_follow'
+    ),
+    path(
+        'profile/<str:username>/unfollow/',
+        views.profile_unfollow,
+        name='profile_unfollow'
+    ),
     path(
         'profile/<str:username>/',
         views.profile,
@@ -25,6 +60,11 @@ urlpatterns = [
         'posts/<int:post_id>/comment/',
         views.add_comment,
         name='add_comment'),
+    path(
+        'posts/<int:post_id>/comments/',
+        views.post_comments,
+        name='post_comments'
+    ),
     path(
         'posts/<int:post_id>/edit/',
         views.post_edit,
@@ -35,6 +75,11 @@ urlpatterns = [
         views.post_detail,
         name='post_detail'
     ),
+    path(
+        'export/<str:kind>/',
+        views.export,
+        name='export'
+    ),
     path(
         'create/',
         views.post_create,
@@ -1,10 +1,208 @@
-from django.core.paginator import Paginator
+import base64
+import binascii
+import json
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import Page, Paginator
+from django.db.models import Q
+
+from posts import counters
+from posts.models import Comment
 
 
 POST_ON_PAGE = 10
+COMMENTS_ON_PAGE = 20
+# Порядок ленты: по дате публикации, при равных датах - по id
+FEED_ORDERING = ('-pub_date', '-id')
+COMMENTS_ORDERING = ('created', 'id')
+# Направления курсора: следующая и предыдущая страницы
+NEXT = 'n'
+PREVIOUS = 'p'
+
+
+class ElidedPaginator(Paginator):
+    """Постраничный вывод с сокращённым списком номеров страниц."""
+    ELLIPSIS = '…'
+    ON_EACH_SIDE = 2
+    ON_ENDS = 1
+
+    def _get_page(self, *args, **kwargs):
+        return ElidedPage(*args, **kwargs)
+
+    def get_elided_page_range(self, number=1):
+        """Номера страниц вокруг текущей и по краям,
+        пропуски между ними заменяются на ELLIPSIS."""
+        number = self.validate_number(number)
+        on_each_side, on_ends = self.ON_EACH_SIDE, self.ON_ENDS
+        if self.num_pages <= (on_each_side + on_ends) * 2:
+            yield from self.page_range
+            return
+        if number > on_each_side + on_ends + 2:
+            yield from range(1, on_ends + 1)
+            yield self.ELLIPSIS
+            yield from range(number - on_each_side, number + 1)
+        else:
+            yield from range(1, number + 1)
+        if number < self.num_pages - on_each_side - on_ends - 1:
+            yield from range(number + 1, number + on_each_side + 1)
+            yield self.ELLIPSIS
+            yield from range(self.num_pages - on_ends + 1, self.num_pages + 1)
+        else:
+            yield from range(number + 1, self.num_pages + 1)
+
+
+class ElidedPage(Page):
+    @property
+    def elided_page_range(self):
+        return self.paginator.get_elided_page_range(self.number)
+
+
+class FeedPaginator(ElidedPaginator):
+    """Постраничный вывод ленты с курсорами
+    для перехода на соседние страницы."""
+
+    def __init__(self, object_list, per_page, ordering=FEED_ORDERING,
+                 count=None, **kwargs):
+        self.ordering = ordering
+        super().__init__(object_list.order_by(*ordering), per_page, **kwargs)
+        if count is not None:
+            # Число объектов известно заранее, COUNT(*) не нужен
+            self.count = count
+
+    def _get_page(self, *args, **kwargs):
+        return FeedPage(*args, **kwargs)
+
+    @property
+    def last_cursor(self):
+        """Курсор последней страницы: первая страница в обратном порядке."""
+        return self.encode_cursor(PREVIOUS, None)
+
+    def encode_cursor(self, direction, obj):
+        values = None
+        if obj is not None:
+            values = [
+                str(getattr(obj, field.lstrip('-')))
+                for field in self.ordering
+            ]
+        data = json.dumps([direction, values], separators=(',', ':'))
+        return base64.urlsafe_b64encode(data.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        """Разбирает курсор, для испорченного курсора возвращает None."""
+        try:
+            padding = '=' * (-len(cursor) % 4)
+            direction, values = json.loads(
+                base64.urlsafe_b64decode(cursor + padding)
+            )
+            if direction not in (NEXT, PREVIOUS):
+                return None
+            if values is not None:
+                if len(values) != len(self.ordering):
+                    return None
+                model = self.object_list.model
+                values = [
+                    model._meta.get_field(field.lstrip('-')).to_python(value)
+                    for field, value in zip(self.ordering, values)
+                ]
+        except (ValueError, TypeError, binascii.Error, ValidationError):
+            return None
+        return direction, values
+
+    def keyset_filter(self, values, backwards=False):
+        """Условие "строки после курсора" для составного ключа сортировки."""
+        condition = Q()
+        for index, field in enumerate(self.ordering):
+            lookup = 'lt' if field.startswith('-') != backwards else 'gt'
+            part = Q(**{f'{field.lstrip("-")}__{lookup}': values[index]})
+            for previous, value in zip(self.ordering[:index], values):
+                part &= Q(**{previous.lstrip('-'): value})
+            condition |= part
+        return condition
 
 
-def paginating(request, post_list):
-    paginator = Paginator(post_list, POST_ON_PAGE)
+class FeedPage(ElidedPage):
+    @property
+    def next_cursor(self):
+        if not self.has_next():
+            return None
+        return self.paginator.encode_cursor(NEXT, self[-1])
+
+    @property
+    def previous_cursor(self):
+        if not self.has_previous():
+            return None
+        return self.paginator.encode_cursor(PREVIOUS, self[0])
+
+
+class CursorPaginator(FeedPaginator):
+    """Курсорный (keyset) постраничный вывод: без COUNT и OFFSET,
+    каждая страница читается от ключа сортировки соседней."""
+
+    @property
+    def count(self):
+        return None
+
+    def page(self, cursor):
+        direction, values = self.decode_cursor(cursor or '') or (NEXT, None)
+        backwards = direction == PREVIOUS
+        queryset = self.object_list
+        if values is not None:
+            queryset = queryset.filter(self.keyset_filter(values, backwards))
+        if backwards:
+            queryset = queryset.reverse()
+        object_list = list(queryset[:self.per_page + 1])
+        has_more = len(object_list) > self.per_page
+        object_list = object_list[:self.per_page]
+        if backwards:
+            object_list.reverse()
+            return CursorPage(
+                object_list, self,
+                has_next=values is not None, has_previous=has_more
+            )
+        return CursorPage(
+            object_list, self,
+            has_next=has_more, has_previous=values is not None
+        )
+
+
+class CursorPage(FeedPage):
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        super().__init__(object_list, None, paginator)
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __repr__(self):
+        return '<Cursor page>'
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    @property
+    def elided_page_range(self):
+        return ()
+
+
+def paginating(request, post_list, per_page=POST_ON_PAGE,
+               ordering=FEED_ORDERING, counter_key=None, count=None):
+    cursor = request.GET.get('cursor')
+    if cursor:
+        return CursorPaginator(post_list, per_page, ordering).page(cursor)
+    if count is None and counter_key is not None:
+        count = counters.get_count(counter_key, post_list)
+    paginator = FeedPaginator(post_list, per_page, ordering, count=count)
     page_number = request.GET.get('page')
     return paginator.get_page(page_number)
+
+
+def paginate_comments(request, post_id):
+    """Комментарии к посту с авторами одним запросом,
+    курсорными страницами по времени создания."""
+    comments = Comment.objects.filter(
+        post_id=post_id).select_related('author')
+    paginator = CursorPaginator(
+        comments, COMMENTS_ON_PAGE, COMMENTS_ORDERING
+    )
+    return paginator.page(request.GET.get('cursor'))
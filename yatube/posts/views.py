@@ -1,14 +1,26 @@
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
+from django.http import (Http404, HttpResponseBadRequest,
+                         StreamingHttpResponse)
 from django.shortcuts import get_object_or_404, redirect, render
+from django.urls import reverse
 
-from posts.models import Comment, Group, Post, User
+from posts import (counters, exporter, feed_cache, feeds, search, stats,
+                   thumbnails, timeline)
+from posts.models import Follow, Group, Post, User
 from posts.forms import CommentForm, PostForm
-from posts.utils import paginating
+from posts.utils import (POST_ON_PAGE, CursorPaginator, ElidedPaginator,
+                         paginate_comments, paginating)
 
 
+@feed_cache.conditional_feed(lambda: [feed_cache.ALL])
+@feed_cache.cache_feed('posts:index', lambda: [feed_cache.ALL])
 def index(request):
     post_list = Post.objects.select_related('author', 'group')
-    page_obj = paginating(request, post_list)
+    page_obj = paginating(
+        request, post_list, counter_key=counters.ALL_POSTS
+    )
+    thumbnails.prefetch(page_obj)
     template = 'posts/index.html'
     context = {
         'page_obj': page_obj,
@@ -16,10 +28,17 @@ def index(request):
     return render(request, template, context)
 
 
+@feed_cache.conditional_feed(lambda slug: [feed_cache.group_scope(slug)])
+@feed_cache.cache_feed(
+    'posts:group_list', lambda slug: [feed_cache.group_scope(slug)]
+)
 def group_list(request, slug):
     group = get_object_or_404(Group, slug=slug)
     post_list = group.posts.select_related('author', 'group')
-    page_obj = paginating(request, post_list)
+    page_obj = paginating(
+        request, post_list, counter_key=counters.group_key(group.id)
+    )
+    thumbnails.prefetch(page_obj)
     template = 'posts/group_list.html'
     context = {
         'group': group,
@@ -28,30 +47,146 @@ def group_list(request, slug):
     return render(request, template, context)
 
 
+@feed_cache.conditional_feed(
+    lambda username: [feed_cache.author_scope(username)]
+)
+@feed_cache.cache_feed(
+    'posts:profile', lambda username: [feed_cache.author_scope(username)]
+)
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
+    author = get_object_or_404(
+        User.objects.select_related('stats'), username=username
+    )
+    author_stats = stats.for_author(author)
     user_posts = author.posts.select_related('author', 'group')
-    page_obj = paginating(request, user_posts)
+    page_obj = paginating(
+        request, user_posts, count=author_stats.posts_count
+    )
+    thumbnails.prefetch(page_obj)
     template = 'posts/profile.html'
     context = {
         'author': author,
+        'author_stats': author_stats,
         'page_obj': page_obj,
     }
     return render(request, template, context)
 
 
+@login_required
+def follow_index(request):
+    timeline.pull(request.user.pk)
+    paginator = CursorPaginator(
+        timeline.entries(request.user), POST_ON_PAGE, timeline.ORDERING
+    )
+    page_obj = paginator.page(request.GET.get('cursor'))
+    posts = [entry.post for entry in page_obj]
+    thumbnails.prefetch(posts)
+    context = {
+        'page_obj': page_obj,
+        'posts': posts,
+    }
+    return render(request, 'posts/follow.html', context)
+
+
+@login_required
+def profile_follow(request, username):
+    author = get_object_or_404(User, username=username)
+    if author != request.user:
+        Follow.objects.get_or_create(user=request.user, author=author)
+    return redirect('posts:profile', username=username)
+
+
+@login_required
+def profile_unfollow(request, username):
+    Follow.objects.filter(
+        user=request.user, author__username=username
+    ).delete()
+    return redirect('posts:profile', username=username)
+
+
+@feed_cache.conditional_feed(lambda: [feed_cache.ALL])
+def index_feed(request):
+    return feeds.atom_response(
+        request, 'Последние обновления на сайте', reverse('posts:index'),
+        Post.objects.all()
+    )
+
+
+@feed_cache.conditional_feed(lambda slug: [feed_cache.group_scope(slug)])
+def group_feed(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    return feeds.atom_response(
+        request, group.title,
+        reverse('posts:group_list', kwargs={'slug': slug}), group.posts.all()
+    )
+
+
+@feed_cache.conditional_feed(
+    lambda username: [feed_cache.author_scope(username)]
+)
+def profile_feed(request, username):
+    author = get_object_or_404(User, username=username)
+    return feeds.atom_response(
+        request, f'Записи пользователя {author.get_full_name() or username}',
+        reverse('posts:profile', kwargs={'username': username}),
+        author.posts.all()
+    )
+
+
+def search_posts(request):
+    query = request.GET.get('q', '').strip()
+    paginator = ElidedPaginator(search.SearchResults(query), POST_ON_PAGE)
+    page_obj = paginator.get_page(request.GET.get('page'))
+    context = {
+        'query': query,
+        'page_obj': page_obj,
+    }
+    return render(request, 'posts/search.html', context)
+
+
+def post_detail_scopes(post_id):
+    # Страница поста зависит от него самого и от числа постов автора;
+    # имя автора - один запрос по первичному ключу
+    usernames = (
+        Post.objects.filter(pk=post_id).order_by()
+        .values_list('author__username', flat=True)[:1]
+    )
+    if not usernames:
+        return None
+    return [
+        feed_cache.author_scope(usernames[0]),
+        feed_cache.post_scope(post_id),
+    ]
+
+
+@feed_cache.conditional_feed(post_detail_scopes)
+@feed_cache.cache_feed('posts:post_detail', post_detail_scopes)
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
-    comment_form = CommentForm(request.POST or None)
-    comments = Comment.objects.filter(post_id=post_id)
+    post = get_object_or_404(
+        Post.objects.select_related('author__stats', 'group'), pk=post_id
+    )
+    comments = paginate_comments(request, post_id)
     context = {
         'post': post,
-        'comment_form': comment_form,
+        'author_stats': stats.for_author(post.author),
         'comments': comments
     }
     return render(request, 'posts/post_detail.html', context)
 
 
+@feed_cache.conditional_feed(
+    lambda post_id: [feed_cache.post_scope(post_id)]
+)
+def post_comments(request, post_id):
+    """Следующая страница комментариев фрагментом HTML."""
+    get_object_or_404(Post.objects.only('pk'), pk=post_id)
+    context = {
+        'post_id': post_id,
+        'comments': paginate_comments(request, post_id),
+    }
+    return render(request, 'posts/includes/comments_list.html', context)
+
+
 @login_required
 def post_create(request):
     form = PostForm(
@@ -100,3 +235,26 @@ def add_comment(request, post_id):
         comment.post = post
         comment.save()
     return redirect('posts:post_detail', post_id=post_id)
+
+
+@staff_member_required
+def export(request, kind):
+    """Потоковая выгрузка постов или комментариев для аналитики.
+    Параметры: format (jsonl, csv), since (ISO 8601), gzip."""
+    file_format = request.GET.get('format', 'jsonl')
+    if kind not in exporter.KINDS or file_format not in exporter.FORMATS:
+        raise Http404
+    try:
+        since = exporter.parse_since(request.GET.get('since'))
+    except ValueError:
+        return HttpResponseBadRequest('Неверная дата в since')
+    compress = 'gzip' in request.GET
+    chunks = exporter.Export(kind, since).chunks(file_format, compress)
+    filename = f'{kind}.{file_format}'
+    content_type = exporter.CONTENT_TYPES[file_format]
+    if compress:
+        filename += '.gz'
+        content_type = 'application/gzip'
+    response = StreamingHttpResponse(chunks, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/2.2/ref/settings/
 """
 
 import os
+import sys
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -29,6 +30,9 @@ CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = True
 
+# Проект запущен тестами: manage.py test или pytest
+TESTING = sys.argv[1:2] == ['test'] or 'pytest' in sys.modules
+
 # Константа заполнена для использования программного клиента
 ALLOWED_HOSTS = [
     'localhost',
@@ -54,26 +58,63 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.metrics.MetricsMiddleware',
+    'core.replicas.ReplicaMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
+    'core.staticfiles.StaticFilesMiddleware',
+    'core.compression.CompressionMiddleware',
+    'core.sessions.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.holes.HolePunchMiddleware',
 ]
 
+# Фрагменты страниц, зависящие от пользователя: имя -> функция,
+# возвращающая HTML. Страница выводит на их месте {% hole 'имя' %},
+# кэшируется одна на всех, а фрагменты подставляет
+# core.holes.HolePunchMiddleware.
+HOLES = {
+    'user_menu': 'core.holes.user_menu',
+    'post_edit_link': 'posts.holes.post_edit_link',
+    'comment_form': 'posts.holes.comment_form',
+    'follow_button': 'posts.holes.follow_button',
+}
+
 ROOT_URLCONF = 'yatube.urls'
 
+# Сессия хранится в подписанной куке: запрос вошедшего пользователя
+# не читает сессию из базы. Анонимные GET к приложениям из
+# SESSIONLESS_APPS не получают Vary: Cookie (core.sessions).
+SESSION_ENGINE = 'django.contrib.sessions.backends.signed_cookies'
+SESSION_COOKIE_HTTPONLY = True
+SESSIONLESS_APPS = ['posts', 'about']
+
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
+# Загрузчики убирают из HTML-шаблонов отступы и пустые строки при
+# компиляции (core.template_loaders) и сжимают файл заново только после
+# правки; как и у Django по умолчанию, без DEBUG скомпилированные
+# шаблоны кэшируются.
+TEMPLATE_LOADERS = [
+    'core.template_loaders.FilesystemLoader',
+    'core.template_loaders.AppDirectoriesLoader',
+]
+if not DEBUG:
+    TEMPLATE_LOADERS = [
+        ('django.template.loaders.cached.Loader', TEMPLATE_LOADERS)]
+# Шаблоны писем: переносы строк в них важны
+MINIFY_TEMPLATES_EXCLUDE = ['registration/password_reset_email.html']
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # Шаблоны Django с замером времени рендеринга (core.metrics)
+        'BACKEND': 'core.template_backends.DjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
-        'APP_DIRS': True,
         'OPTIONS': {
+            'loaders': TEMPLATE_LOADERS,
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -90,20 +131,174 @@ TEMPLATES = [
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Загрузки пишутся на диск по частям (posts.uploads); данные сверх
+# UPLOAD_MAX_SIZE не сохраняются, а форма отклоняет такой файл.
+FILE_UPLOAD_HANDLERS = [
+    'django.core.files.uploadhandler.MemoryFileUploadHandler',
+    'posts.uploads.LimitedUploadHandler',
+]
+UPLOAD_MAX_SIZE = 10 * 1024 * 1024
+# Картинки поста: больше POST_IMAGE_MAX_PIXELS не принимаются до
+# раскодирования, а оригиналы больше POST_IMAGE_MAX_SIDE уменьшаются
+# в фоне вместе с удалением метаданных.
+POST_IMAGE_MAX_PIXELS = 40 * 1000 * 1000
+POST_IMAGE_MAX_SIDE = 2560
+
 
 WSGI_APPLICATION = 'yatube.wsgi.application'
 
 
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# Кэш страниц лент с ключами по поколениям (posts.feed_cache).
+# Время жизни страницы в секундах для каждого view; 0 - не кэшировать.
+# В тестах кэш выключен: закэшированный ответ не несёт context.
+FEED_CACHE_ENABLED = not TESTING
+FEED_CACHE_TIMEOUTS = {
+    'posts:index': 60,
+    'posts:group_list': 300,
+    'posts:profile': 300,
+    'posts:post_detail': 300,
+}
+
+# Отрендеренные посты лент (posts.fragments): ключ содержит версию
+# поста, поэтому устаревший фрагмент просто не будет найден.
+# Время жизни в секундах; 0 - не кэшировать.
+POST_FRAGMENT_TIMEOUT = 24 * 60 * 60
+
+# Наибольшее число запросов к базе для view (core.query_budget);
+# проверяется тестами tests/test_query_budgets.py
+QUERY_BUDGETS = {
+    'posts:index': 2,
+    'posts:group_list': 3,
+    'posts:profile': 2,
+    'posts:post_detail': 3,
+    'posts:follow_index': 3,
+    'posts:post_create': 10,
+    'posts:add_comment': 4,
+}
+
+# Метрики процесса в формате Prometheus (core.metrics) по адресу
+# /metrics: доступны персоналу и по заголовку
+# Authorization: Bearer <METRICS_TOKEN>.
+METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+METRICS_COLLECTORS = [
+    'posts.metrics.thumbnail_kvstore',
+    'posts.metrics.feed_cache_outcomes',
+]
+
+# Сжатие ответов (core.compression): кодировки в порядке
+# предпочтения и уровни сжатия. Ответы меньше COMPRESSION_MIN_SIZE
+# байт не сжимаются. Подобрать значения помогает
+# manage.py compression_report.
+COMPRESSION_LEVELS = {
+    'br': 5,
+    'gzip': 6,
+}
+COMPRESSION_MIN_SIZE = 200
+
+# Ленты подписок (posts.timeline). Новый пост раскладывается по лентам
+# подписчиков в фоне пачками по TIMELINE_BATCH_SIZE; посты авторов,
+# у которых больше TIMELINE_FANOUT_LIMIT подписчиков, забираются
+# читателем при открытии ленты: все посты после последнего забранного,
+# пачками по TIMELINE_BATCH_SIZE. При подписке в ленту переносится
+# не больше TIMELINE_BACKFILL последних постов автора.
+TIMELINE_FANOUT_LIMIT = 10000
+TIMELINE_BATCH_SIZE = 500
+TIMELINE_BACKFILL = 100
+
+# Сколько последних постов попадает в Atom-ленты (posts.feeds)
+ATOM_FEED_ENTRIES = 50
+
+# Фоновые задачи (core.background): пул потоков процесса.
+# В тестах задачи выполняются сразу. Задача, получившая
+# "database is locked", повторяется до BACKGROUND_BUSY_RETRIES раз
+# с паузой от BACKGROUND_BUSY_BACKOFF секунд, растущей вдвое.
+BACKGROUND_WORKERS = 2
+BACKGROUND_TASKS_SYNC = TESTING
+BACKGROUND_BUSY_RETRIES = 3
+BACKGROUND_BUSY_BACKOFF = 0.5
+
+# Миниатюры картинок постов: имя -> (геометрия, опции sorl-thumbnail).
+# Создаются в фоне после загрузки картинки.
+THUMBNAIL_GEOMETRIES = {
+    'post': ('960x339', {'crop': 'center', 'upscale': True}),
+}
+# Записи о миниатюрах читаются через LRU-кэш процесса
+THUMBNAIL_KVSTORE = 'posts.kvstore.LRUKVStore'
+THUMBNAIL_LRU_SIZE = 2048
+
+
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
 
+# SQLite с PRAGMA на каждое соединение (core.db.sqlite3): журнал WAL,
+# чтобы читатели не ждали писателей, ожидание занятой базы вместо
+# ошибки и кэш страниц побольше. Запрос вне atomic(), получивший
+# "database is locked", повторяется до busy_retries раз, но всё
+# ожидание вместе с busy_timeout не дольше SQLITE_BUSY_MAX_WAIT секунд.
+# Сравнить настройки: manage.py sqlite_benchmark.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'busy_timeout': 5000,
+    # Отрицательное значение - размер в килобайтах
+    'cache_size': -64000,
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'memory',
+}
+SQLITE_BUSY_RETRIES = 5
+SQLITE_BUSY_BACKOFF = 0.05
+SQLITE_BUSY_MAX_WAIT = 5
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'core.db.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'OPTIONS': {
+            'pragmas': SQLITE_PRAGMAS,
+            'busy_retries': SQLITE_BUSY_RETRIES,
+            'busy_backoff': SQLITE_BUSY_BACKOFF,
+            'busy_max_wait': SQLITE_BUSY_MAX_WAIT,
+        },
     }
 }
 
+# Реплики для чтения (core.replicas): копии основной базы, которые
+# обновляет manage.py sync_replicas --interval N. GET-запросы к
+# REPLICA_VIEWS читают с реплики; клиент, который только что менял
+# данные, REPLICA_PIN_SECONDS читает с основной базы. Время должно
+# быть больше интервала копирования.
+DATABASE_REPLICAS = []
+for number in range(int(os.getenv('DATABASE_REPLICAS', 0))):
+    alias = f'replica{number}'
+    DATABASES[alias] = {
+        'ENGINE': 'core.db.sqlite3',
+        'NAME': os.path.join(BASE_DIR, f'db-{alias}.sqlite3'),
+        'OPTIONS': {
+            # Реплика подменяется целиком при копировании
+            # и не должна переходить на WAL
+            'pragmas': {
+                name: value for name, value in SQLITE_PRAGMAS.items()
+                if name != 'journal_mode'
+            },
+        },
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(alias)
+DATABASE_ROUTERS = ['core.replicas.ReplicaRouter']
+REPLICA_VIEWS = [
+    'posts:index',
+    'posts:group_list',
+    'posts:profile',
+    'posts:post_detail',
+]
+REPLICA_PIN_SECONDS = 30
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -149,3 +344,17 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/2.2/howto/static-files/
 
 STATIC_URL = '/static/'
+STATIC_ROOT = os.path.join(BASE_DIR, 'collected_static')
+# collectstatic добавляет к именам хэш содержимого и пишет рядом
+# копии .gz и .br; отдаёт их core.staticfiles.StaticFilesMiddleware
+STATICFILES_STORAGE = 'core.staticfiles.CompressedManifestStorage'
+# Файл, которого нет в манифесте collectstatic, - ошибка: иначе он ушёл
+# бы без хэша в имени. В тестах collectstatic не запускается.
+STATIC_MANIFEST_STRICT = not TESTING
+# Файлы меньше этого размера не сжимаются
+STATIC_COMPRESS_MIN_SIZE = 256
+# Cache-Control для файлов без хэша в имени, в секундах
+STATIC_MAX_AGE = 60 * 60
+# Файлы, которые HTML-страницы предлагают загрузить заранее
+# (заголовок Link: rel=preload)
+STATIC_PRELOAD = ['css/bootstrap.min.css']